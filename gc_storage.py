@@ -0,0 +1,22 @@
+"""
+Удаление объектов MinIO и локальных файлов, на которые не ссылается база.
+
+python gc_storage.py            – пробный прогон, только отчёт
+python gc_storage.py --delete   – удалить найденное
+"""
+import sys
+from asyncio import run
+
+from server.database import async_session
+from server.repositories import StorageGcRepository
+from server.services.StorageGcService import StorageGcService
+
+
+async def main(dry_run: bool):
+    async with async_session() as session:
+        report = await StorageGcService(StorageGcRepository(session)).collect(dry_run)
+    print(report.model_dump_json(indent=2))
+
+
+if __name__ == "__main__":
+    run(main("--delete" not in sys.argv[1:]))
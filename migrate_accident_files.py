@@ -0,0 +1,39 @@
+"""
+Перенос вложений аварий с локального диска в MinIO.
+
+Раньше файлы лежали в <static>/<объект>/<uuid аварии>/<файл>, теперь –
+в blob-хранилище бакета document: слот ("accident", <uuid аварии>, <файл>)
+ссылается на объект с адресацией по SHA-256, одинаковые файлы загружаются
+один раз.
+
+python migrate_accident_files.py <путь к каталогу static>
+"""
+import sys
+from asyncio import run
+from mimetypes import guess_type
+from pathlib import Path
+
+from server.database import async_session
+from server.repositories import BlobRepository
+from server.services.BlobService import BlobService
+from server.settings import settings
+
+
+async def migrate(static_dir: Path):
+    async with async_session() as session:
+        blob_service = BlobService(BlobRepository(session))
+        for file_path in static_dir.glob("*/*/*"):
+            if not file_path.is_file():
+                continue
+            uuid_accident = file_path.parent.name
+            content_type = guess_type(file_path.name)[0] or "application/octet-stream"
+            blob = await blob_service.attach_path("accident",
+                                                  uuid_accident,
+                                                  file_path.name,
+                                                  str(file_path),
+                                                  content_type)
+            print(f"{file_path} -> {blob.file_key}")
+
+
+if __name__ == "__main__":
+    run(migrate(Path(sys.argv[1] if len(sys.argv) > 1 else Path(settings.root_path, "static"))))
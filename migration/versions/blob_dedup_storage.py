@@ -0,0 +1,55 @@
+"""content-addressed blob storage
+
+Revision ID: blob_dedup_storage
+Revises: 9969e83ada01
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "blob_dedup_storage"
+down_revision: Union[str, None] = "9969e83ada01"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """
+    blob – одно содержимое (по SHA-256) = один объект в MinIO, ref_count – число ссылок.
+    blob_slot – ссылки владельцев (заявка, авария, бланк) на blob.
+    """
+    op.create_table(
+        "blob",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("hash", sa.String(length=64), nullable=False),
+        sa.Column("file_key", sa.String(), nullable=False),
+        sa.Column("size", sa.BigInteger(), nullable=False),
+        sa.Column("content_type", sa.String(), nullable=True),
+        sa.Column("ref_count", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("datetime", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("hash"),
+        sa.UniqueConstraint("file_key"),
+    )
+    op.create_table(
+        "blob_slot",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("owner_type", sa.String(length=16), nullable=False),
+        sa.Column("owner_id", sa.String(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("id_blob", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["id_blob"], ["blob.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("owner_type", "owner_id", "name"),
+    )
+    op.create_index("ix_blob_slot_id_blob", "blob_slot", ["id_blob"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_blob_slot_id_blob", table_name="blob_slot")
+    op.drop_table("blob_slot")
+    op.drop_table("blob")
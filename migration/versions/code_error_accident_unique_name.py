@@ -0,0 +1,43 @@
+"""unique name for code_error_accident
+
+Revision ID: code_error_unique_name
+Revises: email_digest
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "code_error_unique_name"
+down_revision: Union[str, None] = "email_digest"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """
+    Код ошибки однозначно определяется именем – это ключ для
+    INSERT ... ON CONFLICT при импорте. Повторы, накопившиеся от старого
+    импорта, схлопываются в запись с наименьшим id; аварии, ссылавшиеся
+    на повторы, переводятся на неё до удаления.
+    """
+    op.execute(
+        "UPDATE accident a SET id_error_code_accident = keep.id "
+        "FROM code_error_accident dup "
+        "JOIN (SELECT name, min(id) AS id FROM code_error_accident GROUP BY name) keep "
+        "ON keep.name = dup.name "
+        "WHERE a.id_error_code_accident = dup.id AND dup.id <> keep.id"
+    )
+    op.execute(
+        "DELETE FROM code_error_accident a "
+        "USING code_error_accident b "
+        "WHERE a.name = b.name AND a.id > b.id"
+    )
+    op.create_unique_constraint("code_error_accident_name_key", "code_error_accident", ["name"])
+
+
+def downgrade() -> None:
+    op.drop_constraint("code_error_accident_name_key", "code_error_accident", type_="unique")
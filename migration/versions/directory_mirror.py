@@ -0,0 +1,47 @@
+"""object and equipment directory mirror
+
+Revision ID: directory_mirror
+Revises: code_error_unique_name
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "directory_mirror"
+down_revision: Union[str, None] = "code_error_unique_name"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "directory_object",
+        sa.Column("uuid", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("payload", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("synced_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("equipment_etag", sa.String(), nullable=True),
+        sa.Column("equipment_synced_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("uuid"),
+    )
+    op.create_table(
+        "directory_equipment",
+        sa.Column("uuid", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("uuid_object", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("payload", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("synced_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.PrimaryKeyConstraint("uuid"),
+    )
+    op.create_index(op.f("ix_directory_equipment_uuid_object"), "directory_equipment", ["uuid_object"])
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_directory_equipment_uuid_object"), table_name="directory_equipment")
+    op.drop_table("directory_equipment")
+    op.drop_table("directory_object")
@@ -0,0 +1,30 @@
+"""email outbox digests
+
+Revision ID: email_digest
+Revises: email_outbox
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "email_digest"
+down_revision: Union[str, None] = "email_outbox"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("email_outbox", sa.Column("context", sa.String(), nullable=True))
+    op.add_column("email_outbox", sa.Column("template_name", sa.String(), nullable=True))
+    op.create_index("ix_email_outbox_digest", "email_outbox", ["to_email", "context"],
+                    postgresql_where=sa.text("state = 'digest'"))
+
+
+def downgrade() -> None:
+    op.drop_index("ix_email_outbox_digest", table_name="email_outbox")
+    op.drop_column("email_outbox", "template_name")
+    op.drop_column("email_outbox", "context")
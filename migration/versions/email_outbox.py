@@ -0,0 +1,46 @@
+"""email outbox
+
+Revision ID: email_outbox
+Revises: blob_dedup_storage
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "email_outbox"
+down_revision: Union[str, None] = "blob_dedup_storage"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """
+    email_outbox – очередь уведомлений. Частичный индекс покрывает только
+    неотправленные письма, которые выбирает цикл отправки.
+    """
+    op.create_table(
+        "email_outbox",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("to_email", sa.String(), nullable=False),
+        sa.Column("subject", sa.String(), nullable=False),
+        sa.Column("body", sa.Text(), nullable=False),
+        sa.Column("is_html", sa.Boolean(), nullable=False),
+        sa.Column("state", sa.String(length=16), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("next_attempt_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("datetime", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("sent_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_email_outbox_pending", "email_outbox", ["next_attempt_at"],
+                    postgresql_where=sa.text("state = 'pending'"))
+
+
+def downgrade() -> None:
+    op.drop_index("ix_email_outbox_pending", table_name="email_outbox")
+    op.drop_table("email_outbox")
@@ -0,0 +1,109 @@
+"""monthly range partitioning of log_messages_error
+
+Revision ID: log_partitioning
+Revises: summarize_rollup
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "log_partitioning"
+down_revision: Union[str, None] = "summarize_rollup"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+COLUMNS = ("id, uuid, uuid_object, uuid_equipment, create_at, message, class_log_text, "
+           "class_log_int, is_processed, entity_equipment, number_equipment")
+
+
+def upgrade() -> None:
+    """
+    Таблица пересоздаётся секционированной по месяцам create_at: секции с
+    месяца самой старой строки до трёх месяцев вперёд (дальше их создаёт
+    server/partitions.py) и секция по умолчанию для строк вне диапазона.
+    Первичный ключ и уникальность uuid включают create_at – этого требует
+    секционирование. Последовательность id переходит к новой таблице.
+    """
+    op.execute("ALTER TABLE log_messages_error RENAME TO log_messages_error_old")
+    op.execute("ALTER TABLE log_messages_error_old DROP CONSTRAINT IF EXISTS log_messages_error_pkey")
+    op.execute("ALTER TABLE log_messages_error_old DROP CONSTRAINT IF EXISTS log_messages_error_uuid_key")
+    op.execute("ALTER SEQUENCE log_messages_error_id_seq OWNED BY NONE")
+
+    op.execute("""
+        CREATE TABLE log_messages_error (
+            id INTEGER NOT NULL DEFAULT nextval('log_messages_error_id_seq'),
+            uuid UUID,
+            uuid_object UUID,
+            uuid_equipment UUID,
+            create_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            message TEXT NOT NULL,
+            class_log_text VARCHAR NOT NULL,
+            class_log_int INTEGER NOT NULL,
+            is_processed BOOLEAN,
+            entity_equipment VARCHAR,
+            number_equipment INTEGER,
+            CONSTRAINT log_messages_error_pkey PRIMARY KEY (id, create_at),
+            CONSTRAINT log_messages_error_uuid_create_at_key UNIQUE (uuid, create_at)
+        ) PARTITION BY RANGE (create_at)
+    """)
+    op.execute("""
+        DO $$
+        DECLARE
+            part_start date := date_trunc('month', coalesce((SELECT min(create_at) FROM log_messages_error_old), now()));
+            part_last date := date_trunc('month', now()) + interval '3 months';
+        BEGIN
+            WHILE part_start <= part_last LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF log_messages_error FOR VALUES FROM (%L) TO (%L)',
+                    'log_messages_error_' || to_char(part_start, '"y"YYYY"m"MM'),
+                    part_start,
+                    (part_start + interval '1 month')::date
+                );
+                part_start := part_start + interval '1 month';
+            END LOOP;
+        END $$
+    """)
+    op.execute("CREATE TABLE log_messages_error_default PARTITION OF log_messages_error DEFAULT")
+
+    op.execute(f"INSERT INTO log_messages_error ({COLUMNS}) SELECT {COLUMNS} FROM log_messages_error_old")
+    op.execute("DROP TABLE log_messages_error_old")
+    op.execute("ALTER SEQUENCE log_messages_error_id_seq OWNED BY log_messages_error.id")
+
+    op.execute(
+        "CREATE INDEX ix_log_messages_error_unprocessed "
+        "ON log_messages_error (uuid_object, uuid_equipment, create_at) "
+        "WHERE is_processed = false"
+    )
+
+
+def downgrade() -> None:
+    """Обратно в обычную таблицу; отсоединённые секции не возвращаются."""
+    op.execute("ALTER TABLE log_messages_error RENAME TO log_messages_error_partitioned")
+    op.execute("ALTER TABLE log_messages_error_partitioned DROP CONSTRAINT log_messages_error_pkey")
+    op.execute("ALTER SEQUENCE log_messages_error_id_seq OWNED BY NONE")
+    op.execute("DROP INDEX IF EXISTS ix_log_messages_error_unprocessed")
+
+    op.execute("""
+        CREATE TABLE log_messages_error (
+            id INTEGER NOT NULL DEFAULT nextval('log_messages_error_id_seq'),
+            uuid UUID,
+            uuid_object UUID,
+            uuid_equipment UUID,
+            create_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            message TEXT NOT NULL,
+            class_log_text VARCHAR NOT NULL,
+            class_log_int INTEGER NOT NULL,
+            is_processed BOOLEAN,
+            entity_equipment VARCHAR,
+            number_equipment INTEGER,
+            CONSTRAINT log_messages_error_pkey PRIMARY KEY (id),
+            CONSTRAINT log_messages_error_uuid_key UNIQUE (uuid)
+        )
+    """)
+    op.execute(f"INSERT INTO log_messages_error ({COLUMNS}) SELECT {COLUMNS} FROM log_messages_error_partitioned")
+    op.execute("DROP TABLE log_messages_error_partitioned")
+    op.execute("ALTER SEQUENCE log_messages_error_id_seq OWNED BY log_messages_error.id")
@@ -0,0 +1,50 @@
+"""log_messages_error search indexes
+
+Revision ID: log_search
+Revises: log_partitioning
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "log_search"
+down_revision: Union[str, None] = "log_partitioning"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """
+    Индексы поиска логов. Индекс секционированной таблицы создаётся на
+    каждой секции (и на будущих – автоматически); CONCURRENTLY для
+    секционированных таблиц недоступен, поэтому на большой таблице миграцию
+    лучше выполнять в окно обслуживания.
+    """
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_log_messages_error_object_create_at "
+        "ON log_messages_error (uuid_object, create_at, id)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_log_messages_error_equipment_create_at "
+        "ON log_messages_error (uuid_object, uuid_equipment, create_at, id)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_log_messages_error_class_create_at "
+        "ON log_messages_error (uuid_object, class_log_int, create_at, id)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_log_messages_error_message_trgm "
+        "ON log_messages_error USING gin (message gin_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    """Расширение pg_trgm остаётся: им могут пользоваться другие объекты."""
+    op.execute("DROP INDEX IF EXISTS ix_log_messages_error_message_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_log_messages_error_class_create_at")
+    op.execute("DROP INDEX IF EXISTS ix_log_messages_error_equipment_create_at")
+    op.execute("DROP INDEX IF EXISTS ix_log_messages_error_object_create_at")
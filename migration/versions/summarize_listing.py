@@ -0,0 +1,24 @@
+"""keyset index for summatize listing
+
+Revision ID: summarize_listing
+Revises: summarize_month
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "summarize_listing"
+down_revision: Union[str, None] = "summarize_month"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_summatize_object_start", "summatize", ["uuid_object", "datetime_start", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_summatize_object_start", table_name="summatize")
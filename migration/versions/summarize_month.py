@@ -0,0 +1,44 @@
+"""month bucket for summatize
+
+Revision ID: summarize_month
+Revises: directory_mirror
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "summarize_month"
+down_revision: Union[str, None] = "directory_mirror"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """
+    Сводка ищется и пишется по (объект, оборудование, месяц) – month и
+    уникальный индекс на эту тройку служат ключом для поиска по равенству и
+    для INSERT ... ON CONFLICT. Из повторов за один месяц остаётся последняя
+    записанная сводка.
+    """
+    op.add_column("summatize", sa.Column("month", sa.Date(), nullable=True))
+    op.execute("UPDATE summatize SET month = date_trunc('month', datetime_start)::date")
+    op.execute(
+        "DELETE FROM summatize a "
+        "USING summatize b "
+        "WHERE a.uuid_object = b.uuid_object "
+        "AND a.uuid_equipment = b.uuid_equipment "
+        "AND a.month = b.month "
+        "AND a.id < b.id"
+    )
+    op.alter_column("summatize", "month", nullable=False)
+    op.create_unique_constraint("summatize_uuid_object_uuid_equipment_month_key", "summatize",
+                                ["uuid_object", "uuid_equipment", "month"])
+
+
+def downgrade() -> None:
+    op.drop_constraint("summatize_uuid_object_uuid_equipment_month_key", "summatize", type_="unique")
+    op.drop_column("summatize", "month")
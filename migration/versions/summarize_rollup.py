@@ -0,0 +1,42 @@
+"""quarter and year rollups of summatize
+
+Revision ID: summarize_rollup
+Revises: summarize_listing
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "summarize_rollup"
+down_revision: Union[str, None] = "summarize_listing"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "summatize_rollup",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("uuid", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("uuid_object", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("uuid_equipment", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("period", sa.String(), nullable=False),
+        sa.Column("period_start", sa.Date(), nullable=False),
+        sa.Column("text", sa.Text(), nullable=False),
+        sa.Column("metadata_equipment", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("source_count", sa.Integer(), nullable=False),
+        sa.Column("source_updated_at", sa.DateTime(timezone=False), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=False), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("uuid"),
+        sa.UniqueConstraint("uuid_object", "uuid_equipment", "period", "period_start"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("summatize_rollup")
@@ -7,6 +7,7 @@ from .file import router as file_router
 from .env import router as env_router
 from .proposals import router as proposals_router
 from .log_analysis import router as log_analysis_router
+from .service import router as service_router
 
 
 router = APIRouter(prefix="/v1")
@@ -18,6 +19,7 @@ router.include_router(file_router)
 router.include_router(env_router)
 router.include_router(proposals_router)
 router.include_router(log_analysis_router)
+router.include_router(service_router)
 
 
 
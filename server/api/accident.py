@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, status, Request, Response, UploadFile, File
-from fastapi.responses import JSONResponse, RedirectResponse
+from fastapi.responses import JSONResponse, RedirectResponse, StreamingResponse
 
 from ..services import AccidentService, get_current_user
 from ..models.Accident import (
@@ -278,10 +278,25 @@ async def get_files_to_accident(uuid_accident: str,
     if list_file_accident is not None:
         return list_file_accident
     else:
-        JSONResponse(content={"message": "Не найдено"},
+        return JSONResponse(content={"message": "Не найдено"},
                      status_code=status.HTTP_404_NOT_FOUND)
 
 
+@router.get("/files/{uuid_accident}/download", responses={
+    status.HTTP_404_NOT_FOUND: {"model": Message},
+})
+async def download_files_accident(uuid_accident: str,
+                                  service: AccidentService = Depends(),
+                                  current_user: UserGet = Depends(get_current_user)):
+    archive = await service.stream_files_accident(uuid_accident)
+    if archive is None:
+        return JSONResponse(content={"message": "Не найдено"},
+                            status_code=status.HTTP_404_NOT_FOUND)
+
+    headers = {"Content-Disposition": f'attachment; filename="{uuid_accident}.zip"'}
+    return StreamingResponse(archive, media_type="application/zip", headers=headers)
+
+
 @router.post("/files/{uuid_accident}", responses={
     status.HTTP_406_NOT_ACCEPTABLE: {"model": Message},
     status.HTTP_201_CREATED: {"model": Message},
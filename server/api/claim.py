@@ -1,10 +1,10 @@
 from fastapi import (APIRouter, Depends,
                      status, Request,
                      Response, UploadFile,
-                     File, BackgroundTasks, Query)
+                     File, Query, Header)
 from fastapi.responses import JSONResponse, StreamingResponse
 
-from ..services import ClaimServices, get_current_user, AccidentService, EmailService
+from ..services import ClaimServices, get_current_user, AccidentService
 from ..models.Claim import (
     GetClaim,
     PostClaim,
@@ -15,6 +15,7 @@ from ..models.Message import Message
 from ..models.User import UserGet
 from ..repositories import FileBucketRepository
 from ..functions import access_control
+from ..response import file_response
 
 from datetime import date
 
@@ -114,10 +115,11 @@ async def get_one_claim(uuid: str,
 async def save_file(type_file: str,
                     uuid: str,
                     file: UploadFile,
+                    x_checksum_xxh3: str | None = Header(None),
                     current_user: UserGet = Depends(get_current_user),
                     service: ClaimServices = Depends()):
-    await service.upload_file(type_file, uuid, file)
-    return {"filenames": file.filename}
+    checksum = await service.upload_file(type_file, uuid, file, x_checksum_xxh3)
+    return {"filenames": file.filename, "checksum": checksum}
 
 
 @router.get("/file/{type_file}/{uuid}")
@@ -125,35 +127,17 @@ async def get_file(type_file: str,
                    uuid: str,
                    service: ClaimServices = Depends(),
                    ):
-    try:
-        file, file_path = await service.get_file(type_file, uuid)
-    except Exception:
-        return JSONResponse(content={"message": "не существует"},
-                            status_code=status.HTTP_404_NOT_FOUND)
-
-    file_name = file_path.split("/")[-1]
+    file_path = await service.get_file(type_file, uuid)
 
-    if file is None:
+    if file_path is None:
         return JSONResponse(content={"message": "не существует"},
                             status_code=status.HTTP_404_NOT_FOUND)
 
-    media_type = "application/octet-stream"
+    file_name = f"{type_file}_file.{file_path.split('.')[-1]}"
 
     file_repo = FileBucketRepository('document')
 
-    headers = {"Content-Disposition": f'inline; filename="{file_name}"'}
-
-    try:
-        info = await file_repo.get_sate(file_path)
-
-        return StreamingResponse(
-            file_repo.get_file_stream(file_path, info.size),
-            media_type=media_type,
-            headers=headers,
-        )
-    except Exception:
-        return JSONResponse(content={"message": "не существует"},
-                            status_code=status.HTTP_404_NOT_FOUND)
+    return await file_response(file_repo, file_path, file_name)
 
 
 @router.delete("/{uuid}", responses={
@@ -180,22 +164,11 @@ async def delete_claim(uuid: str,
 })
 async def update_claim_state(uuid_claim: str,
                              state_claim: str,
-                             background_tasks: BackgroundTasks,
                              current_user: UserGet = Depends(get_current_user),
-                             service: ClaimServices = Depends(),
-                             notify: EmailService = Depends()
+                             service: ClaimServices = Depends()
                              ):
     try:
-        claim = await service.update_state_claim(uuid_claim, state_claim, current_user)
-        await notify.send_by_context(
-            background_tasks,
-            "claim_update_state",
-            "Изменение состояния заявки",
-            "claim_update_state.html",
-            True,
-            email_context={"claim": claim},
-            options_user=[]
-        )
+        await service.update_state_claim(uuid_claim, state_claim, current_user)
     except Exception:
         return JSONResponse(content={"message": "ошибка обновления состояния"},
                             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
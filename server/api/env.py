@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, status, Request, Response, UploadFile, File
+from fastapi import APIRouter, Depends, status, Request, Response, UploadFile, File, HTTPException
 from fastapi.responses import JSONResponse, StreamingResponse
 
 from ..services import EnvService, get_current_user
@@ -12,14 +12,22 @@ from ..models.Object import StateObject, Region, PostRegion
 from ..models.Accident import SignsAccident, GetTypeBrake, CodeErrorAccidentModel
 from ..models.Event import StateEvent, TypeEvent
 from ..models.Claim import StateClaimModel
+from ..models.Import import ImportReport
 
 from ..repositories import FileBucketRepository
 from ..functions import access_control
+from ..reference_cache import reference_cache
+from ..response import cached_json_response
+from ..importer import is_xlsx
 
 
 router = APIRouter(prefix="/env", tags=["env"])
 
 
+def is_import_file(file: UploadFile) -> bool:
+    return file.content_type in ("text/csv", "application/vnd.ms-excel") or is_xlsx(file)
+
+
 message_error = {
     status.HTTP_406_NOT_ACCEPTABLE: JSONResponse(content={"message": "отказ в доступе"},
                                                  status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -193,14 +201,18 @@ async def add_region(region: PostRegion,
     status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message},
     status.HTTP_404_NOT_FOUND: {"model": Message},
 })
-async def get_signs_accident(service: EnvService = Depends()):
-    signs_accident = await service.get_all_signs_accident()
-    return signs_accident
+async def get_signs_accident(request: Request,
+                             service: EnvService = Depends()):
+    payload = await reference_cache.get_payload("signs_accident", service.get_all_signs_accident)
+    if payload is None:
+        return JSONResponse(content={"message": "Не найдено"},
+                            status_code=status.HTTP_404_NOT_FOUND)
+    return cached_json_response(request, payload)
 
 
 @router.post("/signs_accident/import_file", responses={
     status.HTTP_406_NOT_ACCEPTABLE: {"model": Message},
-    status.HTTP_201_CREATED: {"model": Message},
+    status.HTTP_201_CREATED: {"model": ImportReport},
     status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
 })
 @access_control(["super_admin"])
@@ -208,15 +220,16 @@ async def import_signs_accident(file: UploadFile = File(...),
                                 service: EnvService = Depends(),
                                 current_user: UserGet = Depends(get_current_user)):
 
+    if not is_import_file(file):
+        return JSONResponse(content={"message": "файл не того типа"},
+                            status_code=status.HTTP_406_NOT_ACCEPTABLE)
     try:
-        if file.content_type == "text/csv" or file.content_type == "application/vnd.ms-excel":
-            await service.import_signs_accident(file)
-        else:
-            return JSONResponse(content={"message": "файл не того типа"},
-                                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-        return JSONResponse(content={"message": "добавлено"},
+        report = await service.import_signs_accident(file)
+        return JSONResponse(content=report.model_dump(),
                             status_code=status.HTTP_201_CREATED)
+    except HTTPException as e:
+        return JSONResponse(content={"message": e.detail},
+                            status_code=e.status_code)
     except Exception:
         return JSONResponse(content={"message": "ошибка добавления"},
                             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -230,10 +243,11 @@ async def import_signs_accident(file: UploadFile = File(...),
         status.HTTP_404_NOT_FOUND: {"model": Message},
     },
 )
-async def get_error_code_accident(service: EnvService = Depends()):
-    error_codes = await service.get_all_error_code_accident()
-    if error_codes is not None:
-        return error_codes
+async def get_error_code_accident(request: Request,
+                                  service: EnvService = Depends()):
+    payload = await reference_cache.get_payload("error_code_accident", service.get_all_error_code_accident)
+    if payload is not None:
+        return cached_json_response(request, payload)
     else:
         return JSONResponse(
             content={"message": "Не найдено"},
@@ -325,7 +339,7 @@ async def delete_error_code_accident(
     "/error_code_accident/import_file",
     responses={
         status.HTTP_406_NOT_ACCEPTABLE: {"model": Message},
-        status.HTTP_201_CREATED: {"model": Message},
+        status.HTTP_201_CREATED: {"model": ImportReport},
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message},
     },
 )
@@ -335,75 +349,74 @@ async def import_error_code_accident(
     service: EnvService = Depends(),
     current_user: UserGet = Depends(get_current_user),
 ):
+    if not is_import_file(file):
+        return JSONResponse(content={"message": "файл не того типа"},
+                            status_code=status.HTTP_406_NOT_ACCEPTABLE)
     try:
-        if file.content_type in ("text/csv", "application/vnd.ms-excel"):
-            await service.import_error_code_accident(file)
-        else:
-            return JSONResponse(
-                content={"message": "файл не того типа"},
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
-
-        return JSONResponse(
-            content={"message": "добавлено"},
-            status_code=status.HTTP_201_CREATED,
-        )
-    except Exception as e:
-        # Логируем ошибку в консоль, чтобы видеть причину 500
-        print("ERROR in /env/error_code_accident/import_file:", repr(e))
-        return JSONResponse(
-            content={"message": "ошибка добавления"},
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-        )
+        report = await service.import_error_code_accident(file)
+        return JSONResponse(content=report.model_dump(),
+                            status_code=status.HTTP_201_CREATED)
+    except HTTPException as e:
+        return JSONResponse(content={"message": e.detail},
+                            status_code=e.status_code)
+    except Exception:
+        return JSONResponse(content={"message": "ошибка добавления"},
+                            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
 @router.get("/type_brake_mechanical/{class_brake}", response_model=list[GetTypeBrake], responses={
     status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message},
     status.HTTP_404_NOT_FOUND: {"model": Message},
 })
-async def get_type_brake(class_brake: str,
+async def get_type_brake(request: Request,
+                         class_brake: str,
                          service: EnvService = Depends()):
-    type_brake = await service.get_all_type_brake(class_brake)
-    if type_brake is not None:
-        return type_brake
+    # Для неизвестных классов ответ всегда пустой – кешируем его под одним ключом
+    is_known = class_brake == "org" or reference_cache.snapshot.class_brake.get_by_name(class_brake) is not None
+    payload = await reference_cache.get_payload(f"type_brake:{class_brake if is_known else ''}",
+                                                lambda: service.get_all_type_brake(class_brake))
+    if payload is not None:
+        return cached_json_response(request, payload)
     else:
-        JSONResponse(content={"message": "Не найдено"},
+        return JSONResponse(content={"message": "Не найдено"},
                      status_code=status.HTTP_404_NOT_FOUND)
 
 
 @router.post("/type_brake/import_file", responses={
     status.HTTP_406_NOT_ACCEPTABLE: {"model": Message},
-    status.HTTP_201_CREATED: {"model": Message},
+    status.HTTP_201_CREATED: {"model": ImportReport},
     status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
 })
 @access_control(["super_admin"])
 async def import_type_brake(file: UploadFile = File(...),
                             service: EnvService = Depends(),
                             current_user: UserGet = Depends(get_current_user)):
+    if not is_import_file(file):
+        return JSONResponse(content={"message": "файл не того типа"},
+                            status_code=status.HTTP_406_NOT_ACCEPTABLE)
     try:
-        if file.content_type == "text/csv" or file.content_type == "application/vnd.ms-excel":
-            await service.import_type_brake_file(file)
-        else:
-            return JSONResponse(content={"message": "файл не того типа"},
-                                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-        return JSONResponse(content={"message": "добавлено"},
+        report = await service.import_type_brake_file(file)
+        return JSONResponse(content=report.model_dump(),
                             status_code=status.HTTP_201_CREATED)
+    except HTTPException as e:
+        return JSONResponse(content={"message": e.detail},
+                            status_code=e.status_code)
     except Exception:
         return JSONResponse(content={"message": "ошибка добавления"},
-                                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+                            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
 @router.get("/event/state_event", response_model=list[StateEvent], responses={
     status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message},
     status.HTTP_404_NOT_FOUND: {"model": Message},
 })
-async def get_state_event(service: EnvService = Depends()):
-    state_event = await service.get_list_state_event()
-    if state_event is not None:
-        return state_event
+async def get_state_event(request: Request,
+                          service: EnvService = Depends()):
+    payload = await reference_cache.get_payload("state_event", service.get_list_state_event)
+    if payload is not None:
+        return cached_json_response(request, payload)
     else:
-        JSONResponse(content={"message": "Не найдено"},
+        return JSONResponse(content={"message": "Не найдено"},
                      status_code=status.HTTP_404_NOT_FOUND)
 
 
@@ -411,12 +424,13 @@ async def get_state_event(service: EnvService = Depends()):
     status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message},
     status.HTTP_404_NOT_FOUND: {"model": Message},
 })
-async def get_type_event(service: EnvService = Depends()):
-    type_event = await service.get_list_type_event()
-    if type_event is not None:
-        return type_event
+async def get_type_event(request: Request,
+                         service: EnvService = Depends()):
+    payload = await reference_cache.get_payload("type_event", service.get_list_type_event)
+    if payload is not None:
+        return cached_json_response(request, payload)
     else:
-        JSONResponse(content={"message": "Не найдено"},
+        return JSONResponse(content={"message": "Не найдено"},
                      status_code=status.HTTP_404_NOT_FOUND)
 
 
@@ -424,6 +438,7 @@ async def get_type_event(service: EnvService = Depends()):
     status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message},
     status.HTTP_404_NOT_FOUND: {"model": Message},
 })
-async def get_state_claim(service: EnvService = Depends()):
-    state_claim = await service.get_state_claim()
-    return state_claim
\ No newline at end of file
+async def get_state_claim(request: Request,
+                          service: EnvService = Depends()):
+    payload = await reference_cache.get_payload("state_claim", service.get_state_claim)
+    return cached_json_response(request, payload)
\ No newline at end of file
@@ -6,7 +6,9 @@ from fastapi import (
     Response,
     UploadFile,
     File,
-    Form)
+    Form,
+    BackgroundTasks,
+    Header)
 from typing import Annotated, Optional
 from fastapi.responses import JSONResponse, StreamingResponse
 
@@ -16,8 +18,9 @@ from ..repositories import FileBucketRepository
 
 from ..models.Message import Message
 from ..models.User import UserGet
-from ..models.Files import GetFile, FileGenerate
+from ..models.Files import GetFile, FileGenerate, FileBatchGenerate, BatchGenerateState
 from ..functions import access_control
+from ..response import file_response
 
 router = APIRouter(prefix="/file", tags=["file"])
 message_error = {
@@ -33,10 +36,11 @@ message_error = {
 })
 async def save_file(file: UploadFile,
                     name_file: Annotated[str, Form()],
+                    x_checksum_xxh3: str | None = Header(None),
                     current_user: UserGet = Depends(get_current_user),
                     service: FileService = Depends()):
-    await service.upload_file(file, name_file)
-    return {"filenames": file.filename}
+    checksum = await service.upload_file(file, name_file, x_checksum_xxh3)
+    return {"filenames": file.filename, "checksum": checksum}
 
 
 @router.get("/all", response_model=list[GetFile])
@@ -51,27 +55,73 @@ async def get_all_file(
 async def get_file(id_file: int,
                    service: FileService = Depends(),
                    ):
-    file_name, ext, info = await service.get_file(id_file)
+    file_name, ext = await service.get_file(id_file)
 
     if file_name is None:
         return JSONResponse(content={"message": "не существует"},
                             status_code=status.HTTP_404_NOT_FOUND)
 
-    media_type = "application/octet-stream"
-
     file_repo = FileBucketRepository('document')
 
-    file_name_now = file_name.split("/")
+    return await file_response(file_repo, file_name, f"blueprint.{ext}")
+
 
-    headers = {"Content-Disposition": f'inline; filename="blueprint.{ext}"'}
+@router.post("/generate/batch", responses={
+    status.HTTP_200_OK: {"model": BatchGenerateState},
+    status.HTTP_404_NOT_FOUND: {"model": Message},
+    status.HTTP_406_NOT_ACCEPTABLE: {"model": Message},
+})
+@access_control(["admin", "super_admin"])
+async def generate_batch_file(generate_data: FileBatchGenerate,
+                              background_tasks: BackgroundTasks,
+                              current_user: UserGet = Depends(get_current_user),
+                              service: FileService = Depends()):
+    blueprint, items = await service.prepare_batch(generate_data)
+    if not items:
+        return JSONResponse(content={"message": "заявки не найдены"},
+                            status_code=status.HTTP_404_NOT_FOUND)
 
+    if generate_data.is_artifact:
+        return await service.start_batch_artifact(background_tasks, blueprint, items)
+
+    headers = {
+        "Content-Disposition": 'attachment; filename="documents.zip"',
+        "X-Batch-Total": str(len(items)),
+    }
     return StreamingResponse(
-        file_repo.get_file_stream(file_name, info.size),
-        media_type=media_type,
+        service.stream_batch(blueprint, items),
+        media_type="application/zip",
         headers=headers,
     )
 
 
+@router.get("/generate/batch/{uuid_token}", response_model=BatchGenerateState)
+@access_control(["admin", "super_admin"])
+async def get_batch_state(uuid_token: str,
+                          current_user: UserGet = Depends(get_current_user),
+                          service: FileService = Depends()):
+    state = await service.get_batch_state(uuid_token)
+    if state is None:
+        return JSONResponse(content={"message": "не существует"},
+                            status_code=status.HTTP_404_NOT_FOUND)
+    return state
+
+
+@router.get("/generate/batch/{uuid_token}/download")
+@access_control(["admin", "super_admin"])
+async def download_batch_file(uuid_token: str,
+                              current_user: UserGet = Depends(get_current_user),
+                              service: FileService = Depends()):
+    state = await service.get_batch_state(uuid_token)
+    if state is None or state.file_key is None:
+        return JSONResponse(content={"message": "не существует"},
+                            status_code=status.HTTP_404_NOT_FOUND)
+
+    file_repo = FileBucketRepository('document')
+
+    return await file_response(file_repo, state.file_key, "documents.zip", "application/zip", "attachment")
+
+
 @router.post("/generate/{uuid_claim}")
 async def generate_file(uuid_claim: str,
                         generate_data: FileGenerate,
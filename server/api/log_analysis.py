@@ -1,11 +1,15 @@
-from fastapi import APIRouter, Depends, status, Query
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, status, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from typing import Optional
+from datetime import datetime
 
-from ..models.Summarize import AnalyzeLogsResponse, GetSummarize
+from ..models.Summarize import AnalyzeLogsResponse, GetSummarize, GetSummarizeItem, GetSummarizeRollup
 from ..models.Message import Message
+from ..models.LogMessageError import LogSearchResult, LogRates
 from ..services.LogAnalysisService import LogAnalysisService
 from ..services.SummarizeService import SummarizeService
+from ..services.LogSearchService import LogSearchService
+from ..services.LogRateService import LogRateService
 from ..repositories.LogMessageErrorRepository import LogMessageErrorRepository
 from ..repositories.SummarizeRepository import SummarizeRepository
 from ..repositories.EquipmentRepository import EquipmentRepository
@@ -13,6 +17,8 @@ from ..repositories.ObjectRepository import ObjectRepository
 from ..models.User import UserGet
 from ..functions import access_control
 from ..services.LoginService import get_current_user
+from ..response import is_not_modified
+from ..log_archive import log_archiver
 
 router = APIRouter(prefix="/log-analysis", tags=["log-analysis"])
 
@@ -183,3 +189,330 @@ async def get_summarize_by_object_and_equipment(
             content={"message": f"Ошибка при получении Summarize: {str(e)}"},
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
+
+
+@router.get("/object/{uuid_object}/summarize/list",
+            response_model=list[GetSummarizeItem],
+            responses={
+                status.HTTP_406_NOT_ACCEPTABLE: {"model": Message},
+                status.HTTP_404_NOT_FOUND: {"model": Message},
+                status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message},
+            })
+@access_control(["admin", "super_admin", "user"])
+async def get_summarize_list_by_object(
+    response: Response,
+    uuid_object: str,
+    start_date: Optional[str] = Query(None, description="Начальная дата в формате YYYY-MM-DD"),
+    end_date: Optional[str] = Query(None, description="Конечная дата в формате YYYY-MM-DD"),
+    cursor: Optional[str] = Query(None, description="Значение X-Next-Cursor предыдущей страницы"),
+    limit: int = Query(50, ge=1, le=200),
+    current_user: UserGet = Depends(get_current_user),
+    summarize_repository: SummarizeRepository = Depends(),
+    equipment_repository: EquipmentRepository = Depends(),
+    object_repository: ObjectRepository = Depends(),
+):
+    """
+    Список Summarize объекта без текста анализа
+
+    Элемент содержит даты, оборудование и теги из metadata_equipment.
+    Сортировка от новых к старым; курсор следующей страницы – в заголовке
+    X-Next-Cursor (нет заголовка – страница последняя). Полный текст –
+    GET /log-analysis/summarize/{uuid_summarize}.
+    """
+    try:
+        service = SummarizeService(
+            summarize_repository=summarize_repository,
+            equipment_repository=equipment_repository,
+            object_repository=object_repository
+        )
+
+        result, next_cursor = await service.get_summarize_page(
+            uuid_object=uuid_object,
+            start_date=start_date,
+            end_date=end_date,
+            cursor=cursor,
+            limit=limit
+        )
+
+        if next_cursor is not None:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return result
+    except ValueError as e:
+        return JSONResponse(
+            content={"message": str(e)},
+            status_code=status.HTTP_404_NOT_FOUND
+        )
+    except Exception as e:
+        return JSONResponse(
+            content={"message": f"Ошибка при получении Summarize: {str(e)}"},
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@router.get("/summarize/{uuid_summarize}",
+            response_model=GetSummarize,
+            responses={
+                status.HTTP_406_NOT_ACCEPTABLE: {"model": Message},
+                status.HTTP_404_NOT_FOUND: {"model": Message},
+                status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message},
+            })
+@access_control(["admin", "super_admin", "user"])
+async def get_summarize(
+    request: Request,
+    uuid_summarize: str,
+    current_user: UserGet = Depends(get_current_user),
+    summarize_repository: SummarizeRepository = Depends(),
+    equipment_repository: EquipmentRepository = Depends(),
+    object_repository: ObjectRepository = Depends(),
+):
+    """
+    Summarize целиком: текст анализа и metadata_equipment
+
+    Ответ с ETag; при совпадении If-None-Match – 304 без чтения текста.
+    """
+    try:
+        service = SummarizeService(
+            summarize_repository=summarize_repository,
+            equipment_repository=equipment_repository,
+            object_repository=object_repository
+        )
+
+        etag = await service.get_summarize_etag(uuid_summarize)
+        if etag is None:
+            return JSONResponse(
+                content={"message": "не существует"},
+                status_code=status.HTTP_404_NOT_FOUND
+            )
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if is_not_modified(request, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        result, etag = await service.get_summarize(uuid_summarize)
+        headers["ETag"] = etag
+        return JSONResponse(content=result.model_dump(mode="json"), headers=headers)
+    except ValueError as e:
+        return JSONResponse(
+            content={"message": str(e)},
+            status_code=status.HTTP_404_NOT_FOUND
+        )
+    except Exception as e:
+        return JSONResponse(
+            content={"message": f"Ошибка при получении Summarize: {str(e)}"},
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@router.get("/object/{uuid_object}/summarize/rollup",
+            response_model=list[GetSummarizeRollup],
+            responses={
+                status.HTTP_406_NOT_ACCEPTABLE: {"model": Message},
+                status.HTTP_404_NOT_FOUND: {"model": Message},
+                status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message},
+            })
+@access_control(["admin", "super_admin", "user"])
+async def get_summarize_rollup_by_object(
+    uuid_object: str,
+    period: str = Query("quarter", description="quarter или year"),
+    uuid_equipment: Optional[str] = Query(None, description="UUID оборудования"),
+    start_date: Optional[str] = Query(None, description="Начальная дата в формате YYYY-MM-DD"),
+    end_date: Optional[str] = Query(None, description="Конечная дата в формате YYYY-MM-DD"),
+    current_user: UserGet = Depends(get_current_user),
+    summarize_repository: SummarizeRepository = Depends(),
+    equipment_repository: EquipmentRepository = Depends(),
+    object_repository: ObjectRepository = Depends(),
+):
+    """
+    Квартальные или годовые свёртки Summarize объекта
+
+    Свёртки собираются фоновой задачей из месячных сводок завершённых
+    кварталов; годовая свёртка текущего года – по завершённым кварталам.
+    """
+    try:
+        service = SummarizeService(
+            summarize_repository=summarize_repository,
+            equipment_repository=equipment_repository,
+            object_repository=object_repository
+        )
+
+        return await service.get_rollups(
+            uuid_object=uuid_object,
+            period=period,
+            uuid_equipment=uuid_equipment,
+            start_date=start_date,
+            end_date=end_date
+        )
+    except ValueError as e:
+        return JSONResponse(
+            content={"message": str(e)},
+            status_code=status.HTTP_404_NOT_FOUND
+        )
+    except Exception as e:
+        return JSONResponse(
+            content={"message": f"Ошибка при получении свёрток Summarize: {str(e)}"},
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@router.get("/object/{uuid_object}/archive",
+            response_model=list[str],
+            responses={
+                status.HTTP_406_NOT_ACCEPTABLE: {"model": Message},
+                status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message},
+            })
+@access_control(["admin", "super_admin"])
+async def get_log_archive_months(
+    uuid_object: str,
+    current_user: UserGet = Depends(get_current_user),
+):
+    """Месяцы (ГГГГ-ММ), за которые обработанные логи объекта перенесены в архив"""
+    try:
+        return await log_archiver.list_months(uuid_object)
+    except Exception as e:
+        return JSONResponse(
+            content={"message": f"Ошибка при чтении архива логов: {str(e)}"},
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@router.get("/object/{uuid_object}/archive/{month}",
+            responses={
+                status.HTTP_406_NOT_ACCEPTABLE: {"model": Message},
+                status.HTTP_404_NOT_FOUND: {"model": Message},
+                status.HTTP_200_OK: {"content": {"application/x-ndjson": {}}},
+            })
+@access_control(["admin", "super_admin"])
+async def get_log_archive(
+    uuid_object: str,
+    month: str,
+    uuid_equipment: Optional[str] = Query(None, description="UUID оборудования"),
+    class_log_int: Optional[int] = Query(None, description="Класс сообщения"),
+    search: Optional[str] = Query(None, description="Подстрока сообщения"),
+    current_user: UserGet = Depends(get_current_user),
+):
+    """
+    Архив обработанных логов объекта за месяц (ГГГГ-ММ) в формате NDJSON
+
+    Файлы архива распаковываются и отдаются потоком; фильтры применяются
+    к записям по ходу чтения.
+    """
+    try:
+        month_start = datetime.strptime(month, "%Y-%m").date()
+    except ValueError:
+        return JSONResponse(
+            content={"message": f"Неверный формат month: {month}. Используйте ГГГГ-ММ"},
+            status_code=status.HTTP_404_NOT_FOUND
+        )
+
+    predicate = None
+    if uuid_equipment is not None or class_log_int is not None or search:
+        def predicate(record: dict) -> bool:
+            return ((uuid_equipment is None or record["uuid_equipment"] == uuid_equipment)
+                    and (class_log_int is None or record["class_log_int"] == class_log_int)
+                    and (not search or search.lower() in record["message"].lower()))
+
+    return StreamingResponse(log_archiver.iter_archive(uuid_object, month_start, predicate),
+                             media_type="application/x-ndjson")
+
+
+@router.get("/logs/search",
+            response_model=LogSearchResult,
+            responses={
+                status.HTTP_406_NOT_ACCEPTABLE: {"model": Message},
+                status.HTTP_404_NOT_FOUND: {"model": Message},
+                status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message},
+            })
+@access_control(["admin", "super_admin", "user"])
+async def search_logs(
+    response: Response,
+    uuid_object: str = Query(..., description="UUID объекта"),
+    start_date: Optional[str] = Query(None, description="Начало периода: YYYY-MM-DD или YYYY-MM-DDTHH:MM:SS"),
+    end_date: Optional[str] = Query(None, description="Конец периода (не включительно)"),
+    uuid_equipment: Optional[str] = Query(None, description="UUID оборудования"),
+    class_log_int: Optional[list[int]] = Query(None, description="Классы сообщений"),
+    q: Optional[str] = Query(None, description="Подстрока сообщения, от 3 символов"),
+    cursor: Optional[str] = Query(None, description="Значение X-Next-Cursor предыдущей страницы"),
+    limit: int = Query(50, ge=1, le=200),
+    current_user: UserGet = Depends(get_current_user),
+    log_repository: LogMessageErrorRepository = Depends(),
+):
+    """
+    Поиск логов объекта по периоду, оборудованию, классу и подстроке сообщения
+
+    Период по умолчанию – последние сутки, не длиннее log_search_max_days
+    дней. Сортировка от новых к старым; курсор следующей страницы – в
+    заголовке X-Next-Cursor. Фасеты by_class_log_int и by_equipment
+    считаются тем же запросом по первым log_search_facet_limit совпадениям.
+    """
+    try:
+        service = LogSearchService(log_repository=log_repository)
+
+        result, next_cursor = await service.search(
+            uuid_object=uuid_object,
+            start_date=start_date,
+            end_date=end_date,
+            uuid_equipment=uuid_equipment,
+            class_log_int=class_log_int,
+            query=q,
+            cursor=cursor,
+            limit=limit
+        )
+
+        if next_cursor is not None:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return result
+    except ValueError as e:
+        return JSONResponse(
+            content={"message": str(e)},
+            status_code=status.HTTP_404_NOT_FOUND
+        )
+    except Exception as e:
+        return JSONResponse(
+            content={"message": f"Ошибка при поиске логов: {str(e)}"},
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@router.get("/object/{uuid_object}/rates",
+            response_model=LogRates,
+            responses={
+                status.HTTP_406_NOT_ACCEPTABLE: {"model": Message},
+                status.HTTP_404_NOT_FOUND: {"model": Message},
+                status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message},
+            })
+@access_control(["admin", "super_admin", "user"])
+async def get_log_rates(
+    uuid_object: str,
+    start_date: Optional[str] = Query(None, description="Начало периода: YYYY-MM-DD или YYYY-MM-DDTHH:MM:SS"),
+    end_date: Optional[str] = Query(None, description="Конец периода (не включительно)"),
+    bucket_minutes: int = Query(60, ge=1, le=10080, description="Длина интервала в минутах"),
+    uuid_equipment: Optional[str] = Query(None, description="UUID оборудования"),
+    current_user: UserGet = Depends(get_current_user),
+    log_repository: LogMessageErrorRepository = Depends(),
+):
+    """
+    Частота логов объекта по интервалам для каждой пары оборудование + класс
+
+    Период по умолчанию – последние 7 дней. Для каждого ряда – массивы по
+    интервалам: число логов, базовая линия (EWMA), z-оценка и номера
+    интервалов-всплесков. Ряды отсортированы от самого сильного всплеска.
+    """
+    try:
+        service = LogRateService(log_repository=log_repository)
+
+        return await service.get_rates(
+            uuid_object=uuid_object,
+            start_date=start_date,
+            end_date=end_date,
+            bucket_minutes=bucket_minutes,
+            uuid_equipment=uuid_equipment
+        )
+    except ValueError as e:
+        return JSONResponse(
+            content={"message": str(e)},
+            status_code=status.HTTP_404_NOT_FOUND
+        )
+    except Exception as e:
+        return JSONResponse(
+            content={"message": f"Ошибка при подсчёте частоты логов: {str(e)}"},
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
@@ -1,10 +1,10 @@
 from fastapi import (APIRouter, Depends,
                      status, Request,
                      Response, UploadFile,
-                     BackgroundTasks, Query)
+                     Query)
 from fastapi.responses import JSONResponse
 
-from ..services import ProposalsService, get_current_user, EmailService
+from ..services import ProposalsService, get_current_user
 from ..models.Proposals import (
     GetTechnicalProposals,
     PostTechnicalProposals,
@@ -66,22 +66,11 @@ async def get_page_claim(
     status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": Message}
 })
 async def add_proposals(proposals: PostTechnicalProposals,
-                        background_tasks: BackgroundTasks,
                         current_user: UserGet = Depends(get_current_user),
-                        service: ProposalsService = Depends(),
-                        notify: EmailService = Depends()):
+                        service: ProposalsService = Depends()):
 
     try:
-        entity = await service.add(current_user, proposals)
-        await notify.send_by_context(
-            background_tasks,
-            "proposals_add",
-            "Добавление нового предложения",
-            "proposals_edit.html",
-            True,
-            email_context={"proposal": entity},
-            options_user=[]
-        )
+        await service.add(current_user, proposals)
         return JSONResponse(content={"message": "добавлено"},
                             status_code=status.HTTP_201_CREATED)
     except Exception:
@@ -129,23 +118,12 @@ async def delete_proposals(uuid: str,
 @access_control(["admin", "super_admin"])
 async def update_claim(uuid_proposals: str,
                        proposals_model: UpdateTechnicalProposals,
-                       background_tasks: BackgroundTasks,
                        current_user: UserGet = Depends(get_current_user),
-                       service: ProposalsService = Depends(),
-                       notify: EmailService = Depends()
+                       service: ProposalsService = Depends()
                        ):
 
     try:
-        entity = await service.update(current_user.uuid, uuid_proposals, proposals_model)
-        await notify.send_by_context(
-            background_tasks,
-            "proposals_add",
-            "Предложение было рассмотрено",
-            "proposals_edit.html",
-            True,
-            email_context={"proposal": entity},
-            options_user=[entity.user]
-        )
+        await service.update(current_user.uuid, uuid_proposals, proposals_model)
     except Exception:
         return JSONResponse(content={"message": "ошибка обновления"},
                             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Depends
+
+from ..models.User import UserGet
+from ..services import get_current_user
+from ..functions import access_control
+from ..resilience import http_transport
+
+
+router = APIRouter(prefix="/service", tags=["service"])
+
+
+@router.get("/http_metrics")
+@access_control(["super_admin"])
+async def get_http_metrics(current_user: UserGet = Depends(get_current_user)):
+    """Состояние предохранителей и метрики запросов к микросервисам."""
+    return http_transport.snapshot()
@@ -0,0 +1,242 @@
+"""
+Свёртка сводок анализа логов: месяц -> квартал -> год.
+
+Анализ пишет одну сводку (Summarize) на оборудование и месяц. Чтобы промпт
+видел долгосрочные тенденции и не рос вместе с историей, фоновая задача
+раз в summarize_compaction_interval секунд сворачивает:
+
+- месячные сводки каждого завершённого квартала – в квартальную свёртку;
+- квартальные свёртки года – в годовую (текущий год – по завершённым кварталам).
+
+Свёртки хранятся в summatize_rollup и пересчитываются, только когда их
+источники изменились позже. Текст сворачивает LLM, теги metadata_equipment
+объединяются без него (по частоте). Без настроенного LLM задача не запускается.
+В каждый момент свёртку выполняет один воркер (advisory lock).
+
+Промпт анализа получает контекст фиксированного размера (context_sections):
+текущий месяц, предыдущий квартал и год этого квартала, каждый раздел не
+длиннее summarize_context_max_chars символов.
+"""
+import asyncio
+from collections import Counter
+from datetime import date
+from typing import Any, Callable, Optional
+
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate, HumanMessagePromptTemplate, SystemMessagePromptTemplate
+from sqlalchemy.orm import sessionmaker
+
+from .database import async_session
+from .llm import create_llm
+from .repositories.SummarizeRepository import SummarizeRepository
+from .settings import settings
+
+
+# Сколько значений каждого тега остаётся в свёртке
+ROLLUP_TOP_TAGS = 10
+
+
+def quarter_start(day: date) -> date:
+    return date(day.year, (day.month - 1) // 3 * 3 + 1, 1)
+
+
+def previous_quarter(day: date) -> date:
+    """Начало квартала, предшествующего кварталу day"""
+    start = quarter_start(day)
+    if start.month == 1:
+        return date(start.year - 1, 10, 1)
+    return date(start.year, start.month - 3, 1)
+
+
+def period_end(period: str, start: date) -> date:
+    """Начало следующего периода"""
+    if period == "year":
+        return date(start.year + 1, 1, 1)
+    if start.month == 10:
+        return date(start.year + 1, 1, 1)
+    return date(start.year, start.month + 3, 1)
+
+
+def period_label(period: str, start: date) -> str:
+    if period == "year":
+        return f"{start.year} год"
+    if period == "quarter":
+        return f"{(start.month - 1) // 3 + 1} квартал {start.year}"
+    return start.strftime("%m.%Y")
+
+
+def merge_metadata(items: list[dict]) -> dict:
+    """
+    Теги-списки объединяются по частоте (ROLLUP_TOP_TAGS самых частых),
+    числовые значения statistics суммируются
+    """
+    tags: dict[str, Counter] = {}
+    statistics: dict[str, float] = {}
+    for item in items:
+        for key, value in (item or {}).items():
+            if isinstance(value, list):
+                tags.setdefault(key, Counter()).update(str(i) for i in value)
+            elif key == "statistics" and isinstance(value, dict):
+                for name, number in value.items():
+                    if isinstance(number, (int, float)) and not isinstance(number, bool):
+                        statistics[name] = statistics.get(name, 0) + number
+    result: dict[str, Any] = {key: [i for i, _ in counter.most_common(ROLLUP_TOP_TAGS)]
+                              for key, counter in tags.items()}
+    if statistics:
+        result["statistics"] = statistics
+    return result
+
+
+def truncate(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rstrip() + "\n…"
+
+
+async def context_sections(repo: SummarizeRepository,
+                           uuid_object: str,
+                           uuid_equipment: str,
+                           month: date) -> list[tuple[str, str]]:
+    """
+    Контекст промпта анализа: (заголовок, текст) для текущего месяца,
+    предыдущего квартала и года этого квартала – только найденные разделы
+    """
+    max_chars = settings.summarize_context_max_chars
+    quarter = previous_quarter(month)
+    year = date(quarter.year, 1, 1)
+
+    sections = []
+    current = await repo.get_by_month(uuid_object, uuid_equipment, month)
+    if current:
+        sections.append((f"ТЕКУЩИЙ МЕСЯЦ ({period_label('month', month)})", truncate(current.text, max_chars)))
+    for period, start in (("quarter", quarter), ("year", year)):
+        rollup = await repo.get_rollup(uuid_object, uuid_equipment, period, start)
+        if rollup:
+            sections.append((f"СВОДКА ЗА {period_label(period, start).upper()}", truncate(rollup.text, max_chars)))
+    return sections
+
+
+class SummarizeCompactor:
+    def __init__(self,
+                 session_maker: sessionmaker,
+                 interval: int,
+                 max_chars: int,
+                 llm_factory: Callable[[], Any] = create_llm):
+        self.__session_maker: sessionmaker = session_maker
+        self.__interval: int = interval
+        self.__max_chars: int = max_chars
+        self.__llm_factory: Callable[[], Any] = llm_factory
+        self.__llm = None
+        self.__task: asyncio.Task | None = None
+
+    @property
+    def llm(self):
+        if self.__llm is None:
+            self.__llm = self.__llm_factory()
+        return self.__llm
+
+    async def __compact_text(self, period: str, start: date, parts: list[tuple[str, str]]) -> str:
+        system_template = """Ты эксперт по анализу логов промышленного оборудования.
+Тебе даны сводки анализа логов одного оборудования за части периода "{period}".
+Сверни их в одну сводку за весь период в формате Markdown:
+1. Устойчивые проблемы, которые повторяются из части в часть
+2. Проблемные узлы
+3. Тенденции: что появилось, что ушло, что усилилось
+4. Разовые события – кратко
+
+Сводка должна быть не длиннее {max_chars} символов. Отвечай только текстом сводки."""
+        human_template = """СВОДКИ ЗА ЧАСТИ ПЕРИОДА:
+
+{parts}"""
+        prompt = ChatPromptTemplate.from_messages([
+            SystemMessagePromptTemplate.from_template(system_template),
+            HumanMessagePromptTemplate.from_template(human_template),
+        ])
+        chain = prompt | self.llm | StrOutputParser()
+        text = await chain.ainvoke({
+            "period": period_label(period, start),
+            "max_chars": self.__max_chars,
+            "parts": "\n\n".join(f"## {label}\n{truncate(text, self.__max_chars)}" for label, text in parts),
+        })
+        return truncate(text.strip(), self.__max_chars)
+
+    async def __compact(self,
+                        repo: SummarizeRepository,
+                        period: str,
+                        row,
+                        sources: list[tuple[str, str, dict]]):
+        """sources: (подпись, текст, metadata_equipment) свёртываемых сводок"""
+        if not sources:
+            return
+        text = await self.__compact_text(period, row.period_start, [(label, text) for label, text, _ in sources])
+        await repo.upsert_rollup(row.uuid_object,
+                                 row.uuid_equipment,
+                                 period,
+                                 row.period_start,
+                                 text,
+                                 merge_metadata([metadata for _, _, metadata in sources]),
+                                 len(sources),
+                                 row.source_updated_at)
+
+    async def run_once(self, today: Optional[date] = None) -> int:
+        """
+        Один проход свёртки. Возвращает число пересчитанных свёрток
+        (0 – если свёртку сейчас выполняет другой воркер)
+        """
+        today = today or date.today()
+        count = 0
+        # Блокировка держится открытой транзакцией отдельной сессии, пока
+        # рабочая сессия сохраняет свёртки по одной
+        async with self.__session_maker() as lock_session, self.__session_maker() as session:
+            if not await SummarizeRepository(lock_session).try_lock_compaction():
+                return 0
+            repo = SummarizeRepository(session)
+
+            for row in await repo.get_stale_quarters(quarter_start(today)):
+                months = await repo.get_months(row.uuid_object, row.uuid_equipment,
+                                               row.period_start, period_end("quarter", row.period_start))
+                await self.__compact(repo, "quarter", row,
+                                     [(period_label("month", i.month), i.text, i.metadata_equipment)
+                                      for i in months])
+                count += 1
+
+            for row in await repo.get_stale_years():
+                quarters = await repo.get_rollups(row.uuid_object, "quarter",
+                                                  uuid_equipment=row.uuid_equipment,
+                                                  start=row.period_start,
+                                                  end=period_end("year", row.period_start))
+                await self.__compact(repo, "year", row,
+                                     [(period_label("quarter", i.period_start), i.text, i.metadata_equipment)
+                                      for i in reversed(quarters)])
+                count += 1
+        return count
+
+    async def __loop(self):
+        while True:
+            try:
+                count = await self.run_once()
+                if count:
+                    print(f"[COMPACTION] rollups updated: {count}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[COMPACTION] ERROR: {e}")
+            await asyncio.sleep(self.__interval)
+
+    def start(self):
+        if self.__task is None and self.__interval > 0 and self.llm is not None:
+            self.__task = asyncio.create_task(self.__loop())
+
+    async def stop(self):
+        if self.__task is not None:
+            self.__task.cancel()
+            try:
+                await self.__task
+            except asyncio.CancelledError:
+                pass
+            self.__task = None
+
+
+summarize_compactor = SummarizeCompactor(async_session,
+                                         settings.summarize_compaction_interval,
+                                         settings.summarize_context_max_chars)
@@ -0,0 +1,243 @@
+"""
+Локальное зеркало справочника объектов и оборудования.
+
+Объекты и оборудование живут в микросервисе Object & Equipment, а имена
+нужны почти везде: статистика, выгрузка CSV, отчёты, карточки заявок и аварий.
+Зеркало хранит их в таблицах directory_object / directory_equipment (ответ
+микросервиса целиком плюс имя для SQL-соединений):
+
+- ObjectRepository и EquipmentRepository читают через зеркало: свежая запись
+  (моложе directory_ttl) отдаётся без запроса, промах идёт в микросервис и
+  записывается в зеркало; если микросервис недоступен, отдаётся и устаревшая;
+- статистика и выгрузка соединяют имена прямо в SQL;
+- если задан object_equipment_service_token, фоновая задача каждые
+  directory_sync_interval секунд сверяет зеркало с микросервисом: список
+  объектов и списки оборудования запрашиваются с If-None-Match, и при ответе
+  304 только продлевается срок актуальности. Синхронизацию в каждый момент
+  выполняет один воркер (advisory lock).
+
+Ошибки зеркала не ломают запросы – адаптеры просто идут в микросервис.
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Iterable
+from uuid import UUID
+
+from httpx import AsyncClient
+from sqlalchemy.orm import sessionmaker
+
+from .database import async_session
+from .equipment_index import equipment_index
+from .resilience import http_transport
+from .models.Equipment import GetEquipment
+from .models.Object import GetObject
+from .settings import settings
+
+if TYPE_CHECKING:
+    from .repositories.DirectoryRepository import DirectoryRepository
+
+
+def _object_row(obj: GetObject) -> dict:
+    return {"uuid": obj.uuid, "name": obj.name, "payload": obj.model_dump(mode="json")}
+
+
+def _equipment_row(equipment: GetEquipment, uuid_object: str | UUID | None = None) -> dict:
+    return {"uuid": equipment.uuid,
+            "uuid_object": UUID(str(uuid_object)) if uuid_object else None,
+            "name": equipment.name,
+            "payload": equipment.model_dump(mode="json")}
+
+
+def _uuids(values: Iterable[str]) -> list[UUID]:
+    result = []
+    for value in values:
+        try:
+            result.append(UUID(str(value)))
+        except ValueError:
+            continue
+    return result
+
+
+class DirectoryMirror:
+    def __init__(self,
+                 session_maker: sessionmaker,
+                 ttl: int,
+                 sync_interval: int,
+                 base_url: str,
+                 token: str | None = None,
+                 concurrency: int = 8):
+        self.__session_maker: sessionmaker = session_maker
+        self.__ttl: int = ttl
+        self.__sync_interval: int = sync_interval
+        self.__base_url: str = base_url.rstrip("/")
+        self.__token: str | None = token
+        self.__concurrency: int = concurrency
+        self.__objects_etag: str | None = None
+        self.__task: asyncio.Task | None = None
+
+    @property
+    def is_synced(self) -> bool:
+        """Зеркало поддерживается полным фоновой синхронизацией."""
+        return self.__token is not None
+
+    def __fresh_after(self, any_age: bool) -> datetime:
+        if any_age:
+            return datetime.min.replace(tzinfo=timezone.utc)
+        return datetime.now(timezone.utc) - timedelta(seconds=self.__ttl)
+
+    async def __run(self, action: Callable[["DirectoryRepository"], Awaitable[Any]], default: Any = None) -> Any:
+        # Пакет repositories импортирует зеркало (адаптеры Object/Equipment) –
+        # репозиторий зеркала импортируется при использовании
+        from .repositories.DirectoryRepository import DirectoryRepository
+        try:
+            async with self.__session_maker() as session:
+                repo = DirectoryRepository(session)
+                result = await action(repo)
+                await repo.commit()
+                return result
+        except Exception as e:
+            print(f"[DIRECTORY] ERROR: {e}")
+            return default
+
+    async def get_objects(self, uuids: Iterable[str], any_age: bool = False) -> dict[str, GetObject]:
+        uuids = _uuids(uuids)
+        if not uuids:
+            return {}
+        rows = await self.__run(lambda repo: repo.get_objects(uuids, self.__fresh_after(any_age)), [])
+        return {str(row.uuid): GetObject.model_validate(row.payload) for row in rows}
+
+    async def get_equipment(self, uuids: Iterable[str], any_age: bool = False) -> dict[str, GetEquipment]:
+        uuids = _uuids(uuids)
+        if not uuids:
+            return {}
+        rows = await self.__run(lambda repo: repo.get_equipment(uuids, self.__fresh_after(any_age)), [])
+        return {str(row.uuid): GetEquipment.model_validate(row.payload) for row in rows}
+
+    async def get_object_equipment(self, uuid_object: str) -> list[GetEquipment] | None:
+        """Полный список оборудования объекта или None, если его нет в зеркале."""
+        uuids = _uuids([uuid_object])
+        if not uuids:
+            return None
+        rows = await self.__run(lambda repo: repo.get_object_equipment(uuids[0], self.__fresh_after(False)))
+        if rows is None:
+            return None
+        return [GetEquipment.model_validate(row.payload) for row in rows]
+
+    async def count_objects(self) -> int | None:
+        if not self.is_synced:
+            return None
+        return await self.__run(lambda repo: repo.count_objects()) or None
+
+    async def put_objects(self, objects: list[GetObject]):
+        await self.__run(lambda repo: repo.upsert_objects([_object_row(obj) for obj in objects]))
+
+    async def put_equipment(self, equipment: list[GetEquipment]):
+        await self.__run(lambda repo: repo.upsert_equipment([_equipment_row(e) for e in equipment]))
+
+    async def put_object_equipment(self, uuid_object: str, equipment: list[GetEquipment], etag: str | None = None):
+        rows = [_equipment_row(e, uuid_object) for e in equipment]
+        await self.__run(lambda repo: repo.replace_object_equipment(UUID(str(uuid_object)), rows, etag))
+
+    async def invalidate_object_equipment(self, uuid_object: str):
+        await self.__run(lambda repo: repo.invalidate_object_equipment(UUID(str(uuid_object))))
+
+    async def remove_object(self, uuid_object: str):
+        await self.__run(lambda repo: repo.delete_object(UUID(str(uuid_object))))
+
+    async def remove_equipment(self, uuid_equipment: str):
+        await self.__run(lambda repo: repo.delete_equipment(UUID(str(uuid_equipment))))
+
+    async def __fetch_equipment(self,
+                                client: AsyncClient,
+                                semaphore: asyncio.Semaphore,
+                                uuid_object: UUID,
+                                etag: str | None):
+        headers = {"Authorization": f"Bearer {self.__token}"}
+        if etag:
+            headers["If-None-Match"] = etag
+        async with semaphore:
+            resp = await client.get(f"{self.__base_url}/v1/object/{uuid_object}/equipment/list", headers=headers)
+        if resp.status_code == 304:
+            return uuid_object, None, etag
+        if resp.status_code == 404:
+            return uuid_object, [], None
+        resp.raise_for_status()
+        return uuid_object, [GetEquipment.model_validate(i) for i in resp.json()], resp.headers.get("ETag")
+
+    async def sync(self) -> bool:
+        """
+        Один проход синхронизации. Возвращает False, если синхронизация
+        выключена или её сейчас выполняет другой воркер.
+        """
+        if not self.is_synced:
+            return False
+
+        from .repositories.DirectoryRepository import DirectoryRepository
+
+        headers = {"Authorization": f"Bearer {self.__token}"}
+        async with AsyncClient(transport=http_transport, timeout=None) as client, self.__session_maker() as session:
+            repo = DirectoryRepository(session)
+            if not await repo.try_lock_sync():
+                return False
+
+            objects_headers = dict(headers)
+            if self.__objects_etag:
+                objects_headers["If-None-Match"] = self.__objects_etag
+            resp = await client.get(f"{self.__base_url}/v1/object/list", headers=objects_headers)
+            if resp.status_code == 304:
+                await repo.touch_objects()
+            else:
+                resp.raise_for_status()
+                objects = [GetObject.model_validate(i) for i in resp.json()]
+                await repo.upsert_objects([_object_row(obj) for obj in objects])
+                # Пустой ответ скорее означает сбой, чем отсутствие объектов – зеркало не очищаем
+                if objects:
+                    await repo.delete_objects_except([obj.uuid for obj in objects])
+                self.__objects_etag = resp.headers.get("ETag")
+
+            semaphore = asyncio.Semaphore(self.__concurrency)
+            etags = await repo.get_object_etags()
+            results = await asyncio.gather(*[self.__fetch_equipment(client, semaphore, uuid_object, etag)
+                                             for uuid_object, etag in etags.items()])
+            for uuid_object, equipment, etag in results:
+                if equipment is None:
+                    await repo.touch_object_equipment(uuid_object)
+                    continue
+                await repo.replace_object_equipment(uuid_object,
+                                                    [_equipment_row(e, uuid_object) for e in equipment],
+                                                    etag)
+                equipment_index.put(str(uuid_object), [str(e.uuid) for e in equipment])
+
+            await repo.commit()
+        return True
+
+    async def __sync_loop(self):
+        while True:
+            try:
+                await self.sync()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[DIRECTORY] sync ERROR: {e}")
+            await asyncio.sleep(self.__sync_interval)
+
+    def start(self):
+        if self.__task is None and self.is_synced and self.__sync_interval > 0:
+            self.__task = asyncio.create_task(self.__sync_loop())
+
+    async def stop(self):
+        if self.__task is not None:
+            self.__task.cancel()
+            try:
+                await self.__task
+            except asyncio.CancelledError:
+                pass
+            self.__task = None
+
+
+directory_mirror = DirectoryMirror(async_session,
+                                   settings.directory_ttl,
+                                   settings.directory_sync_interval,
+                                   settings.object_equipment_service_url,
+                                   token=settings.object_equipment_service_token,
+                                   concurrency=settings.equipment_index_concurrency)
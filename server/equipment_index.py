@@ -0,0 +1,115 @@
+"""
+Обратный индекс «оборудование -> объект» в памяти воркера.
+
+Микросервис Object & Equipment не умеет отвечать, какому объекту принадлежит
+оборудование, – есть только списки оборудования по объектам. Индекс собирается
+из этих списков: для каждого объекта запоминается момент загрузки его списка,
+а для каждого оборудования – uuid объекта. Поиск – одно обращение к словарю;
+списки загружаются только для объектов, которых нет в индексе или которые
+старше equipment_index_ttl, параллельно, не больше
+equipment_index_concurrency запросов одновременно. Один и тот же объект
+одновременно загружается только один раз.
+"""
+import asyncio
+import time
+from typing import Awaitable, Callable, Iterable
+
+from .settings import settings
+
+
+LoadEquipment = Callable[[str], Awaitable[list[str]]]
+
+
+class EquipmentIndex:
+    def __init__(self, ttl: int, concurrency: int):
+        self.__ttl: int = ttl
+        self.__concurrency: int = concurrency
+        # uuid оборудования -> uuid объекта
+        self.__owner: dict[str, str] = {}
+        # uuid объекта -> (момент устаревания, uuid оборудования)
+        self.__objects: dict[str, tuple[float, frozenset[str]]] = {}
+        self.__loading: dict[str, asyncio.Future] = {}
+
+    def __is_fresh(self, uuid_object: str) -> bool:
+        item = self.__objects.get(uuid_object)
+        return item is not None and item[0] > time.monotonic()
+
+    def get(self, uuid_equipment: str) -> str | None:
+        """uuid объекта, если оборудование есть в актуальной части индекса."""
+        uuid_object = self.__owner.get(uuid_equipment)
+        if uuid_object is None or not self.__is_fresh(uuid_object):
+            return None
+        return uuid_object
+
+    def put(self, uuid_object: str, equipment: Iterable[str]):
+        """Запоминает список оборудования объекта (заменяет прежний)."""
+        equipment = frozenset(equipment)
+        _, previous = self.__objects.get(uuid_object, (0, frozenset()))
+        for uuid_equipment in previous - equipment:
+            if self.__owner.get(uuid_equipment) == uuid_object:
+                del self.__owner[uuid_equipment]
+        for uuid_equipment in equipment:
+            self.__owner[uuid_equipment] = uuid_object
+        self.__objects[uuid_object] = (time.monotonic() + self.__ttl, equipment)
+
+    def invalidate_object(self, uuid_object: str):
+        item = self.__objects.pop(uuid_object, None)
+        if item is None:
+            return
+        for uuid_equipment in item[1]:
+            if self.__owner.get(uuid_equipment) == uuid_object:
+                del self.__owner[uuid_equipment]
+
+    def invalidate_equipment(self, uuid_equipment: str):
+        """Оборудование изменили или удалили – его объект перечитается при следующем поиске."""
+        uuid_object = self.__owner.get(uuid_equipment)
+        if uuid_object is not None:
+            self.invalidate_object(uuid_object)
+
+    async def __load_one(self, uuid_object: str, load: LoadEquipment, semaphore: asyncio.Semaphore):
+        future = self.__loading.get(uuid_object)
+        if future is not None:
+            # Список уже загружает другой запрос – ждём его результат
+            await asyncio.shield(future)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self.__loading[uuid_object] = future
+        try:
+            async with semaphore:
+                equipment = await load(uuid_object)
+            self.put(uuid_object, equipment)
+            future.set_result(None)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Ошибку получат и ожидающие; здесь она уже «прочитана»
+            future.exception()
+            raise
+        finally:
+            self.__loading.pop(uuid_object, None)
+
+    async def refresh(self, uuid_objects: Iterable[str], load: LoadEquipment):
+        """Загружает списки устаревших и отсутствующих в индексе объектов."""
+        stale = [uuid_object for uuid_object in dict.fromkeys(uuid_objects) if not self.__is_fresh(uuid_object)]
+        if not stale:
+            return
+        semaphore = asyncio.Semaphore(self.__concurrency)
+        await asyncio.gather(*[self.__load_one(uuid_object, load, semaphore) for uuid_object in stale])
+
+    async def find(self, uuid_equipment: str, uuid_objects: Iterable[str], load: LoadEquipment) -> str | None:
+        """
+        uuid объекта из uuid_objects, которому принадлежит оборудование.
+        Промах индекса догружает только устаревшие объекты.
+        """
+        uuid_objects = set(uuid_objects)
+        uuid_object = self.get(uuid_equipment)
+        if uuid_object is None:
+            await self.refresh(uuid_objects, load)
+            uuid_object = self.get(uuid_equipment)
+        return uuid_object if uuid_object in uuid_objects else None
+
+
+equipment_index = EquipmentIndex(settings.equipment_index_ttl, settings.equipment_index_concurrency)
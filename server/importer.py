@@ -0,0 +1,156 @@
+"""
+Потоковый разбор файлов импорта справочников (CSV и XLSX).
+
+Файл читается частями, байты декодируются инкрементально (символ UTF-8 на
+границе частей не рвётся), строки собираются в записи CSV с учётом кавычек
+(поле в кавычках может содержать перевод строки). Наружу отдаются пары
+(номер строки, словарь «заголовок -> значение»), пачками по batch_size –
+в памяти держится только текущая пачка, а не весь файл.
+"""
+import codecs
+import csv
+from collections import deque
+from pathlib import Path
+from typing import AsyncIterator
+
+from fastapi import UploadFile, HTTPException, status
+from starlette.concurrency import iterate_in_threadpool
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+Record = tuple[int, dict[str, str]]
+
+
+class _LineFeed:
+    """Итератор строк для csv.reader, который можно пополнять между вызовами."""
+
+    def __init__(self):
+        self.__lines: deque[str] = deque()
+
+    def push(self, line: str):
+        self.__lines.append(line)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.__lines:
+            raise StopIteration
+        return self.__lines.popleft()
+
+
+def is_xlsx(file: UploadFile) -> bool:
+    return file.content_type == XLSX_CONTENT_TYPE or Path(file.filename or "").suffix.lower() == ".xlsx"
+
+
+def _normalize_header(header: list) -> list[str]:
+    return [str(name or "").strip().lower() for name in header]
+
+
+async def _iter_text(file: UploadFile, chunk_size: int) -> AsyncIterator[str]:
+    """
+    Декодирует файл частями: UTF-8 (с BOM или без), а если встретилась
+    недопустимая для UTF-8 последовательность, пока весь прочитанный текст
+    был ASCII (в нём кодировки совпадают), – cp1251.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    is_ascii = True
+    try:
+        while chunk := await file.read(chunk_size):
+            if is_ascii:
+                try:
+                    text = decoder.decode(chunk)
+                except UnicodeDecodeError:
+                    # Недекодированный хвост прошлой части тоже относится к cp1251
+                    chunk = decoder.getstate()[0] + chunk
+                    decoder = codecs.getincrementaldecoder("cp1251")()
+                    text = decoder.decode(chunk)
+                is_ascii = text.isascii()
+                yield text
+            else:
+                yield decoder.decode(chunk)
+        yield decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                            detail="Файл должен быть в кодировке UTF-8 или cp1251")
+
+
+async def iter_csv_records(file: UploadFile,
+                           delimiter: str = ";",
+                           chunk_size: int = 1024 * 1024) -> AsyncIterator[Record]:
+    feed = _LineFeed()
+    reader = csv.reader(feed, delimiter=delimiter)
+    state = {"quotes": 0, "line": 0, "start": 1}
+
+    def parse(lines: list[str]):
+        for line in lines:
+            state["line"] += 1
+            feed.push(line)
+            state["quotes"] += line.count('"')
+            # Запись CSV закончена, когда в ней чётное число кавычек
+            if state["quotes"] % 2 == 0:
+                row = next(reader, None)
+                if row is not None and any(value.strip() for value in row):
+                    yield state["start"], row
+                state["quotes"] = 0
+                state["start"] = state["line"] + 1
+
+    header: list[str] | None = None
+    pending = ""
+    async for text in _iter_text(file, chunk_size):
+        lines = (pending + text).split("\n")
+        # Последняя строка части может быть неполной – ждём следующую часть
+        pending = lines.pop()
+        for number, row in parse([line + "\n" for line in lines]):
+            if header is None:
+                header = _normalize_header(row)
+            else:
+                yield number, dict(zip(header, row))
+
+    if pending or state["quotes"]:
+        for number, row in parse([pending + "\n"]):
+            if header is not None:
+                yield number, dict(zip(header, row))
+
+
+def _read_xlsx(file: UploadFile):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                            detail="Импорт XLSX недоступен: не установлен openpyxl")
+
+    file.file.seek(0)
+    # read_only – лист читается потоково, без загрузки всей книги в память
+    workbook = load_workbook(file.file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = _normalize_header(next(rows, None) or [])
+        for number, row in enumerate(rows, start=2):
+            values = ["" if value is None else str(value).strip() for value in row]
+            if any(values):
+                yield number, dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+async def iter_records(file: UploadFile, delimiter: str = ";") -> AsyncIterator[Record]:
+    if is_xlsx(file):
+        async for record in iterate_in_threadpool(_read_xlsx(file)):
+            yield record
+    else:
+        async for record in iter_csv_records(file, delimiter):
+            yield record
+
+
+async def iter_batches(file: UploadFile,
+                       batch_size: int = 1000,
+                       delimiter: str = ";") -> AsyncIterator[list[Record]]:
+    batch = []
+    async for record in iter_records(file, delimiter):
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,30 @@
+"""
+LLM Yandex Cloud для анализа логов и свёртки сводок.
+
+Yandex Cloud поддерживает OpenAI-совместимый API, поэтому используется
+ChatOpenAI из LangChain.
+"""
+from typing import Optional
+
+from langchain_openai import ChatOpenAI
+
+from .settings import settings
+
+
+def create_llm() -> Optional[ChatOpenAI]:
+    """None, если не задан YANDEX_CLOUD_API_KEY."""
+    if not settings.yandex_cloud_api_key:
+        return None
+    if ChatOpenAI is None:
+        raise ValueError("ChatOpenAI не найден. Установите langchain-openai: pip install langchain-openai")
+    # Используем параметры для совместимости с Yandex Cloud
+    return ChatOpenAI(
+        model=settings.yandex_cloud_llm_model,
+        api_key=settings.yandex_cloud_api_key,
+        base_url="https://llm.api.cloud.yandex.net/v1",
+        default_headers={
+            "x-folder-id": settings.yandex_cloud_folder_id
+        },
+        temperature=0.1,
+        reasoning_effort="low"
+    )
@@ -0,0 +1,228 @@
+"""
+Архив обработанных логов (log_messages_error) в MinIO.
+
+Обработанные логи нужны только для редких проверок, поэтому фоновая задача
+раз в log_archive_interval секунд переносит логи старше
+log_archive_after_days дней в бакет log_archive_bucket:
+
+- по каждому объекту и месяцу строки читаются потоком по порядку
+  (create_at, id) и пишутся построчным JSON (NDJSON) через zstd во временный
+  файл – не больше log_archive_file_rows строк на файл;
+- файл загружается в MinIO под ключом
+  {uuid объекта}/{ГГГГ-ММ}/{время первой строки}-{id первой}-{id последней}.ndjson.zst;
+  повторный проход после сбоя перезапишет тот же ключ;
+- только после загрузки строки удаляются из Postgres пачками по
+  log_archive_delete_batch – все пачки файла одной транзакцией: после сбоя
+  строки файла либо все на месте (повтор перезапишет тот же ключ), либо все
+  удалены, и в двух файлах одна строка не окажется.
+
+Чтение (iter_archive) распаковывает файлы месяца на лету, кусками: архив
+целиком в память не загружается. В каждый момент архивирует один воркер
+(advisory lock).
+"""
+import asyncio
+import json
+import tempfile
+from datetime import date, datetime, timedelta
+from typing import AsyncIterator, Callable, Optional
+
+import zstandard
+from sqlalchemy.orm import sessionmaker
+
+from .database import async_session
+from .partitions import add_months
+from .repositories.FileBucketRepository import FileBucketRepository
+from .repositories.LogMessageErrorRepository import LogMessageErrorRepository
+from .settings import settings
+
+
+CONTENT_TYPE = "application/zstd"
+
+
+def archive_prefix(uuid_object: str | None, month: date | None = None) -> str:
+    prefix = f"{uuid_object or 'none'}/"
+    if month is not None:
+        prefix += f"{month:%Y-%m}/"
+    return prefix
+
+
+def archive_key(uuid_object: str | None, month: date, first, last) -> str:
+    return (f"{archive_prefix(uuid_object, month)}"
+            f"{first.create_at:%Y%m%dT%H%M%S}-{first.id}-{last.id}.ndjson.zst")
+
+
+def record_line(row) -> bytes:
+    record = {
+        "id": row.id,
+        "uuid": str(row.uuid) if row.uuid else None,
+        "uuid_object": str(row.uuid_object) if row.uuid_object else None,
+        "uuid_equipment": str(row.uuid_equipment) if row.uuid_equipment else None,
+        "create_at": row.create_at.isoformat(),
+        "message": row.message,
+        "class_log_text": row.class_log_text,
+        "class_log_int": row.class_log_int,
+        "entity_equipment": row.entity_equipment,
+        "number_equipment": row.number_equipment,
+    }
+    return json.dumps(record, ensure_ascii=False).encode() + b"\n"
+
+
+async def decompress(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Распаковка zstd потоком: на выходе куски NDJSON по мере поступления входа."""
+    decompressor = zstandard.ZstdDecompressor().decompressobj()
+    async for chunk in chunks:
+        data = decompressor.decompress(chunk)
+        if data:
+            yield data
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Целые строки из потока кусков; в памяти только хвост незаконченной строки."""
+    tail = b""
+    async for chunk in chunks:
+        lines = (tail + chunk).split(b"\n")
+        tail = lines.pop()
+        for line in lines:
+            if line:
+                yield line + b"\n"
+    if tail:
+        yield tail + b"\n"
+
+
+class LogArchiver:
+    def __init__(self,
+                 session_maker: sessionmaker,
+                 bucket: str,
+                 after_days: int | None,
+                 interval: int,
+                 file_rows: int,
+                 delete_batch: int,
+                 level: int):
+        self.__session_maker: sessionmaker = session_maker
+        self.__bucket: FileBucketRepository = FileBucketRepository(bucket)
+        self.__after_days: int | None = after_days
+        self.__interval: int = interval
+        self.__file_rows: int = file_rows
+        self.__delete_batch: int = delete_batch
+        self.__level: int = level
+        self.__task: asyncio.Task | None = None
+
+    async def __archive_file(self,
+                             repo: LogMessageErrorRepository,
+                             uuid_object: str | None,
+                             month: date,
+                             start: datetime,
+                             end: datetime,
+                             after: tuple[datetime, int] | None) -> tuple[int, tuple[datetime, int] | None]:
+        """Один файл архива: число строк и позиция последней строки"""
+        ids = []
+        first = last = None
+        with tempfile.TemporaryFile() as file:
+            compressor = zstandard.ZstdCompressor(level=self.__level)
+            with compressor.stream_writer(file, closefd=False) as writer:
+                async for row in repo.stream_processed(uuid_object, start, end, after, self.__file_rows):
+                    writer.write(record_line(row))
+                    ids.append(row.id)
+                    if first is None:
+                        first = row
+                    last = row
+            if not ids:
+                return 0, None
+            size = file.tell()
+            file.seek(0)
+            await self.__bucket.upload_stream(archive_key(uuid_object, month, first, last), file, size, CONTENT_TYPE)
+
+        for offset in range(0, len(ids), self.__delete_batch):
+            await repo.delete_processed(ids[offset:offset + self.__delete_batch], start, end)
+        await repo.commit()
+        return len(ids), (last.create_at, last.id)
+
+    async def run_once(self, now: Optional[datetime] = None) -> int | None:
+        """
+        Один проход архивирования. Возвращает число перенесённых строк или None,
+        если архивирование выключено или его сейчас выполняет другой воркер
+        """
+        if self.__after_days is None:
+            return None
+        before = (now or datetime.now()) - timedelta(days=self.__after_days)
+        await self.__bucket.create_bucket()
+
+        count = 0
+        # Блокировка держится открытой транзакцией отдельной сессии, пока
+        # рабочая сессия удаляет строки пачками
+        async with self.__session_maker() as lock_session, self.__session_maker() as session:
+            if not await LogMessageErrorRepository(lock_session).try_lock_archive():
+                return None
+            repo = LogMessageErrorRepository(session)
+
+            for group in await repo.get_archive_groups(before):
+                month = group.month.date()
+                start = datetime(month.year, month.month, 1)
+                end = min(datetime.combine(add_months(month, 1), datetime.min.time()), before)
+                uuid_object = str(group.uuid_object) if group.uuid_object else None
+
+                after = None
+                while True:
+                    rows, after = await self.__archive_file(repo, uuid_object, month, start, end, after)
+                    count += rows
+                    if rows < self.__file_rows:
+                        break
+        return count
+
+    async def list_months(self, uuid_object: str) -> list[str]:
+        """Месяцы (ГГГГ-ММ), за которые у объекта есть архив"""
+        months = set()
+        async for page in self.__bucket.iter_object_pages(archive_prefix(uuid_object)):
+            for obj in page:
+                months.add(obj.object_name.split("/")[1])
+        return sorted(months)
+
+    async def iter_archive(self,
+                           uuid_object: str,
+                           month: date,
+                           predicate: Callable[[dict], bool] | None = None) -> AsyncIterator[bytes]:
+        """
+        Строки NDJSON архива объекта за месяц по порядку create_at. Файлы
+        распаковываются на лету; predicate отбирает записи (без него строки
+        отдаются как есть, без разбора JSON)
+        """
+        async for page in self.__bucket.iter_object_pages(archive_prefix(uuid_object, month)):
+            for obj in page:
+                lines = iter_lines(decompress(self.__bucket.iter_file(obj.object_name)))
+                async for line in lines:
+                    if predicate is None or predicate(json.loads(line)):
+                        yield line
+
+    async def __loop(self):
+        while True:
+            try:
+                count = await self.run_once()
+                if count:
+                    print(f"[LOG_ARCHIVE] archived rows: {count}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[LOG_ARCHIVE] ERROR: {e}")
+            await asyncio.sleep(self.__interval)
+
+    def start(self):
+        if self.__task is None and self.__after_days is not None and self.__interval > 0:
+            self.__task = asyncio.create_task(self.__loop())
+
+    async def stop(self):
+        if self.__task is not None:
+            self.__task.cancel()
+            try:
+                await self.__task
+            except asyncio.CancelledError:
+                pass
+            self.__task = None
+
+
+log_archiver = LogArchiver(async_session,
+                           settings.log_archive_bucket,
+                           settings.log_archive_after_days,
+                           settings.log_archive_interval,
+                           settings.log_archive_file_rows,
+                           settings.log_archive_delete_batch,
+                           settings.log_archive_level)
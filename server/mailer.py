@@ -1,9 +1,36 @@
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+"""
+Отправка почты через outbox.
+
+Уведомления не отправляются из запроса: EmailService пишет их в таблицу
+email_outbox в той же транзакции, что и изменение, о котором они сообщают.
+OutboxSender в каждом воркере разбирает очередь пачками (SELECT ... FOR
+UPDATE SKIP LOCKED) и отправляет их через SmtpPool – несколько долгоживущих
+SMTP-соединений, которые переиспользуются между письмами и пачками.
+Неудачные письма повторяются с экспоненциальной задержкой.
+
+Для контекстов из mail_digest_windows события не отправляются сразу:
+каждое хранится в outbox строкой таблицы письма (шаблон <имя>_item.html),
+и когда самому старому событию получателя исполняется окно контекста, они
+собираются в одно письмо по основному шаблону.
+"""
+import asyncio
+import queue
 import smtplib
-from email.mime.text import MIMEText
+import threading
+from datetime import datetime, timedelta, timezone
+from email.message import Message
 from email.mime.multipart import MIMEMultipart
-from pydantic_settings import BaseSettings
+from email.mime.text import MIMEText
 from pathlib import Path
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from markupsafe import Markup
+from pydantic_settings import BaseSettings
+from sqlalchemy.orm import sessionmaker
+
+from .database import async_session
+from .repositories import OutboxRepository
+from .tables import EmailOutbox
 from .settings import settings
 
 
@@ -13,6 +40,21 @@ class MailSettings(BaseSettings):
     smtp_user: str
     smtp_password: str
     email: str
+    smtp_ssl: bool = True
+    smtp_timeout: int = 30
+
+    # Пул соединений и очередь отправки (задержки в секундах)
+    mail_pool_size: int = 2
+    mail_batch_size: int = 50
+    mail_poll_interval: float = 5
+    mail_max_attempts: int = 8
+    mail_retry_base: int = 30
+    mail_retry_max: int = 3600
+
+    # Дайджесты: контекст рассылки -> окно накопления, секунды
+    mail_digest_windows: dict[str, int] = {}
+    # Кеш получателей по контексту, секунды
+    mail_recipients_ttl: int = 300
 
 
 mail_settings = MailSettings(_env_file='./mailer.env', _env_file_encoding='utf-8')
@@ -24,43 +66,256 @@ env = Environment(
 )
 
 
-def send_email(to_email: str, subject: str, body: str, is_html: bool = False):
+def render_item(template_name: str, context: dict | None = None) -> str:
+    """Строка таблицы письма об одном событии: шаблон <имя>_item.html."""
+    path = Path(template_name)
+    return env.get_template(f"{path.stem}_item{path.suffix}").render(**(context or {}))
+
+
+def render_email(template_name: str, items: list[str]) -> str:
+    """Письмо целиком: одно событие или дайджест из нескольких."""
+    return env.get_template(template_name).render(items=[Markup(item) for item in items])
+
+
+def build_message(from_email: str, to_email: str, subject: str, body: str, is_html: bool = False) -> Message:
     msg = MIMEMultipart()
-    msg["From"] = mail_settings.email
+    msg["From"] = from_email
     msg["To"] = to_email
     msg["Subject"] = subject
 
     mime_type = "html" if is_html else "plain"
     msg.attach(MIMEText(body, mime_type, "utf-8"))
+    return msg
 
-    try:
-        with smtplib.SMTP_SSL(mail_settings.smtp_host, mail_settings.smtp_port) as server:
-            server.login(mail_settings.smtp_user, mail_settings.smtp_password)
-            server.send_message(msg)
-    except Exception:
-        pass
-
-
-class EmailNotifier:
-    def __init__(self, default_to: str | None = None):
-        self.default_to = default_to
-
-    def __call__(self,
-                 to_email: str | None = None,
-                 subject: str = "Уведомление",
-                 template_name: str | None = None,
-                 context: dict | None = None,
-                 is_html: bool = True):
-        if not to_email:
-            if not self.default_to:
-                raise ValueError("Адрес получателя не указан")
-            to_email = self.default_to
-
-        if template_name:
-            context = context or {}
-            template = env.get_template(template_name)
-            body = template.render(**context)
+
+class SmtpPool:
+    """
+    Пул SMTP-соединений. Соединение открывается и авторизуется один раз и
+    дальше отправляет письма, пока сервер его не закроет; оборванное
+    соединение переоткрывается, и письмо отправляется повторно.
+    Методы send/close блокирующие – вызываются из потоков.
+    """
+
+    def __init__(self,
+                 host: str,
+                 port: int,
+                 user: str | None = None,
+                 password: str | None = None,
+                 use_ssl: bool = True,
+                 size: int = 2,
+                 timeout: int = 30):
+        self.__host: str = host
+        self.__port: int = port
+        self.__user: str | None = user
+        self.__password: str | None = password
+        self.__use_ssl: bool = use_ssl
+        self.__size: int = size
+        self.__timeout: int = timeout
+        self.__idle: queue.LifoQueue[smtplib.SMTP] = queue.LifoQueue()
+        self.__slots: threading.BoundedSemaphore = threading.BoundedSemaphore(size)
+
+    @property
+    def size(self) -> int:
+        return self.__size
+
+    def __connect(self) -> smtplib.SMTP:
+        if self.__use_ssl:
+            connection = smtplib.SMTP_SSL(self.__host, self.__port, timeout=self.__timeout)
         else:
-            body = context.get("body", "") if context else ""
+            connection = smtplib.SMTP(self.__host, self.__port, timeout=self.__timeout)
+        if self.__user:
+            connection.login(self.__user, self.__password)
+        return connection
+
+    @staticmethod
+    def __close(connection: smtplib.SMTP | None):
+        if connection is None:
+            return
+        try:
+            connection.quit()
+        except Exception:
+            connection.close()
+
+    def send(self, messages: list[Message]) -> list[str | None]:
+        """Отправляет письма по одному соединению; для каждого – None или текст ошибки."""
+        errors = []
+        self.__slots.acquire()
+        try:
+            try:
+                connection = self.__idle.get_nowait()
+            except queue.Empty:
+                connection = None
+
+            for message in messages:
+                for attempt in range(2):
+                    try:
+                        if connection is None:
+                            connection = self.__connect()
+                        connection.send_message(message)
+                        errors.append(None)
+                        break
+                    except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused) as e:
+                        # Сервер ответил отказом – повтор по новому соединению не поможет
+                        errors.append(str(e))
+                        break
+                    except (smtplib.SMTPException, OSError) as e:
+                        self.__close(connection)
+                        connection = None
+                        if attempt == 1:
+                            errors.append(str(e) or e.__class__.__name__)
+
+            if connection is not None:
+                self.__idle.put(connection)
+        finally:
+            self.__slots.release()
+        return errors
+
+    async def send_batch(self, messages: list[Message]) -> list[str | None]:
+        """Делит пачку между соединениями пула и отправляет части параллельно."""
+        if not messages:
+            return []
+        step = -(-len(messages) // self.__size)
+        parts = [messages[offset:offset + step] for offset in range(0, len(messages), step)]
+        results = await asyncio.gather(*[asyncio.to_thread(self.send, part) for part in parts])
+        return [error for part in results for error in part]
+
+    def close(self):
+        while True:
+            try:
+                self.__close(self.__idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+class OutboxSender:
+    """Фоновый цикл воркера, разбирающий email_outbox."""
+
+    def __init__(self,
+                 pool: SmtpPool,
+                 session_maker: sessionmaker,
+                 from_email: str,
+                 batch_size: int = 50,
+                 poll_interval: float = 5,
+                 max_attempts: int = 8,
+                 retry_base: int = 30,
+                 retry_max: int = 3600,
+                 digest_windows: dict[str, int] | None = None):
+        self.__pool: SmtpPool = pool
+        self.__session_maker: sessionmaker = session_maker
+        self.__from_email: str = from_email
+        self.__batch_size: int = batch_size
+        self.__poll_interval: float = poll_interval
+        self.__max_attempts: int = max_attempts
+        self.__retry_base: int = retry_base
+        self.__retry_max: int = retry_max
+        self.__digest_windows: dict[str, int] = digest_windows or {}
+        self.__task: asyncio.Task | None = None
+
+    def retry_delay(self, attempts: int) -> timedelta:
+        return timedelta(seconds=min(self.__retry_base * 2 ** (attempts - 1), self.__retry_max))
+
+    async def drain_once(self) -> int:
+        """Отправляет одну пачку; возвращает число обработанных писем."""
+        async with self.__session_maker() as session:
+            outbox_repo = OutboxRepository(session)
+            emails = await outbox_repo.claim_batch(self.__batch_size)
+            if not emails:
+                return 0
+
+            messages = [build_message(self.__from_email, email.to_email, email.subject, email.body, email.is_html)
+                        for email in emails]
+            errors = await self.__pool.send_batch(messages)
+
+            now = datetime.now(timezone.utc)
+            for email, error in zip(emails, errors):
+                email.attempts += 1
+                email.last_error = error
+                if error is None:
+                    email.state = "sent"
+                    email.sent_at = now
+                elif email.attempts >= self.__max_attempts:
+                    email.state = "failed"
+                else:
+                    email.next_attempt_at = now + self.retry_delay(email.attempts)
+
+            await outbox_repo.commit()
+            return len(emails)
+
+    async def collect_digests(self) -> int:
+        """Собирает созревшие дайджесты в обычные письма outbox; возвращает их число."""
+        async with self.__session_maker() as session:
+            outbox_repo = OutboxRepository(session)
+            now = datetime.now(timezone.utc)
+            digests = []
+            for to_email, context, template_name, oldest in await outbox_repo.get_digest_groups():
+                window = timedelta(seconds=self.__digest_windows.get(context, 0))
+                if oldest > now - window:
+                    continue
+
+                events = await outbox_repo.claim_digest(to_email, context, template_name)
+                if not events:
+                    continue
+
+                subject = events[0].subject
+                if len(events) > 1:
+                    subject = f"{subject} ({len(events)})"
+                digests.append(EmailOutbox(to_email=to_email,
+                                           subject=subject,
+                                           body=render_email(template_name, [event.body for event in events]),
+                                           is_html=events[0].is_html,
+                                           state="pending",
+                                           attempts=0,
+                                           context=context,
+                                           template_name=template_name))
+                await outbox_repo.delete_by_ids([event.id for event in events])
+
+            if digests:
+                outbox_repo.stage(digests)
+                await outbox_repo.commit()
+            return len(digests)
+
+    async def __run(self):
+        while True:
+            try:
+                if self.__digest_windows:
+                    await self.collect_digests()
+                count = await self.drain_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[MAILER] ERROR: {e}")
+                count = 0
+            # Полная пачка – в очереди, вероятно, есть ещё письма
+            if count < self.__batch_size:
+                await asyncio.sleep(self.__poll_interval)
+
+    def start(self):
+        if self.__task is None:
+            self.__task = asyncio.create_task(self.__run())
+
+    async def stop(self):
+        if self.__task is not None:
+            self.__task.cancel()
+            try:
+                await self.__task
+            except asyncio.CancelledError:
+                pass
+            self.__task = None
+        await asyncio.to_thread(self.__pool.close)
+
 
-        send_email(to_email, subject, body, is_html=is_html)
\ No newline at end of file
+outbox_sender = OutboxSender(SmtpPool(mail_settings.smtp_host,
+                                      mail_settings.smtp_port,
+                                      mail_settings.smtp_user,
+                                      mail_settings.smtp_password,
+                                      use_ssl=mail_settings.smtp_ssl,
+                                      size=mail_settings.mail_pool_size,
+                                      timeout=mail_settings.smtp_timeout),
+                             async_session,
+                             mail_settings.email,
+                             batch_size=mail_settings.mail_batch_size,
+                             poll_interval=mail_settings.mail_poll_interval,
+                             max_attempts=mail_settings.mail_max_attempts,
+                             retry_base=mail_settings.mail_retry_base,
+                             retry_max=mail_settings.mail_retry_max,
+                             digest_windows=mail_settings.mail_digest_windows)
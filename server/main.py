@@ -8,8 +8,16 @@ from httpx import AsyncClient
 from .api import router
 from .settings import settings
 from .database import async_session as async_db_session
-from .minio import async_session as async_minio_session
+from .minio import async_session as async_minio_session, close_http_session
 from .response import get_client
+from .reference_cache import reference_cache
+from .directory import directory_mirror
+from .resilience import http_transport
+from .render import shutdown_render_pool
+from .mailer import outbox_sender
+from .compaction import summarize_compactor
+from .partitions import log_partitions
+from .log_archive import log_archiver
 
 
 # origins = [
@@ -27,9 +35,19 @@ async def lifespan(app: FastAPI):
     - база данных
     - MinIO
     - микросервис пользователей
+
+    и загрузка снимка справочников (reference_cache).
     """
     print("[CHECKAPP] start")
 
+    # Загрузка справочников в память
+    try:
+        snapshot = await reference_cache.refresh()
+        print(f"[CHECKAPP][REFERENCE] ok, version={snapshot.version} digest={snapshot.digest}")
+    except Exception as e:
+        print(f"[CHECKAPP][REFERENCE] ERROR: {e}")
+    reference_cache.start()
+
     # Проверка MinIO
     try:
         buckets = await async_minio_session.list_buckets()
@@ -51,9 +69,34 @@ async def lifespan(app: FastAPI):
 
     print("[CHECKAPP] done")
 
+    # Отправка писем из email_outbox
+    outbox_sender.start()
+
+    # Синхронизация зеркала справочника объектов и оборудования
+    directory_mirror.start()
+
+    # Свёртка сводок анализа логов в квартальные и годовые
+    summarize_compactor.start()
+
+    # Помесячные секции log_messages_error
+    log_partitions.start()
+
+    # Перенос обработанных логов в архив MinIO
+    log_archiver.start()
+
     # Здесь можно добавить логику graceful shutdown при необходимости
     yield
 
+    await reference_cache.stop()
+    await directory_mirror.stop()
+    await summarize_compactor.stop()
+    await log_partitions.stop()
+    await log_archiver.stop()
+    await outbox_sender.stop()
+    shutdown_render_pool()
+    await close_http_session()
+    await http_transport.close()
+
 
 app = FastAPI(lifespan=lifespan)
 
@@ -63,7 +106,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["X-Count-Page", "X-Count-Item"],
+    expose_headers=["X-Count-Page", "X-Count-Item", "X-Next-Cursor", "ETag"],
 )
 
 app.include_router(router)
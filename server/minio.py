@@ -1,3 +1,20 @@
+"""
+Клиенты MinIO и общий для процесса слой чтения объектов.
+
+- async_session / session – асинхронный и синхронный клиенты; оба используют
+  пулы соединений одного размера (minio_pool_size), синхронный – через общий
+  urllib3.PoolManager.
+- get_http_session – одна долгоживущая aiohttp-сессия на процесс для
+  get_object (вместо новой сессии и пула соединений на каждое чтение).
+- read_object / iter_object – чтение объекта целиком или потоком; одновременных
+  чтений не больше minio_max_concurrency, крупные объекты скачиваются
+  параллельно по диапазонам в заранее выделенный буфер.
+"""
+import asyncio
+from typing import AsyncIterator
+
+import aiohttp
+import urllib3
 from miniopy_async import Minio as AsyncMinio
 from minio import Minio
 
@@ -13,6 +30,90 @@ async_session = AsyncMinio(endpoint=f"{settings.minio_host}:{settings.minio_port
 session = Minio(endpoint=f"{settings.minio_host}:{settings.minio_port}",
                 access_key=settings.minio_access_key,
                 secret_key=settings.minio_secret_key,
-                secure=False)
+                secure=False,
+                http_client=urllib3.PoolManager(
+                    maxsize=settings.minio_pool_size,
+                    block=False,
+                    timeout=urllib3.Timeout(connect=5, read=60),
+                    retries=urllib3.Retry(total=3, backoff_factor=0.2,
+                                          status_forcelist=[500, 502, 503, 504]),
+                ))
+
+
+_http_session: aiohttp.ClientSession | None = None
+_semaphore: asyncio.Semaphore | None = None
+
+
+def get_http_session() -> aiohttp.ClientSession:
+    global _http_session
+    if _http_session is None or _http_session.closed:
+        connector = aiohttp.TCPConnector(limit=settings.minio_pool_size,
+                                         limit_per_host=settings.minio_pool_size,
+                                         keepalive_timeout=30,
+                                         ttl_dns_cache=300)
+        _http_session = aiohttp.ClientSession(connector=connector,
+                                              timeout=aiohttp.ClientTimeout(total=None, sock_connect=5, sock_read=60))
+    return _http_session
+
+
+def get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(settings.minio_max_concurrency)
+    return _semaphore
+
+
+async def close_http_session():
+    global _http_session
+    if _http_session is not None:
+        await _http_session.close()
+        _http_session = None
+
+
+async def _read_range(bucket: str, key: str, offset: int, length: int, target: memoryview | None = None) -> bytes:
+    async with get_semaphore():
+        response = await async_session.get_object(bucket, key, get_http_session(),
+                                                  offset=offset, length=length)
+        try:
+            if target is None:
+                return await response.read()
+            # Пишем сразу в свой срез общего буфера, без промежуточной склейки
+            position = 0
+            async for chunk in response.content.iter_chunked(1024 * 1024):
+                target[position:position + len(chunk)] = chunk
+                position += len(chunk)
+            return b""
+        finally:
+            response.release()
+
+
+async def read_object(bucket: str, key: str, size: int | None = None) -> bytes | bytearray:
+    """
+    Читает объект целиком. Если размер известен и больше minio_range_threshold,
+    объект качается параллельно частями по minio_range_part_size.
+    """
+    threshold = settings.minio_range_threshold * 1024 * 1024
+    if size is None or size <= threshold:
+        return await _read_range(bucket, key, 0, 0)
+
+    part_size = settings.minio_range_part_size * 1024 * 1024
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    await asyncio.gather(*[
+        _read_range(bucket, key, offset, min(part_size, size - offset), view[offset:offset + part_size])
+        for offset in range(0, size, part_size)
+    ])
+    return buffer
 
 
+async def iter_object(bucket: str, key: str, chunk_size: int = 1024 * 1024) -> AsyncIterator[bytes]:
+    """
+    Потоковое чтение объекта. Семафор здесь не берётся: долгие отдачи клиенту
+    не должны занимать слоты коротких чтений, их ограничивает пул соединений.
+    """
+    response = await async_session.get_object(bucket, key, get_http_session())
+    try:
+        async for chunk in response.content.iter_chunked(chunk_size):
+            yield chunk
+    finally:
+        response.release()
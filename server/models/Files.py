@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 
-from datetime import datetime
+from datetime import datetime, date
 
 
 class BaseFile(BaseModel):
@@ -18,3 +18,39 @@ class GetFile(BaseFile):
 class FileGenerate(BaseModel):
     id_blueprint: int
     data_blueprint: dict | None
+
+
+class FileBatchGenerate(BaseModel):
+    id_blueprint: int
+    uuid_object: str = "all"
+    id_state_claim: int = 0
+    date_from: date | None = None
+    date_to: date | None = None
+    # False – ZIP отдаётся потоком в ответе, True – собирается в MinIO в фоне
+    is_artifact: bool = False
+
+
+class BatchGenerateState(BaseModel):
+    uuid_token: str
+    state: str
+    total: int
+    done: int = 0
+    failed: list[str] = []
+    file_key: str | None = None
+
+
+class StorageGcReport(BaseModel):
+    dry_run: bool
+    scanned: int = 0
+    scanned_bytes: int = 0
+    orphans: int = 0
+    orphan_bytes: int = 0
+    expired_artifacts: int = 0
+    deleted: int = 0
+    failed: list[str] = []
+    orphan_slots: int = 0
+    released_blobs: int = 0
+    local_scanned: int = 0
+    local_orphans: int = 0
+    elapsed: float = 0
+    objects_per_second: float = 0
@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+
+
+class ImportRowError(BaseModel):
+    line: int
+    message: str
+
+
+class ImportReport(BaseModel):
+    total: int = 0
+    inserted: int = 0
+    updated: int = 0
+    skipped: int = 0
+    errors: list[ImportRowError] = []
+    # Ошибок больше, чем помещается в отчёт
+    errors_truncated: bool = False
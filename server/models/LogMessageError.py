@@ -1,4 +1,5 @@
 from pydantic import BaseModel, UUID4, field_serializer
+from uuid import UUID
 from datetime import datetime
 
 
@@ -26,3 +27,54 @@ class PostLogMessageError(BaseLogMessageError):
     uuid_object: str
     uuid_equipment: str | None
     is_processed: bool = False
+
+
+class LogSearchItem(BaseLogMessageError):
+    # uuid и is_processed в таблице необязательны: внешние загрузчики их не
+    # всегда передают
+    uuid: UUID | None
+    uuid_object: str | None
+    uuid_equipment: str | None
+    is_processed: bool | None
+
+    @field_serializer("uuid")
+    def serialize_uuid(self, uuid: UUID | None, _info):
+        return str(uuid) if uuid is not None else None
+
+
+class LogSearchEquipmentFacet(BaseModel):
+    uuid_equipment: str | None
+    name: str | None
+    count: int
+
+
+class LogSearchResult(BaseModel):
+    items: list[LogSearchItem]
+    # Число логов по class_log_int и по оборудованию (самые частые)
+    by_class_log_int: dict[int, int]
+    by_equipment: list[LogSearchEquipmentFacet]
+    # Сколько подходящих строк учтено в фасетах; facets_truncated – учтены не все
+    facet_rows: int
+    facets_truncated: bool
+
+
+class LogRateSeries(BaseModel):
+    uuid_equipment: str | None
+    name: str | None
+    class_log_int: int
+    total: int
+    # Значения по интервалам: число логов, ожидаемое число (EWMA по
+    # предыдущим интервалам) и z-оценка отклонения от него
+    counts: list[int]
+    baseline: list[float]
+    score: list[float]
+    # Номера интервалов-всплесков
+    bursts: list[int]
+
+
+class LogRates(BaseModel):
+    # Интервал i начинается в start + i * bucket_seconds
+    start: datetime
+    bucket_seconds: int
+    buckets: int
+    series: list[LogRateSeries]
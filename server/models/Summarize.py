@@ -1,5 +1,5 @@
-from pydantic import BaseModel, UUID4, field_serializer
-from datetime import datetime
+from pydantic import BaseModel, UUID4, field_serializer, field_validator
+from datetime import date, datetime
 from typing import Dict, Any, Optional
 
 from .Equipment import GetEquipment
@@ -20,6 +20,53 @@ class GetSummarize(BaseSummarize):
     equipment_uuid: Optional[str] = None
     equipment_name: Optional[str] = None
 
+    @field_validator("uuid_object", "uuid_equipment", mode="before")
+    @classmethod
+    def validate_uuid_str(cls, value):
+        # В таблице – UUID, в ответе – строка
+        return str(value) if value is not None else value
+
+    @field_serializer("uuid")
+    def serialize_uuid(self, uuid: UUID4, _info):
+        return str(uuid)
+
+
+class GetSummarizeItem(BaseModel):
+    """Элемент списка Summarize: без text и полного metadata_equipment"""
+    uuid: UUID4
+    uuid_object: str
+    uuid_equipment: Optional[str] = None
+    datetime_start: datetime
+    datetime_end: Optional[datetime] = None
+    equipment_name: Optional[str] = None
+    tags: Dict[str, Any] = {}
+
+    @field_validator("uuid_object", "uuid_equipment", mode="before")
+    @classmethod
+    def validate_uuid_str(cls, value):
+        return str(value) if value is not None else value
+
+    @field_serializer("uuid")
+    def serialize_uuid(self, uuid: UUID4, _info):
+        return str(uuid)
+
+
+class GetSummarizeRollup(BaseSummarize):
+    """Свёртка Summarize за квартал или год"""
+    uuid: UUID4
+    uuid_object: str
+    uuid_equipment: str
+    period: str
+    period_start: date
+    source_count: int
+    updated_at: datetime
+    equipment_name: Optional[str] = None
+
+    @field_validator("uuid_object", "uuid_equipment", mode="before")
+    @classmethod
+    def validate_uuid_str(cls, value):
+        return str(value) if value is not None else value
+
     @field_serializer("uuid")
     def serialize_uuid(self, uuid: UUID4, _info):
         return str(uuid)
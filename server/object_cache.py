@@ -0,0 +1,65 @@
+"""
+Кеш «горячих» объектов MinIO в памяти воркера.
+
+Несколько объектов (актуальные бланки, свежесформированные документы заявок)
+дают основную часть скачиваний. Кеш хранит их байты по ключу (бакет, ключ)
+вместе с ETag: актуальность проверяется дешёвым stat_object, а запись и
+удаление через FileBucketRepository сбрасывают запись сразу.
+Общий объём ограничен object_cache_size, отдельный объект – object_cache_max_item.
+"""
+from collections import OrderedDict
+from typing import Iterator
+
+from .settings import settings
+
+
+class ObjectCache:
+    def __init__(self, max_size: int, max_item_size: int):
+        self.__max_size: int = max_size
+        self.__max_item_size: int = max_item_size
+        self.__size: int = 0
+        self.__items: OrderedDict[tuple[str, str], tuple[str, bytes | bytearray]] = OrderedDict()
+
+    @property
+    def size(self) -> int:
+        return self.__size
+
+    def is_cacheable(self, size: int | None) -> bool:
+        return size is not None and size <= self.__max_item_size
+
+    def get(self, bucket: str, key: str, etag: str | None) -> bytes | bytearray | None:
+        item = self.__items.get((bucket, key))
+        if item is None or etag is None:
+            return None
+        if item[0] != etag:
+            # Объект заменили (возможно, другим воркером) – запись устарела
+            self.invalidate(bucket, key)
+            return None
+        self.__items.move_to_end((bucket, key))
+        return item[1]
+
+    def put(self, bucket: str, key: str, etag: str | None, content: bytes | bytearray):
+        if etag is None or not self.is_cacheable(len(content)):
+            return
+        self.invalidate(bucket, key)
+        self.__items[(bucket, key)] = (etag, content)
+        self.__size += len(content)
+        while self.__size > self.__max_size:
+            _, (_, evicted) = self.__items.popitem(last=False)
+            self.__size -= len(evicted)
+
+    def invalidate(self, bucket: str, key: str):
+        item = self.__items.pop((bucket, key), None)
+        if item is not None:
+            self.__size -= len(item[1])
+
+
+def iter_memory(content: bytes | bytearray, chunk_size: int = 256 * 1024) -> Iterator[memoryview]:
+    """Отдаёт содержимое срезами memoryview – без копирования байт."""
+    view = memoryview(content)
+    for offset in range(0, len(view), chunk_size):
+        yield view[offset:offset + chunk_size]
+
+
+object_cache = ObjectCache(settings.object_cache_size * 1024 * 1024,
+                           settings.object_cache_max_item * 1024 * 1024)
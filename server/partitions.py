@@ -0,0 +1,156 @@
+"""
+Обслуживание помесячных секций log_messages_error.
+
+Таблица секционирована по create_at (секция на месяц,
+log_messages_error_yYYYYmMM, и секция по умолчанию для строк вне
+диапазона). Фоновая задача раз в log_partition_interval секунд:
+
+- создаёт секции текущего месяца и log_partition_ahead месяцев вперёд,
+  чтобы новые строки не попадали в секцию по умолчанию; строки диапазона
+  новой секции, уже оказавшиеся в секции по умолчанию, переносятся в неё.
+  Каждая секция создаётся в своей вложенной транзакции: ошибка одной
+  записывается в лог и не останавливает обслуживание остальных;
+- если задан log_retention_months, отсоединяет секции месяцев, закончившихся
+  раньше, чем log_retention_months месяцев назад (текущий месяц не считается):
+  отсоединение мгновенное, без DELETE и последующего VACUUM;
+- если log_retention_drop, удаляет отсоединённые секции, иначе они остаются
+  отдельными таблицами (для архивирования).
+
+В каждый момент обслуживание выполняет один воркер (advisory lock).
+"""
+import asyncio
+import re
+from datetime import date
+from typing import Optional
+
+from sqlalchemy.orm import sessionmaker
+
+from .database import async_session
+from .repositories.LogPartitionRepository import LogPartitionRepository
+from .settings import settings
+
+
+PARTITION_PREFIX = "log_messages_error_y"
+DEFAULT_PARTITION = "log_messages_error_default"
+_PARTITION_NAME = re.compile(r"^log_messages_error_y(\d{4})m(\d{2})$")
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARTITION_PREFIX}{month.year:04d}m{month.month:02d}"
+
+
+def partition_month(name: str) -> date | None:
+    """Месяц секции по имени; None – не помесячная секция"""
+    match = _PARTITION_NAME.match(name)
+    if match is None:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+class LogPartitionMaintainer:
+    def __init__(self,
+                 session_maker: sessionmaker,
+                 interval: int,
+                 months_ahead: int,
+                 retention_months: int | None = None,
+                 drop_expired: bool = False):
+        self.__session_maker: sessionmaker = session_maker
+        self.__interval: int = interval
+        self.__months_ahead: int = months_ahead
+        self.__retention_months: int | None = retention_months
+        self.__drop_expired: bool = drop_expired
+        self.__task: asyncio.Task | None = None
+
+    def is_expired(self, month: date, today: date) -> bool:
+        if self.__retention_months is None:
+            return False
+        cutoff = add_months(date(today.year, today.month, 1), -self.__retention_months)
+        return add_months(month, 1) <= cutoff
+
+    async def run_once(self, today: Optional[date] = None) -> dict[str, list[str]] | None:
+        """
+        Один проход обслуживания: имена созданных, отсоединённых, удалённых и
+        не созданных из-за ошибки секций (moved – сколько строк перенесено из
+        секции по умолчанию), или None, если обслуживание сейчас выполняет
+        другой воркер
+        """
+        today = today or date.today()
+        current = date(today.year, today.month, 1)
+        result = {"created": [], "moved": [], "detached": [], "dropped": [], "failed": []}
+
+        async with self.__session_maker() as session:
+            repo = LogPartitionRepository(session)
+            if not await repo.try_lock():
+                return None
+
+            partitions = set(await repo.get_partitions())
+            for offset in range(self.__months_ahead + 1):
+                month = add_months(current, offset)
+                name = partition_name(month)
+                if name not in partitions:
+                    try:
+                        async with repo.savepoint():
+                            moved = await repo.create_partition(
+                                name, month, add_months(month, 1),
+                                DEFAULT_PARTITION if DEFAULT_PARTITION in partitions else None
+                            )
+                    except Exception as e:
+                        print(f"[PARTITIONS] ERROR: {name}: {e}")
+                        result["failed"].append(name)
+                        continue
+                    result["created"].append(name)
+                    if moved:
+                        result["moved"].append(f"{name}: {moved}")
+
+            for name in sorted(partitions):
+                month = partition_month(name)
+                if month is not None and self.is_expired(month, today):
+                    await repo.detach_partition(name)
+                    result["detached"].append(name)
+
+            if self.__drop_expired:
+                for name in sorted(await repo.get_detached(PARTITION_PREFIX)):
+                    month = partition_month(name)
+                    if month is not None and self.is_expired(month, today):
+                        await repo.drop_table(name)
+                        result["dropped"].append(name)
+
+            await repo.commit()
+        return result
+
+    async def __loop(self):
+        while True:
+            try:
+                result = await self.run_once()
+                if result and any(result.values()):
+                    print(f"[PARTITIONS] {result}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[PARTITIONS] ERROR: {e}")
+            await asyncio.sleep(self.__interval)
+
+    def start(self):
+        if self.__task is None and self.__interval > 0:
+            self.__task = asyncio.create_task(self.__loop())
+
+    async def stop(self):
+        if self.__task is not None:
+            self.__task.cancel()
+            try:
+                await self.__task
+            except asyncio.CancelledError:
+                pass
+            self.__task = None
+
+
+log_partitions = LogPartitionMaintainer(async_session,
+                                        settings.log_partition_interval,
+                                        settings.log_partition_ahead,
+                                        retention_months=settings.log_retention_months,
+                                        drop_expired=settings.log_retention_drop)
@@ -0,0 +1,235 @@
+"""
+In-memory снимок справочных таблиц (состояния, классы/типы отказов, признаки,
+коды ошибок, события).
+
+Справочники меняются крайне редко, а читаются почти в каждом запросе, поэтому
+каждый воркер держит у себя неизменяемый снимок всех таблиц с индексами по id
+и по name. Снимок загружается при старте приложения, перечитывается после
+записи через /env и периодически в фоне (чтобы остальные воркеры gunicorn
+подтягивали изменения, сделанные соседями).
+"""
+import asyncio
+from typing import Generic, TypeVar, Callable, Iterable, Awaitable, Any
+
+import xxhash
+from pydantic import BaseModel
+from pydantic_core import to_json
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .database import async_session
+from .settings import settings
+from .tables import (
+    StateClaim,
+    StateAccident,
+    ClassBrake,
+    TypeBrake,
+    SignsAccident,
+    CodeErrorAccident,
+    StateEvent,
+    TypeEvent,
+)
+from .models.Claim import StateClaimModel
+from .models.Accident import (
+    StateAccidentModel,
+    ClassBrake as ClassBrakeModel,
+    GetTypeBrake,
+    SignsAccident as SignsAccidentModel,
+    CodeErrorAccidentModel,
+)
+from .models.Event import StateEvent as StateEventModel, TypeEvent as TypeEventModel
+
+
+T = TypeVar("T", bound=BaseModel)
+
+
+class ReferenceTable(Generic[T]):
+    """Справочник с доступом за O(1) по id и по name."""
+
+    __slots__ = ("items", "by_id", "by_name")
+
+    def __init__(self, items: Iterable[T]):
+        self.items: tuple[T, ...] = tuple(items)
+        self.by_id: dict[int, T] = {i.id: i for i in self.items}
+        self.by_name: dict[str, T] = {i.name: i for i in self.items}
+
+    def get(self, id_item: int) -> T | None:
+        return self.by_id.get(id_item)
+
+    def get_by_name(self, name: str) -> T | None:
+        return self.by_name.get(name)
+
+    def filter(self, predicate: Callable[[T], bool]) -> list[T]:
+        return [i for i in self.items if predicate(i)]
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+
+class SerializedPayload:
+    """Заранее сериализованный JSON-ответ и его ETag (хеш содержимого)."""
+
+    __slots__ = ("body", "etag")
+
+    def __init__(self, body: bytes):
+        self.body: bytes = body
+        self.etag: str = f'"{xxhash.xxh3_64_hexdigest(body)}"'
+
+
+class ReferenceSnapshot:
+    """
+    Неизменяемый снимок всех справочников.
+    version растёт при каждой замене снимка с изменившимся содержимым,
+    digest – хеш содержимого (одинаков во всех воркерах при одинаковых данных).
+    """
+
+    def __init__(self,
+                 version: int = 0,
+                 state_claim: Iterable[StateClaimModel] = (),
+                 state_accident: Iterable[StateAccidentModel] = (),
+                 class_brake: Iterable[ClassBrakeModel] = (),
+                 type_brake: Iterable[GetTypeBrake] = (),
+                 signs_accident: Iterable[SignsAccidentModel] = (),
+                 error_code_accident: Iterable[CodeErrorAccidentModel] = (),
+                 state_event: Iterable[StateEventModel] = (),
+                 type_event: Iterable[TypeEventModel] = ()):
+        self.version: int = version
+        self.state_claim: ReferenceTable[StateClaimModel] = ReferenceTable(state_claim)
+        self.state_accident: ReferenceTable[StateAccidentModel] = ReferenceTable(state_accident)
+        self.class_brake: ReferenceTable[ClassBrakeModel] = ReferenceTable(class_brake)
+        self.type_brake: ReferenceTable[GetTypeBrake] = ReferenceTable(type_brake)
+        self.signs_accident: ReferenceTable[SignsAccidentModel] = ReferenceTable(signs_accident)
+        self.error_code_accident: ReferenceTable[CodeErrorAccidentModel] = ReferenceTable(error_code_accident)
+        self.state_event: ReferenceTable[StateEventModel] = ReferenceTable(state_event)
+        self.type_event: ReferenceTable[TypeEventModel] = ReferenceTable(type_event)
+        self.digest: str = self.__calc_digest()
+        # Сериализованные ответы /env, живут ровно столько же, сколько снимок
+        self.payloads: dict[str, SerializedPayload] = {}
+
+    def __tables(self) -> tuple[ReferenceTable, ...]:
+        return (self.state_claim, self.state_accident, self.class_brake, self.type_brake,
+                self.signs_accident, self.error_code_accident, self.state_event, self.type_event)
+
+    def __calc_digest(self) -> str:
+        hasher = xxhash.xxh3_64()
+        for table in self.__tables():
+            for item in table:
+                hasher.update(item.model_dump_json().encode("utf-8"))
+            hasher.update(b"\x00")
+        return hasher.hexdigest()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.version > 0
+
+    def get_type_brake_by_class(self, class_name: str) -> list[GetTypeBrake]:
+        # "org" – все организационные классы (всё, кроме механических)
+        if class_name == "org":
+            return self.type_brake.filter(lambda i: i.type.name != "meh")
+        return self.type_brake.filter(lambda i: i.type.name == class_name)
+
+    def get_type_brake_by_class_id(self, class_id: int) -> list[GetTypeBrake]:
+        return self.type_brake.filter(lambda i: i.id_type == class_id)
+
+
+class ReferenceCache:
+    def __init__(self):
+        self.__snapshot: ReferenceSnapshot = ReferenceSnapshot()
+        self.__lock: asyncio.Lock = asyncio.Lock()
+        self.__task: asyncio.Task | None = None
+
+    @property
+    def snapshot(self) -> ReferenceSnapshot:
+        return self.__snapshot
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.__snapshot.is_loaded
+
+    async def __read_all(self, session: AsyncSession, table, order_by) -> list:
+        result = await session.execute(select(table).order_by(order_by))
+        return result.unique().scalars().all()
+
+    async def __build_snapshot(self, session: AsyncSession, version: int) -> ReferenceSnapshot:
+        state_claim = await self.__read_all(session, StateClaim, StateClaim.id)
+        state_accident = await self.__read_all(session, StateAccident, StateAccident.id)
+        class_brake = await self.__read_all(session, ClassBrake, ClassBrake.id)
+        type_brake = await self.__read_all(session, TypeBrake, TypeBrake.id)
+        signs_accident = await self.__read_all(session, SignsAccident, SignsAccident.id)
+        error_code = await self.__read_all(session, CodeErrorAccident, CodeErrorAccident.id)
+        state_event = await self.__read_all(session, StateEvent, StateEvent.id)
+        type_event = await self.__read_all(session, TypeEvent, TypeEvent.id)
+
+        return ReferenceSnapshot(
+            version=version,
+            state_claim=[StateClaimModel.model_validate(i, from_attributes=True) for i in state_claim],
+            state_accident=[StateAccidentModel.model_validate(i, from_attributes=True) for i in state_accident],
+            class_brake=[ClassBrakeModel.model_validate(i, from_attributes=True) for i in class_brake],
+            type_brake=[GetTypeBrake.model_validate(i, from_attributes=True) for i in type_brake],
+            signs_accident=[SignsAccidentModel.model_validate(i, from_attributes=True) for i in signs_accident],
+            error_code_accident=[CodeErrorAccidentModel.model_validate(i, from_attributes=True) for i in error_code],
+            state_event=[StateEventModel.model_validate(i, from_attributes=True) for i in state_event],
+            type_event=[TypeEventModel.model_validate(i, from_attributes=True) for i in type_event],
+        )
+
+    async def refresh(self) -> ReferenceSnapshot:
+        """
+        Перечитывает все справочники одним проходом и атомарно подменяет снимок.
+        Если содержимое не изменилось, текущий снимок (и его version) сохраняется.
+        """
+        async with self.__lock:
+            current = self.__snapshot
+            async with async_session() as session:
+                snapshot = await self.__build_snapshot(session, current.version + 1)
+            if current.is_loaded and snapshot.digest == current.digest:
+                return current
+            self.__snapshot = snapshot
+            return snapshot
+
+    async def get_payload(self,
+                          key: str,
+                          loader: Callable[[], Awaitable[Any]]) -> SerializedPayload | None:
+        """
+        Возвращает ответ, сериализованный один раз на версию снимка.
+        При замене снимка кеш ответов сбрасывается вместе с ним.
+        """
+        snapshot = self.__snapshot
+        payload = snapshot.payloads.get(key)
+        if payload is not None:
+            return payload
+
+        data = await loader()
+        if data is None:
+            return None
+        payload = SerializedPayload(to_json(data))
+        if snapshot.is_loaded:
+            snapshot.payloads[key] = payload
+        return payload
+
+    async def __refresh_loop(self, interval: int):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"[REFERENCE_CACHE] refresh ERROR: {e}")
+
+    def start(self):
+        """Запускает фоновое периодическое обновление снимка."""
+        if self.__task is None and settings.reference_cache_ttl > 0:
+            self.__task = asyncio.create_task(self.__refresh_loop(settings.reference_cache_ttl))
+
+    async def stop(self):
+        if self.__task is not None:
+            self.__task.cancel()
+            try:
+                await self.__task
+            except asyncio.CancelledError:
+                pass
+            self.__task = None
+
+
+reference_cache = ReferenceCache()
@@ -0,0 +1,98 @@
+"""
+Генерация DOCX-документов по шаблонам (бланкам).
+
+Байты бланков кешируются общим кешем объектов MinIO (object_cache) с проверкой
+по ETag, поэтому замена файла бланка приводит к промаху кеша во всех воркерах.
+
+- render_docx выполняется в отдельном пуле процессов, чтобы рендер и сохранение
+  DOCX не блокировали event loop воркера; render_documents – пакетный вариант
+  с ограниченным окном задач в пуле.
+"""
+import asyncio
+import multiprocessing
+from collections import deque
+from typing import AsyncIterator, Iterable
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from docxtpl import DocxTemplate
+
+from .settings import settings
+
+
+DOCX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+def render_docx(blueprint: bytes, context: dict) -> bytes:
+    """Выполняется в дочернем процессе: разбор шаблона, рендер и сохранение."""
+    template = DocxTemplate(BytesIO(blueprint))
+    template.render(context)
+    output = BytesIO()
+    template.save(output)
+    return output.getvalue()
+
+
+_pool: ProcessPoolExecutor | None = None
+_pool_semaphore: asyncio.Semaphore | None = None
+
+
+def get_render_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: не форкаем процесс с работающим event loop и потоками
+        _pool = ProcessPoolExecutor(max_workers=settings.render_pool_size,
+                                    mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+async def render_document(blueprint: bytes, context: dict) -> bytes:
+    """
+    Рендерит документ в пуле процессов.
+    Число одновременно отправленных в пул задач ограничено, чтобы при всплеске
+    генераций не копить в очереди пула копии бланков и контекстов.
+    """
+    global _pool_semaphore
+    if _pool_semaphore is None:
+        _pool_semaphore = asyncio.Semaphore(settings.render_pool_size * 2)
+    loop = asyncio.get_running_loop()
+    async with _pool_semaphore:
+        return await loop.run_in_executor(get_render_pool(), render_docx, blueprint, context)
+
+
+async def render_documents(blueprint: bytes,
+                           items: Iterable[tuple[str, dict]]) -> AsyncIterator[tuple[str, bytes | None]]:
+    """
+    Пакетный рендер одного бланка для многих контекстов.
+    В пул одновременно отправлено не больше render_pool_size * 2 задач,
+    результаты отдаются в исходном порядке по мере готовности.
+    Для документа, который не удалось сформировать, возвращается None.
+    """
+    window = settings.render_pool_size * 2
+    pending: deque[tuple[str, asyncio.Task]] = deque()
+    items = iter(items)
+    try:
+        while True:
+            while len(pending) < window:
+                item = next(items, None)
+                if item is None:
+                    break
+                key, context = item
+                pending.append((key, asyncio.ensure_future(render_document(blueprint, context))))
+            if not pending:
+                return
+            key, task = pending.popleft()
+            try:
+                yield key, await task
+            except Exception as e:
+                print(f"[RENDER] {key} ERROR: {e}")
+                yield key, None
+    finally:
+        for _, task in pending:
+            task.cancel()
+
+
+def shutdown_render_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
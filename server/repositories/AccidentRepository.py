@@ -7,6 +7,8 @@ from uuid import UUID
 
 from ..tables import Accident, StateAccident, SignsAccident, EquipmentToAccident
 from ..database import get_session
+from ..reference_cache import reference_cache
+from ..models.Accident import StateAccidentModel
 
 
 class AccidentRepository:
@@ -69,6 +71,11 @@ class AccidentRepository:
         if accident_entity is not None:
             self.__session.expire(accident_entity, ["damaged_equipment"])
 
+    async def refresh(self, entity: Accident):
+        """Записать изменения без commit и перечитать сущность со связями"""
+        await self.__session.flush()
+        await self.__session.refresh(entity)
+
     async def get_by_uuid(self, uuid_accident: str) -> Accident | None:
         stmt = select(Accident).where(Accident.uuid == uuid_accident)
         result = await self.__session.execute(stmt)
@@ -82,7 +89,9 @@ class AccidentRepository:
             await self.__session.rollback()
             raise
 
-    async def get_state_accident_by_name(self, name: str) -> StateAccident:
+    async def get_state_accident_by_name(self, name: str) -> StateAccidentModel | StateAccident | None:
+        if reference_cache.is_loaded:
+            return reference_cache.snapshot.state_accident.get_by_name(name)
         stmt = select(StateAccident).where(StateAccident.name == name)
         result = await self.__session.execute(stmt)
         return result.scalars().first()
@@ -0,0 +1,126 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import select, update, delete
+
+from fastapi import Depends
+
+from ..tables import Blob, BlobSlot
+from ..database import get_session
+
+
+class BlobRepository:
+    """
+    Таблица blob (содержимое по SHA-256 со счётчиком ссылок) и blob_slot
+    (ссылки владельцев на содержимое). Счётчик меняется только атомарными
+    UPDATE ... SET ref_count = ref_count ± 1 в одной транзакции со слотом.
+    """
+
+    def __init__(self, session: AsyncSession = Depends(get_session)):
+        self.__session: AsyncSession = session
+
+    async def get_by_hash(self, hash_content: str) -> Blob | None:
+        response = select(Blob).where(Blob.hash == hash_content)
+        result = await self.__session.execute(response)
+        return result.scalars().first()
+
+    async def add(self, entity: Blob) -> Blob:
+        """Добавляет blob; если такой хеш уже успели записать параллельно – возвращает его."""
+        try:
+            self.__session.add(entity)
+            await self.__session.commit()
+            return entity
+        except IntegrityError:
+            await self.__session.rollback()
+            return await self.get_by_hash(entity.hash)
+
+    async def get_slot(self, owner_type: str, owner_id: str, name: str) -> BlobSlot | None:
+        response = select(BlobSlot).where(BlobSlot.owner_type == owner_type,
+                                          BlobSlot.owner_id == owner_id,
+                                          BlobSlot.name == name)
+        result = await self.__session.execute(response)
+        return result.scalars().first()
+
+    async def get_slots(self, owner_type: str, owner_id: str) -> list[BlobSlot]:
+        response = (select(BlobSlot)
+                    .where(BlobSlot.owner_type == owner_type, BlobSlot.owner_id == owner_id)
+                    .order_by(BlobSlot.name))
+        result = await self.__session.execute(response)
+        return result.scalars().unique().all()
+
+    async def __acquire(self, id_blob: int) -> bool:
+        response = (update(Blob)
+                    .where(Blob.id == id_blob)
+                    .values(ref_count=Blob.ref_count + 1)
+                    .returning(Blob.id))
+        result = await self.__session.execute(response)
+        return result.scalar_one_or_none() is not None
+
+    async def __release(self, id_blob: int) -> str | None:
+        """Уменьшает счётчик; при нуле удаляет строку blob и возвращает ключ объекта в MinIO."""
+        await self.__session.execute(update(Blob)
+                                     .where(Blob.id == id_blob)
+                                     .values(ref_count=Blob.ref_count - 1))
+        response = (delete(Blob)
+                    .where(Blob.id == id_blob, Blob.ref_count <= 0)
+                    .returning(Blob.file_key))
+        result = await self.__session.execute(response)
+        return result.scalar_one_or_none()
+
+    async def set_slot(self, owner_type: str, owner_id: str, name: str, id_blob: int) -> list[str] | None:
+        """
+        Привязывает слот к blob. Возвращает ключи объектов, на которые больше
+        никто не ссылается (их можно удалять из MinIO), или None, если blob
+        успели удалить (его нужно создать заново).
+        """
+        try:
+            if not await self.__acquire(id_blob):
+                await self.__session.rollback()
+                return None
+
+            response = (select(BlobSlot)
+                        .where(BlobSlot.owner_type == owner_type,
+                               BlobSlot.owner_id == owner_id,
+                               BlobSlot.name == name)
+                        .with_for_update(of=BlobSlot))
+            slot = (await self.__session.execute(response)).scalars().first()
+
+            released = []
+            if slot is None:
+                self.__session.add(BlobSlot(owner_type=owner_type,
+                                            owner_id=owner_id,
+                                            name=name,
+                                            id_blob=id_blob))
+            else:
+                old_blob = slot.id_blob
+                slot.id_blob = id_blob
+                await self.__session.flush()
+                file_key = await self.__release(old_blob)
+                if file_key is not None:
+                    released.append(file_key)
+
+            await self.__session.commit()
+            return released
+        except Exception:
+            await self.__session.rollback()
+            raise
+
+    async def delete_slots(self, owner_type: str, owner_id: str, name: str | None = None) -> list[str]:
+        """Удаляет слоты владельца (все или один) и возвращает ключи освободившихся объектов."""
+        try:
+            response = delete(BlobSlot).where(BlobSlot.owner_type == owner_type,
+                                              BlobSlot.owner_id == owner_id)
+            if name is not None:
+                response = response.where(BlobSlot.name == name)
+            result = await self.__session.execute(response.returning(BlobSlot.id_blob))
+
+            released = []
+            for id_blob in result.scalars().all():
+                file_key = await self.__release(id_blob)
+                if file_key is not None:
+                    released.append(file_key)
+
+            await self.__session.commit()
+            return released
+        except Exception:
+            await self.__session.rollback()
+            raise
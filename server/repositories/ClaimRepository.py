@@ -7,6 +7,8 @@ from fastapi import Depends
 
 from ..tables import Claim, Accident, StateClaim
 from ..database import get_session
+from ..reference_cache import reference_cache
+from ..models.Claim import StateClaimModel
 
 
 class ClaimRepository:
@@ -124,7 +126,39 @@ class ClaimRepository:
         result = await self.__session.execute(stmt)
         return result.scalars().unique().all()
 
-    async def get_state_claim_by_name(self, name: str) -> StateClaim:
+    async def get_claims_by_filter(
+        self,
+        uuid_object: str,
+        id_state_claim: int,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+    ) -> list[Claim]:
+        """
+        Все заявки по фильтру одним запросом (без пагинации) – для пакетной генерации.
+        Авария, состояния и справочники аварии подтягиваются joined-загрузкой.
+        """
+        stmt = (
+            select(Claim)
+            .join(Accident, Claim.id_accident == Accident.id)
+        )
+
+        if uuid_object != "all":
+            stmt = stmt.where(Accident.uuid_object == uuid_object)
+        if id_state_claim != 0:
+            stmt = stmt.where(Claim.id_state_claim == id_state_claim)
+
+        if date_from:
+            stmt = stmt.where(Claim.datetime >= date_from)
+        if date_to:
+            stmt = stmt.where(Claim.datetime <= date_to)
+
+        stmt = stmt.order_by(Claim.datetime)
+        result = await self.__session.execute(stmt)
+        return result.scalars().unique().all()
+
+    async def get_state_claim_by_name(self, name: str) -> StateClaimModel | StateClaim | None:
+        if reference_cache.is_loaded:
+            return reference_cache.snapshot.state_claim.get_by_name(name)
         stmt = select(StateClaim).where(StateClaim.name == name)
         result = await self.__session.execute(stmt)
         return result.scalars().first()
@@ -137,6 +171,11 @@ class ClaimRepository:
             await self.__session.rollback()
             raise
 
+    async def refresh(self, entity: Claim):
+        """Записать изменения без commit и перечитать сущность со связями"""
+        await self.__session.flush()
+        await self.__session.refresh(entity)
+
     async def get_by_uuid(self, uuid_claim: str) -> Claim | None:
         stmt = select(Claim).where(Claim.uuid == uuid_claim)
         result = await self.__session.execute(stmt)
@@ -0,0 +1,143 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, update, func, text
+from sqlalchemy.dialects.postgresql import insert
+
+from fastapi import Depends
+
+from ..tables import DirectoryObject, DirectoryEquipment
+from ..database import get_session
+
+from datetime import datetime
+from uuid import UUID
+
+
+class DirectoryRepository:
+    def __init__(self, session: AsyncSession = Depends(get_session)):
+        self.__session: AsyncSession = session
+
+    async def commit(self):
+        await self.__session.commit()
+
+    async def try_lock_sync(self) -> bool:
+        """Синхронизацию в каждый момент выполняет один воркер (блокировка до конца транзакции)."""
+        response = select(func.pg_try_advisory_xact_lock(text("hashtext('directory_sync')")))
+        result = await self.__session.execute(response)
+        return bool(result.scalar())
+
+    async def get_objects(self, uuids: list[UUID], fresh_after: datetime) -> list[DirectoryObject]:
+        response = select(DirectoryObject).where(DirectoryObject.uuid.in_(uuids),
+                                                 DirectoryObject.synced_at > fresh_after)
+        result = await self.__session.execute(response)
+        return list(result.scalars().all())
+
+    async def get_object_etags(self) -> dict[UUID, str | None]:
+        result = await self.__session.execute(select(DirectoryObject.uuid, DirectoryObject.equipment_etag))
+        return {row.uuid: row.equipment_etag for row in result}
+
+    async def count_objects(self) -> int:
+        result = await self.__session.execute(select(func.count()).select_from(DirectoryObject))
+        return result.scalar()
+
+    async def get_equipment(self, uuids: list[UUID], fresh_after: datetime) -> list[DirectoryEquipment]:
+        response = select(DirectoryEquipment).where(DirectoryEquipment.uuid.in_(uuids),
+                                                    DirectoryEquipment.synced_at > fresh_after)
+        result = await self.__session.execute(response)
+        return list(result.scalars().all())
+
+    async def get_object_equipment(self, uuid_object: UUID, fresh_after: datetime) -> list[DirectoryEquipment] | None:
+        """Оборудование объекта, если его полный список загружен не раньше fresh_after."""
+        response = select(DirectoryObject.equipment_synced_at).where(DirectoryObject.uuid == uuid_object)
+        synced_at = (await self.__session.execute(response)).scalar()
+        if synced_at is None or synced_at <= fresh_after:
+            return None
+        response = (select(DirectoryEquipment)
+                    .where(DirectoryEquipment.uuid_object == uuid_object)
+                    .order_by(DirectoryEquipment.name))
+        result = await self.__session.execute(response)
+        return list(result.scalars().all())
+
+    async def upsert_objects(self, rows: list[dict]):
+        """rows: uuid, name, payload. ETag списка оборудования при этом не трогается."""
+        if not rows:
+            return
+        response = insert(DirectoryObject).values(rows)
+        response = response.on_conflict_do_update(
+            index_elements=[DirectoryObject.uuid],
+            set_={"name": response.excluded.name,
+                  "payload": response.excluded.payload,
+                  "synced_at": func.now()},
+        )
+        await self.__session.execute(response)
+
+    async def upsert_equipment(self, rows: list[dict]):
+        """
+        rows: uuid, uuid_object, name, payload. Пустой uuid_object (оборудование
+        получено не из списка объекта) не затирает уже известный объект.
+        """
+        if not rows:
+            return
+        response = insert(DirectoryEquipment).values(rows)
+        response = response.on_conflict_do_update(
+            index_elements=[DirectoryEquipment.uuid],
+            set_={"uuid_object": func.coalesce(response.excluded.uuid_object, DirectoryEquipment.uuid_object),
+                  "name": response.excluded.name,
+                  "payload": response.excluded.payload,
+                  "synced_at": func.now()},
+        )
+        await self.__session.execute(response)
+
+    async def replace_object_equipment(self, uuid_object: UUID, rows: list[dict], etag: str | None):
+        """Полный список оборудования объекта: лишнее удаляется, остальное обновляется."""
+        await self.__session.execute(
+            delete(DirectoryEquipment).where(DirectoryEquipment.uuid_object == uuid_object,
+                                             DirectoryEquipment.uuid.not_in([row["uuid"] for row in rows]))
+        )
+        await self.upsert_equipment(rows)
+        await self.__session.execute(
+            update(DirectoryObject)
+            .where(DirectoryObject.uuid == uuid_object)
+            .values(equipment_etag=etag, equipment_synced_at=func.now())
+        )
+
+    async def touch_object_equipment(self, uuid_object: UUID):
+        """Список оборудования не изменился (304) – продлеваем актуальность."""
+        await self.__session.execute(
+            update(DirectoryObject)
+            .where(DirectoryObject.uuid == uuid_object)
+            .values(equipment_synced_at=func.now())
+        )
+        await self.__session.execute(
+            update(DirectoryEquipment)
+            .where(DirectoryEquipment.uuid_object == uuid_object)
+            .values(synced_at=func.now())
+        )
+
+    async def touch_objects(self):
+        await self.__session.execute(update(DirectoryObject).values(synced_at=func.now()))
+
+    async def delete_objects_except(self, uuids: list[UUID]):
+        """Полный список объектов: удаляются объекты, которых в нём нет, с их оборудованием."""
+        missing = select(DirectoryObject.uuid).where(DirectoryObject.uuid.not_in(uuids))
+        await self.__session.execute(delete(DirectoryEquipment).where(DirectoryEquipment.uuid_object.in_(missing)))
+        await self.__session.execute(delete(DirectoryObject).where(DirectoryObject.uuid.not_in(uuids)))
+
+    async def delete_object(self, uuid_object: UUID):
+        await self.__session.execute(delete(DirectoryEquipment).where(DirectoryEquipment.uuid_object == uuid_object))
+        await self.__session.execute(delete(DirectoryObject).where(DirectoryObject.uuid == uuid_object))
+
+    async def invalidate_object_equipment(self, uuid_object: UUID):
+        """Список оборудования объекта изменился – перечитается при следующем обращении."""
+        await self.__session.execute(
+            update(DirectoryObject)
+            .where(DirectoryObject.uuid == uuid_object)
+            .values(equipment_synced_at=None)
+        )
+
+    async def delete_equipment(self, uuid_equipment: UUID):
+        await self.__session.execute(
+            update(DirectoryObject)
+            .where(DirectoryObject.uuid.in_(select(DirectoryEquipment.uuid_object)
+                                            .where(DirectoryEquipment.uuid == uuid_equipment)))
+            .values(equipment_synced_at=None)
+        )
+        await self.__session.execute(delete(DirectoryEquipment).where(DirectoryEquipment.uuid == uuid_equipment))
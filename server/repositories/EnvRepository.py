@@ -1,11 +1,13 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, or_
+from sqlalchemy import select, func, or_, literal_column
+from sqlalchemy.dialects.postgresql import insert
 
 from fastapi import Depends
 
 from ..tables import *
 
 from ..database import get_session
+from ..reference_cache import reference_cache
 
 from datetime import datetime
 
@@ -15,6 +17,8 @@ class EnvRepository:
         self.__session: AsyncSession = session
 
     async def get_all_signs_accident(self) -> list[SignsAccident]:
+        if reference_cache.is_loaded:
+            return list(reference_cache.snapshot.signs_accident)
         response = select(SignsAccident)
         result = await self.__session.execute(response)
         return result.scalars().all()
@@ -28,16 +32,22 @@ class EnvRepository:
             raise Exception
 
     async def get_all_type_event(self) -> list[TypeEvent]:
+        if reference_cache.is_loaded:
+            return list(reference_cache.snapshot.type_event)
         response = select(TypeEvent)
         result = await self.__session.execute(response)
         return result.scalars().all()
 
     async def get_all_state_event(self) -> list[StateEvent]:
+        if reference_cache.is_loaded:
+            return list(reference_cache.snapshot.state_event)
         response = select(StateEvent)
         result = await self.__session.execute(response)
         return result.scalars().all()
 
     async def get_state_claim(self) -> list[StateClaim]:
+        if reference_cache.is_loaded:
+            return list(reference_cache.snapshot.state_claim)
         response = select(StateClaim)
         result = await self.__session.execute(response)
         return result.scalars().all()
@@ -52,10 +62,34 @@ class EnvRepository:
             return None
 
     async def get_all_error_code_accident(self) -> list[CodeErrorAccident]:
+        if reference_cache.is_loaded:
+            return list(reference_cache.snapshot.error_code_accident)
         response = select(CodeErrorAccident)
         result = await self.__session.execute(response)
         return result.scalars().all()
 
+    async def __upsert(self, table, key, rows: list[dict], columns: list[str]) -> int:
+        """INSERT ... ON CONFLICT (key) DO UPDATE; возвращает число новых строк (xmax = 0)."""
+        response = insert(table).values(rows)
+        response = (response
+                    .on_conflict_do_update(index_elements=[key],
+                                           set_={column: response.excluded[column] for column in columns})
+                    .returning(literal_column("xmax = 0")))
+        try:
+            result = await self.__session.execute(response)
+            inserted = sum(1 for is_new in result.scalars().all() if is_new)
+            await self.__session.commit()
+            return inserted
+        except Exception:
+            await self.__session.rollback()
+            raise
+
+    async def upsert_signs_accident(self, rows: list[dict]) -> int:
+        return await self.__upsert(SignsAccident, SignsAccident.code, rows, ["name"])
+
+    async def upsert_error_code_accident(self, rows: list[dict]) -> int:
+        return await self.__upsert(CodeErrorAccident, CodeErrorAccident.name, rows, ["description"])
+
     async def add_list_error_code_accident(self, error_codes: list[CodeErrorAccident]):
         try:
             self.__session.add_all(error_codes)
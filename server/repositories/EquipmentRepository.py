@@ -8,6 +8,8 @@ from httpx import AsyncClient
 from ..models.Equipment import GetEquipment, PostEquipment, UpdateEquipment
 from ..response import get_client
 from ..settings import settings
+from ..equipment_index import equipment_index
+from ..directory import directory_mirror
 
 
 oauth2_scheme = OAuth2PasswordBearer(
@@ -98,8 +100,14 @@ class EquipmentRepository:
                 detail="Unauthorized in object-equipment service",
             )
         resp.raise_for_status()
+        equipment_index.invalidate_object(uuid_object)
+        await directory_mirror.invalidate_object_equipment(uuid_object)
 
     async def get_by_uuid(self, uuid: str) -> GetEquipment | None:
+        """Оборудование из зеркала справочника; при промахе – из микросервиса с записью в зеркало."""
+        cached = await directory_mirror.get_equipment([uuid])
+        if uuid in cached:
+            return cached[uuid]
         resp = await self._client.get(
             f"{self._base_url}/v1/equipment/{uuid}",
             headers=self._auth_headers(),
@@ -112,7 +120,9 @@ class EquipmentRepository:
         if resp.status_code == status.HTTP_404_NOT_FOUND:
             return None
         resp.raise_for_status()
-        return GetEquipment.model_validate(resp.json())
+        equipment = GetEquipment.model_validate(resp.json())
+        await directory_mirror.put_equipment([equipment])
+        return equipment
 
     async def update(self, uuid: str, entity: UpdateEquipment) -> None:
         resp = await self._client.put(
@@ -126,12 +136,16 @@ class EquipmentRepository:
                 detail="Unauthorized in object-equipment service",
             )
         resp.raise_for_status()
+        equipment_index.invalidate_equipment(uuid)
+        await directory_mirror.remove_equipment(uuid)
 
     async def delete(self, uuid: str) -> None:
         resp = await self._client.delete(
             f"{self._base_url}/v1/equipment/{uuid}",
             headers=self._auth_headers(),
         )
+        equipment_index.invalidate_equipment(uuid)
+        await directory_mirror.remove_equipment(uuid)
         if resp.status_code == status.HTTP_401_UNAUTHORIZED:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -142,6 +156,9 @@ class EquipmentRepository:
         resp.raise_for_status()
 
     async def get_all_equipment(self, uuid_object: str) -> List[GetEquipment]:
+        cached = await directory_mirror.get_object_equipment(uuid_object)
+        if cached is not None:
+            return cached
         resp = await self._client.get(
             f"{self._base_url}/v1/object/{uuid_object}/equipment/list",
             headers=self._auth_headers(),
@@ -154,31 +171,44 @@ class EquipmentRepository:
         if resp.status_code == status.HTTP_404_NOT_FOUND:
             return []
         resp.raise_for_status()
-        data = resp.json()
-        return [GetEquipment.model_validate(item) for item in data]
+        equipment_list = [GetEquipment.model_validate(item) for item in resp.json()]
+        # Полный список объекта заодно обновляет зеркало и обратный индекс
+        await directory_mirror.put_object_equipment(uuid_object, equipment_list)
+        equipment_index.put(uuid_object, [str(e.uuid) for e in equipment_list])
+        return equipment_list
 
     async def get_equipment_by_uuid_set(self, uuid_list: list[str]) -> List[GetEquipment]:
+        """
+        Оборудование по списку UUID: найденное в зеркале справочника берётся
+        оттуда, в микросервис одним batch-запросом уходят только остальные.
+        """
         if not uuid_list:
             return []
-        try:
-            resp = await self._client.post(
-                f"{self._base_url}/v1/equipment/batch",
-                json=uuid_list,
-                headers={**self._auth_headers(), "Content-Type": "application/json"},
-            )
-        except (httpx.ConnectError, httpx.RequestError):
-            # Микросервис недоступен — возвращаем пустой список
-            return []
-        if resp.status_code == status.HTTP_401_UNAUTHORIZED:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Unauthorized in object-equipment service",
-            )
-        if resp.status_code == status.HTTP_404_NOT_FOUND:
-            return []
-        resp.raise_for_status()
-        data = resp.json()
-        return [GetEquipment.model_validate(item) for item in data]
+        found = await directory_mirror.get_equipment(uuid_list)
+        missing = [i for i in uuid_list if i not in found]
+        if missing:
+            try:
+                resp = await self._client.post(
+                    f"{self._base_url}/v1/equipment/batch",
+                    json=missing,
+                    headers={**self._auth_headers(), "Content-Type": "application/json"},
+                )
+            except (httpx.ConnectError, httpx.RequestError):
+                # Микросервис недоступен — добираем устаревшие записи зеркала
+                resp = None
+                found.update(await directory_mirror.get_equipment(missing, any_age=True))
+            if resp is not None:
+                if resp.status_code == status.HTTP_401_UNAUTHORIZED:
+                    raise HTTPException(
+                        status_code=status.HTTP_401_UNAUTHORIZED,
+                        detail="Unauthorized in object-equipment service",
+                    )
+                if resp.status_code != status.HTTP_404_NOT_FOUND:
+                    resp.raise_for_status()
+                    loaded = [GetEquipment.model_validate(item) for item in resp.json()]
+                    await directory_mirror.put_equipment(loaded)
+                    found.update({str(e.uuid): e for e in loaded})
+        return [found[i] for i in dict.fromkeys(uuid_list) if i in found]
 
     async def get_equipment_by_search_field(self, uuid_object: str, name_equipment: str) -> List[GetEquipment]:
         resp = await self._client.get(
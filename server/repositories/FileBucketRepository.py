@@ -1,14 +1,48 @@
-from fastapi import Depends
-from ..minio import async_session, session
+from fastapi import Depends, UploadFile, HTTPException, status
+from ..minio import async_session, session, read_object, iter_object
 from miniopy_async import Minio
 from miniopy_async.helpers import ObjectWriteResult
 from miniopy_async.deleteobjects import DeleteObject
+from miniopy_async.commonconfig import Tags
 from pathlib import Path
 from io import BytesIO
-import aiohttp
+from typing import BinaryIO, AsyncIterator
+import xxhash
 
 from uuid import uuid4
+from datetime import timedelta
 from ..settings import settings
+from ..object_cache import object_cache
+
+
+class _HashingReader:
+    """
+    Асинхронный reader поверх UploadFile для put_object: отдаёт данные частями,
+    по ходу считает xxh3 и обрывает загрузку при превышении лимита размера.
+    """
+
+    def __init__(self, file: UploadFile, max_size: int):
+        self.__file: UploadFile = file
+        self.__max_size: int = max_size
+        self.__size: int = 0
+        self.__hasher = xxhash.xxh3_64()
+
+    @property
+    def size(self) -> int:
+        return self.__size
+
+    @property
+    def checksum(self) -> str:
+        return self.__hasher.hexdigest()
+
+    async def read(self, size: int = -1) -> bytes:
+        data = await self.__file.read(size)
+        self.__size += len(data)
+        if self.__size > self.__max_size:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                                detail="Файл превышает допустимый размер")
+        self.__hasher.update(data)
+        return data
 
 
 class FileBucketRepository:
@@ -27,21 +61,94 @@ class FileBucketRepository:
                           file: str | bytes,
                           content_type: str) -> ObjectWriteResult:
 
-        if isinstance(file, bytes):
-            buffer = BytesIO(file)
-        else:
-            buffer = BytesIO(file.encode("utf-8"))
+        if not isinstance(file, bytes):
+            file = file.encode("utf-8")
 
+        # BytesIO над bytes не копирует данные, а известная длина избавляет
+        # клиент MinIO от буферизации частей multipart-загрузки
+        buffer = BytesIO(file)
+
+        object_cache.invalidate(self.__name_bucket, file_key)
         result = await self.__client.put_object(self.__name_bucket,
                                                 file_key,
                                                 buffer,
-                                                -1,
+                                                len(file),
                                                 part_size=10 * 1024 * 1024,
                                                 content_type=content_type)
+        # Только что записанный объект (например, сгенерированный документ),
+        # скорее всего, скоро скачают – кладём его в кеш сразу
+        object_cache.put(self.__name_bucket, file_key, result.etag, file)
         return result
 
+    @staticmethod
+    def check_upload_size(file: UploadFile, max_size: int):
+        """Ранний отказ по известному размеру – до любых обращений к MinIO."""
+        if file.size is not None and file.size > max_size:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                                detail="Файл превышает допустимый размер")
+
+    async def upload_form_file(self,
+                               file_key: str,
+                               file: UploadFile,
+                               content_type: str | None,
+                               max_size: int,
+                               checksum: str | None = None) -> str:
+        """
+        Потоковая загрузка UploadFile в MinIO: данные читаются из спула
+        частями по part_size и сразу уходят в multipart-загрузку, файл целиком
+        в память не загружается. Возвращает xxh3 содержимого; он же сохраняется
+        в тег объекта xxh3. Если передан ожидаемый checksum и он не совпал,
+        объект удаляется.
+        """
+        self.check_upload_size(file, max_size)
+        await file.seek(0)
+        object_cache.invalidate(self.__name_bucket, file_key)
+
+        reader = _HashingReader(file, max_size)
+        await self.__client.put_object(self.__name_bucket,
+                                       file_key,
+                                       reader,
+                                       file.size if file.size is not None else -1,
+                                       part_size=10 * 1024 * 1024,
+                                       content_type=content_type or "application/octet-stream")
+
+        if checksum is not None and checksum.lower() != reader.checksum:
+            await self.delete_object(file_key)
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                                detail="Контрольная сумма файла не совпадает")
+
+        tags = Tags.new_object_tags()
+        tags["xxh3"] = reader.checksum
+        await self.__client.set_object_tags(self.__name_bucket, file_key, tags)
+        return reader.checksum
+
+    async def upload_stream(self,
+                            file_key: str,
+                            stream: BinaryIO,
+                            length: int,
+                            content_type: str) -> ObjectWriteResult:
+        """Загрузка из файлового объекта известной длины (например, временного файла)."""
+        object_cache.invalidate(self.__name_bucket, file_key)
+        result = await self.__client.put_object(self.__name_bucket,
+                                                file_key,
+                                                stream,
+                                                length,
+                                                part_size=10 * 1024 * 1024,
+                                                content_type=content_type)
+        return result
+
+    async def upload_path(self, file_key: str, path: str, content_type: str) -> ObjectWriteResult:
+        """Загрузка локального файла; fput_object читает его частями."""
+        object_cache.invalidate(self.__name_bucket, file_key)
+        return await self.__client.fput_object(self.__name_bucket,
+                                               file_key,
+                                               path,
+                                               content_type=content_type,
+                                               part_size=10 * 1024 * 1024)
+
     async def delete_file(self,
                           file_key: str):
+        object_cache.invalidate(self.__name_bucket, file_key)
         try:
             await self.__client.remove_object(self.__name_bucket, file_key)
         except Exception:
@@ -60,22 +167,78 @@ class FileBucketRepository:
             return None
 
     async def delete_object(self, file_key: str):
+        object_cache.invalidate(self.__name_bucket, file_key)
         try:
             await self.__client.remove_object(self.__name_bucket, file_key)
         except Exception:
             pass
+
+    async def remove_objects(self, file_keys: list[str]) -> list[str]:
+        """
+        Пакетное удаление (DeleteObjects, до 1000 ключей за запрос).
+        Ошибки не глотаются – возвращаются ключи, которые удалить не удалось.
+        """
+        failed = []
+        for offset in range(0, len(file_keys), 1000):
+            batch = file_keys[offset:offset + 1000]
+            for file_key in batch:
+                object_cache.invalidate(self.__name_bucket, file_key)
+            errors = await self.__client.remove_objects(self.__name_bucket,
+                                                        [DeleteObject(file_key) for file_key in batch])
+            failed.extend(error.name for error in errors)
+        return failed
+
+    async def iter_object_pages(self,
+                                prefix: str | None = None,
+                                page_size: int = 1000) -> AsyncIterator[list]:
+        """
+        Постраничный обход бакета. Каждая страница – новый листинг со
+        start_after, поэтому в памяти не копится весь список объектов.
+        """
+        start_after = None
+        while True:
+            page = []
+            async for obj in self.__client.list_objects(self.__name_bucket,
+                                                        prefix,
+                                                        recursive=True,
+                                                        start_after=start_after):
+                if obj is None:
+                    continue
+                page.append(obj)
+                if len(page) >= page_size:
+                    break
+            if not page:
+                return
+            yield page
+            if len(page) < page_size:
+                return
+            start_after = page[-1].object_name
     
-    async def get_file(self, file_key: str) -> bytes:
-        # Отладочный вывод хоста MinIO и ключа файла
-        try:
-            endpoint = getattr(self.__client, "_endpoint_url", None)
-        except Exception:
-            endpoint = None
-        print(f"[MinIO] get_file: endpoint={endpoint} bucket={self.__name_bucket} key={file_key}")
-        async with aiohttp.ClientSession() as session:
-            file = await self.__client.get_object(self.__name_bucket, file_key, session)
-            content = await file.read()
-            return content
+    async def get_file(self, file_key: str, size: int | None = None) -> bytes | bytearray:
+        """Объект целиком; при известном размере крупные объекты качаются по диапазонам."""
+        return await read_object(self.__name_bucket, file_key, size)
+
+    async def get_cached_file(self, file_key: str, info=None) -> bytes | bytearray | None:
+        """
+        Объект из кеша горячих объектов, если ETag совпадает с текущим в MinIO.
+        При промахе небольшой объект скачивается и кладётся в кеш; для объектов
+        больше object_cache_max_item возвращается None – их лучше отдавать потоком.
+        info – результат stat_object, если он уже получен вызывающим.
+        """
+        if info is None:
+            info = await self.get_sate(file_key)
+        if info is None or not object_cache.is_cacheable(info.size):
+            return None
+
+        content = object_cache.get(self.__name_bucket, file_key, info.etag)
+        if content is None:
+            content = await self.get_file(file_key, info.size)
+            object_cache.put(self.__name_bucket, file_key, info.etag, content)
+        return content
+
+    def iter_file(self, file_key: str, chunk_size: int = 1024 * 1024) -> AsyncIterator[bytes]:
+        """Чтение объекта кусками по chunk_size без загрузки целиком в память."""
+        return iter_object(self.__name_bucket, file_key, chunk_size)
 
     async def get_sate(self, file_key: str):
         try:
@@ -84,14 +247,31 @@ class FileBucketRepository:
         except Exception:
             return None
 
+    async def get_presigned_url(self,
+                                file_key: str,
+                                response_headers: dict | None = None,
+                                is_public: bool = True) -> str:
+        """
+        Короткоживущая ссылка на скачивание объекта.
+        is_public – подписать под внешний адрес MinIO (minio_public_url),
+        иначе ссылка подписывается под внутренний адрес (для X-Accel-Redirect).
+        """
+        return await self.__client.presigned_get_object(
+            self.__name_bucket,
+            file_key,
+            expires=timedelta(seconds=settings.download_url_ttl),
+            response_headers=response_headers,
+            change_host=settings.minio_public_url if is_public else None,
+        )
+
     def get_file_stream(self, file_key: str, size: int):
-        offset = 0
-        while True:
-            response = self.__client_download.get_object(self.__name_bucket, file_key, offset=offset, length=2048)
-            yield response.read()
-            offset = offset + 2048
-            if offset >= size:
-                break
+        # Один GET на весь объект из общего пула соединений, читаем по 1 МБ
+        response = self.__client_download.get_object(self.__name_bucket, file_key)
+        try:
+            yield from response.stream(1024 * 1024)
+        finally:
+            response.close()
+            response.release_conn()
 
     async def get_and_save_file(self, file_key: str) -> str:
         exp = file_key.split(".")[-1]
@@ -1,76 +1,316 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update, delete, func, text, literal_column, and_, or_
+from sqlalchemy.dialects.postgresql import JSON, aggregate_order_by
 from fastapi import Depends
+from datetime import datetime, timedelta
+from typing import AsyncIterator
 
-from ..tables import LogMessageError
+from ..tables import LogMessageError, DirectoryEquipment
 from ..database import get_session
 
 
+def escape_like(value: str) -> str:
+    """Экранирование для LIKE: по умолчанию символ экранирования в Postgres – обратная косая черта"""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _search_conditions(
+    uuid_object: str,
+    start: datetime,
+    end: datetime,
+    uuid_equipment: str | None = None,
+    class_log_int: list[int] | None = None,
+    text_query: str | None = None
+) -> list:
+    """Условия поиска логов; границы create_at ограничивают запрос секциями периода"""
+    conditions = [LogMessageError.uuid_object == uuid_object,
+                  LogMessageError.create_at >= start,
+                  LogMessageError.create_at < end]
+    if uuid_equipment is not None:
+        conditions.append(LogMessageError.uuid_equipment == uuid_equipment)
+    if class_log_int:
+        conditions.append(LogMessageError.class_log_int.in_(class_log_int))
+    if text_query:
+        conditions.append(LogMessageError.message.ilike(f"%{escape_like(text_query)}%"))
+    return conditions
+
+
 class LogMessageErrorRepository:
     def __init__(self, session: AsyncSession = Depends(get_session)):
         self.__session: AsyncSession = session
 
     async def get_unprocessed_logs_by_object_and_equipment(
         self, 
-        id_object: int, 
-        id_equipment: int | None = None
+        uuid_object: str, 
+        uuid_equipment: str | None = None,
+        since: datetime | None = None
     ) -> list[LogMessageError]:
-        """Получить необработанные логи для объекта и оборудования"""
+        """
+        Получить необработанные логи для объекта и оборудования.
+        since – нижняя граница create_at: запрос читает только секции с этого месяца
+        """
         query = (
             select(LogMessageError)
-            .where(LogMessageError.id_object == id_object)
+            .where(LogMessageError.uuid_object == uuid_object)
             .where(LogMessageError.is_processed == False)
         )
         
-        if id_equipment is not None:
-            query = query.where(LogMessageError.id_equipment == id_equipment)
+        if since is not None:
+            query = query.where(LogMessageError.create_at >= since)
+        
+        if uuid_equipment is not None:
+            query = query.where(LogMessageError.uuid_equipment == uuid_equipment)
         
         query = query.order_by(LogMessageError.create_at)
         
         result = await self.__session.execute(query)
         return result.scalars().all()
 
-    async def get_unprocessed_logs_by_object_and_equipment_ids(
+    async def get_unprocessed_logs_by_object_and_equipment_uuids(
         self, 
-        id_object: int, 
-        equipment_ids: list[int]
+        uuid_object: str, 
+        equipment_uuids: list[str],
+        since: datetime | None = None
     ) -> list[LogMessageError]:
-        """Получить необработанные логи для объекта и списка оборудования по id_equipment"""
-        if not equipment_ids:
+        """
+        Получить необработанные логи для объекта и списка оборудования по uuid_equipment.
+        since – нижняя граница create_at: запрос читает только секции с этого месяца
+        """
+        if not equipment_uuids:
             return []
         
         query = (
             select(LogMessageError)
-            .where(LogMessageError.id_object == id_object)
+            .where(LogMessageError.uuid_object == uuid_object)
             .where(LogMessageError.is_processed == False)
-            .where(LogMessageError.id_equipment.in_(equipment_ids))
-            .order_by(LogMessageError.create_at)
+            .where(LogMessageError.uuid_equipment.in_(equipment_uuids))
         )
+        if since is not None:
+            query = query.where(LogMessageError.create_at >= since)
+        query = query.order_by(LogMessageError.create_at)
         
         result = await self.__session.execute(query)
         return result.scalars().all()
 
-    async def mark_logs_as_processed(self, log_ids: list[int]):
-        """Пометить логи как обработанные"""
+    async def mark_logs_as_processed(self, log_ids: list[int], since: datetime | None = None):
+        """
+        Пометить логи как обработанные одним UPDATE.
+        since – самый ранний create_at среди логов: UPDATE затрагивает только их секции
+        """
         if not log_ids:
             return
         
         query = (
-            select(LogMessageError)
+            update(LogMessageError)
             .where(LogMessageError.id.in_(log_ids))
+            .values(is_processed=True)
+            .execution_options(synchronize_session=False)
         )
-        result = await self.__session.execute(query)
-        logs = result.scalars().all()
+        if since is not None:
+            query = query.where(LogMessageError.create_at >= since)
         
         try:
-            for log in logs:
-                log.is_processed = True
-                self.__session.add(log)
+            await self.__session.execute(query)
             await self.__session.commit()
         except Exception:
             await self.__session.rollback()
             raise
 
+    async def try_lock_archive(self) -> bool:
+        """Архивирование в каждый момент выполняет один воркер (блокировка до конца транзакции)"""
+        query = select(func.pg_try_advisory_xact_lock(text("hashtext('log_archive')")))
+        result = await self.__session.execute(query)
+        return bool(result.scalar())
+
+    async def get_archive_groups(self, before: datetime):
+        """Объекты и месяцы, в которых есть обработанные логи старше before: uuid_object, month, count"""
+        # Литерал, а не параметр: выражение должно совпасть в SELECT и GROUP BY
+        month = func.date_trunc(literal_column("'month'"), LogMessageError.create_at)
+        query = (
+            select(LogMessageError.uuid_object, month.label("month"), func.count().label("count"))
+            .where(LogMessageError.is_processed == True, LogMessageError.create_at < before)
+            .group_by(LogMessageError.uuid_object, month)
+            .order_by(month)
+        )
+        result = await self.__session.execute(query)
+        return result.all()
+
+    async def stream_processed(
+        self,
+        uuid_object: str | None,
+        start: datetime,
+        end: datetime,
+        after: tuple[datetime, int] | None = None,
+        limit: int = 100000
+    ) -> AsyncIterator:
+        """
+        Обработанные логи объекта с create_at в [start, end) по порядку
+        (create_at, id) – строками, без загрузки выборки в память.
+        after – (create_at, id) последней строки предыдущей выборки
+        """
+        query = (
+            select(*LogMessageError.__table__.columns)
+            .where(LogMessageError.uuid_object == uuid_object,
+                   LogMessageError.is_processed == True,
+                   LogMessageError.create_at >= start,
+                   LogMessageError.create_at < end)
+        )
+        if after is not None:
+            after_create_at, after_id = after
+            query = query.where(or_(LogMessageError.create_at > after_create_at,
+                                    and_(LogMessageError.create_at == after_create_at,
+                                         LogMessageError.id > after_id)))
+        query = (
+            query.order_by(LogMessageError.create_at, LogMessageError.id)
+            .limit(limit)
+            .execution_options(yield_per=1000)
+        )
+        result = await self.__session.stream(query)
+        async for row in result:
+            yield row
+
+    async def commit(self):
+        await self.__session.commit()
+
+    async def delete_processed(self, log_ids: list[int], start: datetime, end: datetime):
+        """
+        Удалить заархивированные логи без commit: пачки одного файла архива
+        фиксируются вместе (commit). Границы create_at ограничивают DELETE их секциями
+        """
+        if not log_ids:
+            return
+        query = (
+            delete(LogMessageError)
+            .where(LogMessageError.id.in_(log_ids),
+                   LogMessageError.is_processed == True,
+                   LogMessageError.create_at >= start,
+                   LogMessageError.create_at < end)
+            .execution_options(synchronize_session=False)
+        )
+        try:
+            await self.__session.execute(query)
+        except Exception:
+            await self.__session.rollback()
+            raise
+
+    async def search(
+        self,
+        uuid_object: str,
+        start: datetime,
+        end: datetime,
+        uuid_equipment: str | None = None,
+        class_log_int: list[int] | None = None,
+        text_query: str | None = None,
+        after: tuple[datetime, int] | None = None,
+        limit: int = 50,
+        facet_limit: int = 100000,
+        facet_size: int = 20
+    ):
+        """
+        Поиск логов одним запросом: items, by_class_log_int, by_equipment, facet_rows.
+
+        items – страница от новых к старым (create_at DESC, id DESC), after –
+        (create_at, id) последней строки предыдущей страницы. Фасеты (число
+        логов по классу и по оборудованию, facet_size самых частых) считаются
+        по первым facet_limit подходящим строкам, facet_rows – сколько строк
+        учтено: время запроса не растёт с числом совпадений.
+        """
+        conditions = _search_conditions(uuid_object, start, end, uuid_equipment, class_log_int, text_query)
+
+        page_conditions = list(conditions)
+        if after is not None:
+            after_create_at, after_id = after
+            page_conditions.append(or_(LogMessageError.create_at < after_create_at,
+                                       and_(LogMessageError.create_at == after_create_at,
+                                            LogMessageError.id < after_id)))
+        page = (
+            select(*LogMessageError.__table__.columns)
+            .where(*page_conditions)
+            .order_by(LogMessageError.create_at.desc(), LogMessageError.id.desc())
+            .limit(limit)
+            .subquery("page")
+        )
+        items = select(func.json_agg(
+            aggregate_order_by(page.table_valued(), page.c.create_at.desc(), page.c.id.desc()),
+            type_=JSON
+        )).scalar_subquery()
+
+        # Выборка для фасетов ограничена и используется трижды – Postgres
+        # материализует её один раз
+        sample = (
+            select(LogMessageError.class_log_int, LogMessageError.uuid_equipment)
+            .where(*conditions)
+            .limit(facet_limit)
+            .cte("sample")
+        )
+        by_class = (
+            select(sample.c.class_log_int, func.count().label("count"))
+            .group_by(sample.c.class_log_int)
+            .subquery("by_class")
+        )
+        by_class_log_int = select(func.json_object_agg(
+            by_class.c.class_log_int, by_class.c.count, type_=JSON
+        )).scalar_subquery()
+        by_equipment_rows = (
+            select(sample.c.uuid_equipment, DirectoryEquipment.name, func.count().label("count"))
+            .outerjoin(DirectoryEquipment, DirectoryEquipment.uuid == sample.c.uuid_equipment)
+            .group_by(sample.c.uuid_equipment, DirectoryEquipment.name)
+            .order_by(func.count().desc())
+            .limit(facet_size)
+            .subquery("by_equipment")
+        )
+        by_equipment = select(func.json_agg(
+            aggregate_order_by(by_equipment_rows.table_valued(), by_equipment_rows.c.count.desc()),
+            type_=JSON
+        )).scalar_subquery()
+        facet_rows = select(func.count()).select_from(sample).scalar_subquery()
+
+        query = select(items.label("items"),
+                       by_class_log_int.label("by_class_log_int"),
+                       by_equipment.label("by_equipment"),
+                       facet_rows.label("facet_rows"))
+        result = await self.__session.execute(query)
+        return result.one()
+
+    async def get_rates(
+        self,
+        uuid_object: str,
+        start: datetime,
+        end: datetime,
+        bucket: timedelta,
+        uuid_equipment: str | None = None
+    ):
+        """
+        Число логов объекта с create_at в [start, end) по интервалам bucket
+        (date_bin от start), оборудованию и классу: bucket, uuid_equipment,
+        equipment_name, class_log_int, count. Пустые интервалы не возвращаются
+        """
+        conditions = _search_conditions(uuid_object, start, end, uuid_equipment)
+        # Интервал считается во вложенном запросе: параметры date_bin в SELECT
+        # и GROUP BY одного запроса Postgres не считает одним выражением
+        binned = (
+            select(func.date_bin(bucket, LogMessageError.create_at, start).label("bucket"),
+                   LogMessageError.uuid_equipment,
+                   LogMessageError.class_log_int)
+            .where(*conditions)
+            .subquery("binned")
+        )
+        counts = (
+            select(binned.c.bucket, binned.c.uuid_equipment, binned.c.class_log_int, func.count().label("count"))
+            .group_by(binned.c.bucket, binned.c.uuid_equipment, binned.c.class_log_int)
+            .subquery("counts")
+        )
+        query = (
+            select(counts.c.bucket,
+                   counts.c.uuid_equipment,
+                   DirectoryEquipment.name.label("equipment_name"),
+                   counts.c.class_log_int,
+                   counts.c.count)
+            .outerjoin(DirectoryEquipment, DirectoryEquipment.uuid == counts.c.uuid_equipment)
+        )
+        result = await self.__session.execute(query)
+        return result.all()
+
     async def add(self, entity: LogMessageError):
         try:
             self.__session.add(entity)
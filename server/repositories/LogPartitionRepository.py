@@ -0,0 +1,80 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, text
+
+from fastapi import Depends
+
+from ..database import get_session
+
+from datetime import date
+
+
+class LogPartitionRepository:
+    """DDL помесячных секций log_messages_error."""
+
+    def __init__(self, session: AsyncSession = Depends(get_session)):
+        self.__session: AsyncSession = session
+
+    async def commit(self):
+        await self.__session.commit()
+
+    async def try_lock(self) -> bool:
+        """Обслуживание секций в каждый момент выполняет один воркер (блокировка до конца транзакции)."""
+        response = select(func.pg_try_advisory_xact_lock(text("hashtext('log_partitions')")))
+        result = await self.__session.execute(response)
+        return bool(result.scalar())
+
+    async def get_partitions(self) -> list[str]:
+        """Имена секций, присоединённых к log_messages_error."""
+        response = text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'log_messages_error'::regclass"
+        )
+        result = await self.__session.execute(response)
+        return [row[0] for row in result]
+
+    async def get_detached(self, prefix: str) -> list[str]:
+        """Отсоединённые секции: таблицы с именем секции, не входящие в log_messages_error."""
+        response = text(
+            "SELECT c.relname FROM pg_class c "
+            "JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "WHERE n.nspname = current_schema() AND c.relkind = 'r' AND c.relname LIKE :pattern "
+            "AND NOT c.relispartition"
+        )
+        result = await self.__session.execute(response, {"pattern": f"{prefix}%"})
+        return [row[0] for row in result]
+
+    def savepoint(self):
+        """Вложенная транзакция: ошибка DDL одной секции не отменяет остальные"""
+        return self.__session.begin_nested()
+
+    async def create_partition(self, name: str, start: date, end: date, default: str | None = None) -> int:
+        """
+        Секция [start, end). Строки этого диапазона, уже попавшие в секцию по
+        умолчанию default (например, с убежавшими вперёд часами устройства),
+        переносятся в новую таблицу до присоединения – иначе Postgres не даст
+        создать секцию. Возвращает число перенесённых строк
+        """
+        await self.__session.execute(text(
+            f'CREATE TABLE IF NOT EXISTS "{name}" '
+            f"(LIKE log_messages_error INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        ))
+        moved = 0
+        if default is not None:
+            result = await self.__session.execute(text(
+                f'WITH moved AS (DELETE FROM "{default}" '
+                f"WHERE create_at >= :start AND create_at < :end RETURNING *) "
+                f'INSERT INTO "{name}" SELECT * FROM moved'
+            ), {"start": start, "end": end})
+            moved = result.rowcount
+        await self.__session.execute(text(
+            f'ALTER TABLE log_messages_error ATTACH PARTITION "{name}" '
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        ))
+        return moved
+
+    async def detach_partition(self, name: str):
+        await self.__session.execute(text(f'ALTER TABLE log_messages_error DETACH PARTITION "{name}"'))
+
+    async def drop_table(self, name: str):
+        await self.__session.execute(text(f'DROP TABLE IF EXISTS "{name}"'))
@@ -6,8 +6,11 @@ from fastapi.security import OAuth2PasswordBearer
 from httpx import AsyncClient
 
 from ..models.Object import GetObject, PostObject, UpdateObject
+from ..models.Equipment import GetEquipment
 from ..response import get_client
 from ..settings import settings
+from ..equipment_index import equipment_index
+from ..directory import directory_mirror
 
 
 oauth2_scheme = OAuth2PasswordBearer(
@@ -35,9 +38,12 @@ class ObjectRepository:
 
     async def count_row(self) -> int:
         """
-        Возвращает количество объектов.
-        Реализовано через получение полного списка (предполагается умеренный размер справочника).
+        Возвращает количество объектов: из зеркала справочника, если оно
+        синхронизируется, иначе через получение полного списка.
         """
+        count = await directory_mirror.count_objects()
+        if count is not None:
+            return count
         objects = await self.get_all_object(filter_user=None)
         return len(objects)
 
@@ -79,8 +85,9 @@ class ObjectRepository:
         if resp.status_code == status.HTTP_404_NOT_FOUND:
             return []
         resp.raise_for_status()
-        data = resp.json()
-        return [GetObject.model_validate(item) for item in data]
+        objects = [GetObject.model_validate(item) for item in resp.json()]
+        await directory_mirror.put_objects(objects)
+        return objects
 
     async def add(self, obj: PostObject) -> None:
         """
@@ -99,14 +106,20 @@ class ObjectRepository:
         resp.raise_for_status()
 
     async def get_by_uuid(self, uuid: str) -> GetObject | None:
+        """Объект из зеркала справочника; при промахе – из микросервиса с записью в зеркало."""
+        cached = await directory_mirror.get_objects([uuid])
+        if uuid in cached:
+            return cached[uuid]
         try:
             resp = await self._client.get(
                 f"{self._base_url}/v1/object/one/{uuid}",
                 headers=self._auth_headers(),
             )
         except (httpx.ConnectError, httpx.RequestError):
-            # Микросервис недоступен (хост не резолвится, таймаут и т.д.) — возвращаем None
-            return None
+            # Микросервис недоступен (хост не резолвится, таймаут и т.д.) —
+            # отдаём устаревшую запись зеркала, если она есть
+            stale = await directory_mirror.get_objects([uuid], any_age=True)
+            return stale.get(uuid)
         if resp.status_code == status.HTTP_401_UNAUTHORIZED:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -115,7 +128,9 @@ class ObjectRepository:
         if resp.status_code == status.HTTP_404_NOT_FOUND:
             return None
         resp.raise_for_status()
-        return GetObject.model_validate(resp.json())
+        obj = GetObject.model_validate(resp.json())
+        await directory_mirror.put_objects([obj])
+        return obj
 
     async def update(self, uuid: str, entity: UpdateObject) -> None:
         resp = await self._client.put(
@@ -129,12 +144,14 @@ class ObjectRepository:
                 detail="Unauthorized in object-equipment service",
             )
         resp.raise_for_status()
+        await directory_mirror.remove_object(uuid)
 
     async def delete(self, uuid_entity: str) -> None:
         resp = await self._client.delete(
             f"{self._base_url}/v1/object/{uuid_entity}",
             headers=self._auth_headers(),
         )
+        await directory_mirror.remove_object(uuid_entity)
         if resp.status_code == status.HTTP_401_UNAUTHORIZED:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -217,36 +234,37 @@ class ObjectRepository:
         objects = await self.get_all_object(filter_user=uuid_user)
         return objects or None
 
+    async def get_equipment_uuids(self, uuid_object: str) -> list[str]:
+        """UUID оборудования объекта (для обратного индекса equipment_index)."""
+        cached = await directory_mirror.get_object_equipment(uuid_object)
+        if cached is not None:
+            return [str(e.uuid) for e in cached]
+        resp = await self._client.get(
+            f"{self._base_url}/v1/object/{uuid_object}/equipment/list",
+            headers=self._auth_headers(),
+        )
+        if resp.status_code == status.HTTP_401_UNAUTHORIZED:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Unauthorized in object-equipment service",
+            )
+        if resp.status_code == status.HTTP_404_NOT_FOUND:
+            return []
+        resp.raise_for_status()
+        equipment_list = [GetEquipment.model_validate(item) for item in resp.json()]
+        await directory_mirror.put_object_equipment(uuid_object, equipment_list)
+        return [str(e.uuid) for e in equipment_list]
+
     async def get_object_by_uuid_equipment(self, uuid_user: str, uuid_equipment: str) -> GetObject | None:
         """
-        Приближённый аналог старой логики:
-        - получаем все объекты пользователя
-        - для каждого объекта загружаем его оборудование и ищем uuid_equipment.
+        Объект пользователя, которому принадлежит оборудование.
+        Поиск идёт по обратному индексу equipment_index; списки оборудования
+        загружаются параллельно и только для объектов, которых нет в индексе.
         """
-        from ..models.Equipment import GetEquipment  # локальный импорт, чтобы избежать циклов
-
-        # Получаем объекты, доступные пользователю
         objects = await self.get_object_by_user_uuid(uuid_user)
         if not objects:
             return None
 
-        # Для каждого объекта проверяем наличие оборудования
-        for obj in objects:
-            resp = await self._client.get(
-                f"{self._base_url}/v1/object/{obj.uuid}/equipment/list",
-                headers=self._auth_headers(),
-            )
-            if resp.status_code == status.HTTP_401_UNAUTHORIZED:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Unauthorized in object-equipment service",
-                )
-            if resp.status_code == status.HTTP_404_NOT_FOUND:
-                continue
-            resp.raise_for_status()
-            data = resp.json()
-            equipment_list = [GetEquipment.model_validate(item) for item in data]
-            if any(str(e.uuid) == uuid_equipment for e in equipment_list):
-                return obj
-
-        return None
\ No newline at end of file
+        by_uuid = {str(obj.uuid): obj for obj in objects}
+        uuid_object = await equipment_index.find(uuid_equipment, by_uuid, self.get_equipment_uuids)
+        return by_uuid.get(uuid_object) if uuid_object is not None else None
@@ -0,0 +1,64 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, func
+
+from fastapi import Depends
+
+from ..tables import EmailOutbox
+from ..database import get_session
+
+from datetime import datetime
+
+
+class OutboxRepository:
+    def __init__(self, session: AsyncSession = Depends(get_session)):
+        self.__session: AsyncSession = session
+
+    def stage(self, entities: list[EmailOutbox]):
+        """Письма попадают в базу вместе с ближайшим commit вызывающего кода."""
+        self.__session.add_all(entities)
+
+    async def claim_batch(self, limit: int) -> list[EmailOutbox]:
+        """
+        Очередная пачка писем к отправке. Строки блокируются до commit,
+        SKIP LOCKED позволяет нескольким воркерам разбирать очередь параллельно.
+        """
+        response = (select(EmailOutbox)
+                    .where(EmailOutbox.state == "pending",
+                           EmailOutbox.next_attempt_at <= func.now())
+                    .order_by(EmailOutbox.next_attempt_at)
+                    .limit(limit)
+                    .with_for_update(skip_locked=True))
+        result = await self.__session.execute(response)
+        return list(result.scalars().all())
+
+    async def get_digest_groups(self) -> list[tuple[str, str, str, datetime]]:
+        """Накопленные события дайджестов: (получатель, контекст, шаблон, время самого старого)."""
+        response = (select(EmailOutbox.to_email,
+                           EmailOutbox.context,
+                           EmailOutbox.template_name,
+                           func.min(EmailOutbox.datetime))
+                    .where(EmailOutbox.state == "digest")
+                    .group_by(EmailOutbox.to_email, EmailOutbox.context, EmailOutbox.template_name))
+        result = await self.__session.execute(response)
+        return [tuple(row) for row in result.all()]
+
+    async def claim_digest(self, to_email: str, context: str, template_name: str) -> list[EmailOutbox]:
+        response = (select(EmailOutbox)
+                    .where(EmailOutbox.state == "digest",
+                           EmailOutbox.to_email == to_email,
+                           EmailOutbox.context == context,
+                           EmailOutbox.template_name == template_name)
+                    .order_by(EmailOutbox.datetime, EmailOutbox.id)
+                    .with_for_update(skip_locked=True))
+        result = await self.__session.execute(response)
+        return list(result.scalars().all())
+
+    async def delete_by_ids(self, ids: list[int]):
+        await self.__session.execute(delete(EmailOutbox).where(EmailOutbox.id.in_(ids)))
+
+    async def commit(self):
+        try:
+            await self.__session.commit()
+        except Exception:
+            await self.__session.rollback()
+            raise
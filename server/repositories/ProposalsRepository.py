@@ -82,6 +82,11 @@ class ProposalsRepository:
             await self.__session.rollback()
             raise Exception
 
+    async def refresh(self, entity: TechnicalProposals):
+        """Записать изменения без commit и перечитать сущность со связями"""
+        await self.__session.flush()
+        await self.__session.refresh(entity)
+
     async def get_by_uuid(self, uuid_entity: str) -> TechnicalProposals | None:
         response = select(TechnicalProposals).where(TechnicalProposals.uuid == uuid_entity)
         result = await self.__session.execute(response)
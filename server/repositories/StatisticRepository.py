@@ -16,6 +16,8 @@ from ..tables import (
     SignsAccident,
     EquipmentToAccident,
     SignsAccidentToAccident,
+    DirectoryObject,
+    DirectoryEquipment,
 )
 from ..database import get_session
 from .UserRepository import UserRepository
@@ -61,15 +63,16 @@ class StatisticRepository:
         query = (
             select(
                 Accident.uuid_object.label("object_uuid"),
-                # object_name временно заполняем UUID объекта
-                Accident.uuid_object.label("object_name"),
+                # Имя объекта – из локального зеркала справочника (NULL, если объект ещё не загружен)
+                DirectoryObject.name.label("object_name"),
                 func.count(Claim.id).label('claim_count')
             )
             .select_from(Claim)
             .join(Accident, Claim.id_accident == Accident.id)
+            .outerjoin(DirectoryObject, DirectoryObject.uuid == Accident.uuid_object)
             .join(StateClaim, Claim.id_state_claim == StateClaim.id)
             .where(and_(*conditions))
-            .group_by(Accident.uuid_object)
+            .group_by(Accident.uuid_object, DirectoryObject.name)
         )
 
         # Применяем сортировку
@@ -80,9 +83,9 @@ class StatisticRepository:
                 query = query.order_by(desc(func.count(Claim.id)))
         elif sort_by == "object_name":
             if sort_order == "asc":
-                query = query.order_by(asc(Accident.uuid_object))
+                query = query.order_by(asc(DirectoryObject.name), asc(Accident.uuid_object))
             else:
-                query = query.order_by(desc(Accident.uuid_object))
+                query = query.order_by(desc(DirectoryObject.name), desc(Accident.uuid_object))
 
         result = await self.__session.execute(query)
         return result.fetchall()
@@ -119,16 +122,18 @@ class StatisticRepository:
             select(
                 month_expr.label("month"),
                 Accident.uuid_object.label("object_uuid"),
-                Accident.uuid_object.label("object_name"),
+                DirectoryObject.name.label("object_name"),
                 func.count(Claim.id).label('claim_count')
             )
             .select_from(Claim)
             .join(Accident, Claim.id_accident == Accident.id)
+            .outerjoin(DirectoryObject, DirectoryObject.uuid == Accident.uuid_object)
             .join(StateClaim, Claim.id_state_claim == StateClaim.id)
             .where(and_(*conditions))
             .group_by(
                 month_expr,
                 Accident.uuid_object,
+                DirectoryObject.name,
             )
         )
 
@@ -142,9 +147,9 @@ class StatisticRepository:
                 order_clauses.append(desc(func.count(Claim.id)))
         elif sort_by == "object_name":
             if sort_order == "asc":
-                order_clauses.append(asc(Accident.uuid_object))
+                order_clauses.extend([asc(DirectoryObject.name), asc(Accident.uuid_object)])
             else:
-                order_clauses.append(desc(Accident.uuid_object))
+                order_clauses.extend([desc(DirectoryObject.name), desc(Accident.uuid_object)])
         
         query = query.order_by(*order_clauses)
 
@@ -175,7 +180,7 @@ class StatisticRepository:
         query = (
             select(
                 Accident.uuid_object.label("object_uuid"),
-                Accident.uuid_object.label("object_name"),
+                DirectoryObject.name.label("object_name"),
                 ClassBrake.id.label("class_brake_id"),
                 ClassBrake.description.label("class_brake_name"),
                 ClassBrake.description.label("class_brake_description"),
@@ -183,6 +188,7 @@ class StatisticRepository:
             )
             .select_from(Claim)
             .join(Accident, Claim.id_accident == Accident.id)
+            .outerjoin(DirectoryObject, DirectoryObject.uuid == Accident.uuid_object)
             .join(StateClaim, Claim.id_state_claim == StateClaim.id)
             .join(TypeBrakeToAccident, Accident.id == TypeBrakeToAccident.id_accident)
             .join(TypeBrake, TypeBrake.id == TypeBrakeToAccident.id_type_brake)
@@ -190,6 +196,7 @@ class StatisticRepository:
             .where(and_(*conditions))
             .group_by(
                 Accident.uuid_object,
+                DirectoryObject.name,
                 ClassBrake.id,
                 ClassBrake.name,
             )
@@ -203,9 +210,9 @@ class StatisticRepository:
                 query = query.order_by(desc(func.count(Claim.id)))
         elif sort_by == "object_name":
             if sort_order == "asc":
-                query = query.order_by(asc(Accident.uuid_object))
+                query = query.order_by(asc(DirectoryObject.name), asc(Accident.uuid_object))
             else:
-                query = query.order_by(desc(Accident.uuid_object))
+                query = query.order_by(desc(DirectoryObject.name), desc(Accident.uuid_object))
 
         result = await self.__session.execute(query)
         return result.fetchall()
@@ -234,7 +241,7 @@ class StatisticRepository:
         query = (
             select(
                 Accident.uuid_object.label("object_uuid"),
-                Accident.uuid_object.label("object_name"),
+                DirectoryObject.name.label("object_name"),
                 TypeBrake.id.label("type_brake_id"),
                 TypeBrake.name.label("type_brake_name"),
                 ClassBrake.id.label("class_brake_id"),
@@ -243,6 +250,7 @@ class StatisticRepository:
             )
             .select_from(Claim)
             .join(Accident, Claim.id_accident == Accident.id)
+            .outerjoin(DirectoryObject, DirectoryObject.uuid == Accident.uuid_object)
             .join(StateClaim, Claim.id_state_claim == StateClaim.id)
             .join(TypeBrakeToAccident, Accident.id == TypeBrakeToAccident.id_accident)
             .join(TypeBrake, TypeBrake.id == TypeBrakeToAccident.id_type_brake)
@@ -250,6 +258,7 @@ class StatisticRepository:
             .where(and_(*conditions))
             .group_by(
                 Accident.uuid_object,
+                DirectoryObject.name,
                 TypeBrake.id,
                 TypeBrake.name,
                 ClassBrake.id,
@@ -265,9 +274,9 @@ class StatisticRepository:
                 query = query.order_by(desc(func.count(Claim.id)))
         elif sort_by == "object_name":
             if sort_order == "asc":
-                query = query.order_by(asc(Accident.uuid_object))
+                query = query.order_by(asc(DirectoryObject.name), asc(Accident.uuid_object))
             else:
-                query = query.order_by(desc(Accident.uuid_object))
+                query = query.order_by(desc(DirectoryObject.name), desc(Accident.uuid_object))
 
         result = await self.__session.execute(query)
         return result.fetchall()
@@ -300,7 +309,7 @@ class StatisticRepository:
             select(
                 month_expr.label("month"),
                 Accident.uuid_object.label("object_uuid"),
-                Accident.uuid_object.label("object_name"),
+                DirectoryObject.name.label("object_name"),
                 ClassBrake.id.label("class_brake_id"),
                 ClassBrake.description.label("class_brake_name"),
                 ClassBrake.description.label("class_brake_description"),
@@ -308,6 +317,7 @@ class StatisticRepository:
             )
             .select_from(Claim)
             .join(Accident, Claim.id_accident == Accident.id)
+            .outerjoin(DirectoryObject, DirectoryObject.uuid == Accident.uuid_object)
             .join(StateClaim, Claim.id_state_claim == StateClaim.id)
             .join(TypeBrakeToAccident, Accident.id == TypeBrakeToAccident.id_accident)
             .join(TypeBrake, TypeBrake.id == TypeBrakeToAccident.id_type_brake)
@@ -316,6 +326,7 @@ class StatisticRepository:
             .group_by(
                 month_expr,
                 Accident.uuid_object,
+                DirectoryObject.name,
                 ClassBrake.id,
                 ClassBrake.name,
             )
@@ -330,9 +341,9 @@ class StatisticRepository:
                 order_clauses.append(desc(func.count(Claim.id)))
         elif sort_by == "object_name":
             if sort_order == "asc":
-                order_clauses.append(asc(Accident.uuid_object))
+                order_clauses.extend([asc(DirectoryObject.name), asc(Accident.uuid_object)])
             else:
-                order_clauses.append(desc(Accident.uuid_object))
+                order_clauses.extend([desc(DirectoryObject.name), desc(Accident.uuid_object)])
 
         query = query.order_by(*order_clauses)
 
@@ -374,8 +385,8 @@ class StatisticRepository:
                 Accident.damaged_equipment_material.label("accident_damaged_equipment"),
                 Accident.additional_material.label("accident_additional_material"),
                 Accident.is_delite.label("accident_is_deleted"),
-                # Имя объекта теперь недоступно из локной БД, временно используем uuid_object
-                Accident.uuid_object.label("object_name"),
+                Accident.uuid_object.label("object_uuid"),
+                DirectoryObject.name.label("object_name"),
                 # TypeBrake поля (исключаем: id)
                 TypeBrake.code.label("type_brake_code"),
                 TypeBrake.name.label("type_brake_name"),
@@ -384,6 +395,7 @@ class StatisticRepository:
             )
             .select_from(Claim)
             .join(Accident, Claim.id_accident == Accident.id)
+            .outerjoin(DirectoryObject, DirectoryObject.uuid == Accident.uuid_object)
             .join(StateClaim, Claim.id_state_claim == StateClaim.id)
             .join(TypeBrakeToAccident, Accident.id == TypeBrakeToAccident.id_accident)
             .join(TypeBrake, TypeBrake.id == TypeBrakeToAccident.id_type_brake)
@@ -426,6 +438,7 @@ class StatisticRepository:
                     accident_damaged_equipment=row.accident_damaged_equipment,
                     accident_additional_material=row.accident_additional_material,
                     accident_is_deleted=row.accident_is_deleted,
+                    object_uuid=row.object_uuid,
                     object_name=row.object_name,
                     type_brake_code=row.type_brake_code,
                     type_brake_name=row.type_brake_name,
@@ -436,14 +449,16 @@ class StatisticRepository:
         return enriched_rows
 
     async def get_accident_equipment(self, accident_id: int):
-        """Получение списка оборудования для аварии"""
+        """Получение списка оборудования для аварии (имя из зеркала справочника или UUID)"""
         query = (
-            select(EquipmentToAccident.uuid_equipment.label("equipment_uuid"))
+            select(EquipmentToAccident.uuid_equipment.label("equipment_uuid"),
+                   DirectoryEquipment.name.label("equipment_name"))
             .select_from(EquipmentToAccident)
+            .outerjoin(DirectoryEquipment, DirectoryEquipment.uuid == EquipmentToAccident.uuid_equipment)
             .where(EquipmentToAccident.id_accident == accident_id)
         )
         result = await self.__session.execute(query)
-        return [str(row.equipment_uuid) for row in result.fetchall()]
+        return [row.equipment_name or str(row.equipment_uuid) for row in result.fetchall()]
 
     async def get_accident_signs(self, accident_id: int):
         """Получение списка признаков для аварии"""
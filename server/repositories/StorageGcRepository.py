@@ -0,0 +1,79 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, delete, union, exists, cast, String
+
+from fastapi import Depends
+
+from ..tables import Claim, FileDocument, Accident, Blob, BlobSlot
+from ..database import get_session
+
+from collections import Counter
+from datetime import datetime
+from uuid import UUID
+
+
+class StorageGcRepository:
+    """
+    Запросы сборщика мусора хранилища. Методы не делают commit: сборщик
+    фиксирует или откатывает (пробный прогон) всю транзакцию сам.
+    """
+
+    def __init__(self, session: AsyncSession = Depends(get_session)):
+        self.__session: AsyncSession = session
+
+    async def commit(self):
+        await self.__session.commit()
+
+    async def rollback(self):
+        await self.__session.rollback()
+
+    async def delete_orphan_slots(self) -> int:
+        """Слоты, владельца которых уже нет; счётчики ссылок blob уменьшаются."""
+        owners = {
+            "claim": exists().where(cast(Claim.uuid, String) == BlobSlot.owner_id),
+            "accident": exists().where(cast(Accident.uuid, String) == BlobSlot.owner_id),
+            "blueprint": exists().where(cast(FileDocument.id, String) == BlobSlot.owner_id),
+        }
+        released = Counter()
+        for owner_type, owner_exists in owners.items():
+            response = (delete(BlobSlot)
+                        .where(BlobSlot.owner_type == owner_type, ~owner_exists)
+                        .returning(BlobSlot.id_blob))
+            result = await self.__session.execute(response)
+            released.update(result.scalars().all())
+
+        for id_blob, count in released.items():
+            await self.__session.execute(update(Blob)
+                                         .where(Blob.id == id_blob)
+                                         .values(ref_count=Blob.ref_count - count))
+        return sum(released.values())
+
+    async def delete_unreferenced_blobs(self, older_than: datetime) -> int:
+        """
+        Строки blob без ссылок (загрузка оборвалась между записью blob и слота).
+        Сам объект после этого перестаёт упоминаться в базе и удаляется
+        при обходе бакета.
+        """
+        response = (delete(Blob)
+                    .where(Blob.ref_count <= 0,
+                           Blob.datetime < older_than,
+                           ~exists().where(BlobSlot.id_blob == Blob.id))
+                    .returning(Blob.id))
+        result = await self.__session.execute(response)
+        return len(result.scalars().all())
+
+    async def get_referenced_keys(self, file_keys: list[str]) -> set[str]:
+        """Какие из ключей страницы листинга упоминаются в базе – одним запросом."""
+        response = union(
+            select(Claim.main_document).where(Claim.main_document.in_(file_keys)),
+            select(Claim.edit_document).where(Claim.edit_document.in_(file_keys)),
+            select(FileDocument.file_name).where(FileDocument.file_name.in_(file_keys)),
+            select(Accident.additional_material).where(Accident.additional_material.in_(file_keys)),
+            select(Blob.file_key).where(Blob.file_key.in_(file_keys)),
+        )
+        result = await self.__session.execute(response)
+        return set(result.scalars().all())
+
+    async def get_existing_accidents(self, uuids: list[UUID]) -> set[UUID]:
+        response = select(Accident.uuid).where(Accident.uuid.in_(uuids))
+        result = await self.__session.execute(response)
+        return set(result.scalars().all())
@@ -1,57 +1,98 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete, and_, func, extract
+from sqlalchemy import select, delete, and_, or_, func, cast, literal_column, Date
+from sqlalchemy.dialects.postgresql import insert
 from fastapi import Depends
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from typing import Optional
 
-from ..tables import Summarize
+from ..tables import Summarize, SummarizeRollup, DirectoryEquipment
 from ..database import get_session
 
 
+# Ключи metadata_equipment, которые список сводок отдаёт как теги
+TAG_KEYS = ("most_frequent_errors", "problematic_nodes", "recurring_issues")
+
+
+def _period_conditions(start_date: Optional[datetime], end_date: Optional[datetime]) -> list:
+    conditions = []
+    if start_date is not None:
+        conditions.append(Summarize.datetime_start >= start_date)
+    if end_date is not None:
+        # Используем конец дня для включения всей конечной даты
+        if isinstance(end_date, datetime):
+            end_date_with_time = datetime.combine(end_date.date(), datetime.max.time().replace(microsecond=999999))
+        else:
+            end_date_with_time = datetime.combine(end_date, datetime.max.time().replace(microsecond=999999))
+        conditions.append(Summarize.datetime_start <= end_date_with_time)
+    return conditions
+
+
 class SummarizeRepository:
     def __init__(self, session: AsyncSession = Depends(get_session)):
         self.__session: AsyncSession = session
 
-    async def get_by_object_and_equipment_and_month(
-        self, 
-        id_object: int, 
-        id_equipment: int
+    async def get_by_month(
+        self,
+        uuid_object: str,
+        uuid_equipment: str,
+        month: date
     ) -> Summarize | None:
-        """Получить Summarize для объекта и оборудования для текущего месяца"""
-        now = datetime.now()
-        current_year = now.year
-        current_month = now.month
-        
+        """Получить Summarize объекта и оборудования за месяц (month – первое число месяца)"""
         query = (
             select(Summarize)
-            .where(Summarize.id_object == id_object)
-            .where(Summarize.id_equipment == id_equipment)
-            .where(extract('year', Summarize.datetime_start) == current_year)
-            .where(extract('month', Summarize.datetime_start) == current_month)
-            .order_by(Summarize.datetime_start.desc())
-            .limit(1)
+            .where(Summarize.uuid_object == uuid_object)
+            .where(Summarize.uuid_equipment == uuid_equipment)
+            .where(Summarize.month == month)
         )
         result = await self.__session.execute(query)
         return result.scalars().first()
 
+    async def upsert_month(
+        self,
+        uuid_object: str,
+        uuid_equipment: str,
+        month: date,
+        text: str,
+        metadata_equipment: dict,
+        datetime_end: datetime
+    ) -> Summarize:
+        """
+        Создать или обновить Summarize за месяц одним INSERT ... ON CONFLICT:
+        параллельные анализы одного оборудования не создают дублей
+        """
+        query = insert(Summarize).values(
+            uuid_object=uuid_object,
+            uuid_equipment=uuid_equipment,
+            month=month,
+            text=text,
+            metadata_equipment=metadata_equipment,
+            datetime_start=datetime(month.year, month.month, 1),
+            datetime_end=datetime_end,
+        )
+        query = query.on_conflict_do_update(
+            index_elements=[Summarize.uuid_object, Summarize.uuid_equipment, Summarize.month],
+            set_={"text": query.excluded.text,
+                  "metadata_equipment": query.excluded.metadata_equipment,
+                  "datetime_end": query.excluded.datetime_end},
+        ).returning(Summarize)
+        try:
+            # populate_existing: сводка могла быть прочитана в этой сессии до обновления
+            result = await self.__session.execute(query, execution_options={"populate_existing": True})
+            entity = result.scalars().one()
+            await self.__session.commit()
+            return entity
+        except:
+            await self.__session.rollback()
+            raise Exception
+
     async def get_by_object(
         self,
-        id_object: int,
+        uuid_object: str,
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None
     ) -> list[Summarize]:
         """Получить все Summarize для объекта с фильтрацией по датам"""
-        conditions = [Summarize.id_object == id_object]
-        
-        if start_date is not None:
-            conditions.append(Summarize.datetime_start >= start_date)
-        if end_date is not None:
-            # Используем конец дня для включения всей конечной даты
-            if isinstance(end_date, datetime):
-                end_date_with_time = datetime.combine(end_date.date(), datetime.max.time().replace(microsecond=999999))
-            else:
-                end_date_with_time = datetime.combine(end_date, datetime.max.time().replace(microsecond=999999))
-            conditions.append(Summarize.datetime_start <= end_date_with_time)
+        conditions = [Summarize.uuid_object == uuid_object, *_period_conditions(start_date, end_date)]
         
         query = (
             select(Summarize)
@@ -63,27 +104,18 @@ class SummarizeRepository:
 
     async def get_by_object_and_equipment(
         self,
-        id_object: int,
-        id_equipment: int,
+        uuid_object: str,
+        uuid_equipment: str,
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None
     ) -> list[Summarize]:
         """Получить все Summarize для объекта и оборудования с фильтрацией по датам"""
         conditions = [
-            Summarize.id_object == id_object,
-            Summarize.id_equipment == id_equipment
+            Summarize.uuid_object == uuid_object,
+            Summarize.uuid_equipment == uuid_equipment,
+            *_period_conditions(start_date, end_date)
         ]
         
-        if start_date is not None:
-            conditions.append(Summarize.datetime_start >= start_date)
-        if end_date is not None:
-            # Используем конец дня для включения всей конечной даты
-            if isinstance(end_date, datetime):
-                end_date_with_time = datetime.combine(end_date.date(), datetime.max.time().replace(microsecond=999999))
-            else:
-                end_date_with_time = datetime.combine(end_date, datetime.max.time().replace(microsecond=999999))
-            conditions.append(Summarize.datetime_start <= end_date_with_time)
-        
         query = (
             select(Summarize)
             .where(and_(*conditions))
@@ -92,6 +124,202 @@ class SummarizeRepository:
         result = await self.__session.execute(query)
         return result.scalars().all()
 
+    async def get_page_by_object(
+        self,
+        uuid_object: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        after: Optional[tuple[datetime, int]] = None,
+        limit: int = 50
+    ):
+        """
+        Страница списка Summarize объекта без text и полного metadata_equipment:
+        даты, оборудование (имя из зеркала справочника) и теги TAG_KEYS.
+        after – (datetime_start, id) последней строки предыдущей страницы.
+        """
+        conditions = [Summarize.uuid_object == uuid_object, *_period_conditions(start_date, end_date)]
+        if after is not None:
+            after_start, after_id = after
+            conditions.append(or_(Summarize.datetime_start < after_start,
+                                  and_(Summarize.datetime_start == after_start, Summarize.id < after_id)))
+
+        query = (
+            select(Summarize.id,
+                   Summarize.uuid,
+                   Summarize.uuid_object,
+                   Summarize.uuid_equipment,
+                   Summarize.datetime_start,
+                   Summarize.datetime_end,
+                   DirectoryEquipment.name.label("equipment_name"),
+                   *[Summarize.metadata_equipment[key].label(key) for key in TAG_KEYS])
+            .outerjoin(DirectoryEquipment, DirectoryEquipment.uuid == Summarize.uuid_equipment)
+            .where(and_(*conditions))
+            .order_by(Summarize.datetime_start.desc(), Summarize.id.desc())
+            .limit(limit)
+        )
+        result = await self.__session.execute(query)
+        return result.all()
+
+    async def get_version(self, uuid: str):
+        """id и datetime_end Summarize – по ним строится ETag без чтения text"""
+        query = select(Summarize.id, Summarize.datetime_end).where(Summarize.uuid == uuid)
+        result = await self.__session.execute(query)
+        return result.first()
+
+    async def get_by_uuid(self, uuid: str) -> Summarize | None:
+        result = await self.__session.execute(select(Summarize).where(Summarize.uuid == uuid))
+        return result.scalars().first()
+
+    async def __stale_rollups(self, source, period: str):
+        """Периоды source, для которых свёртки нет или источники изменились позже неё"""
+        query = (
+            select(source)
+            .outerjoin(SummarizeRollup, and_(SummarizeRollup.uuid_object == source.c.uuid_object,
+                                             SummarizeRollup.uuid_equipment == source.c.uuid_equipment,
+                                             SummarizeRollup.period == period,
+                                             SummarizeRollup.period_start == source.c.period_start))
+            .where(or_(SummarizeRollup.id.is_(None),
+                       SummarizeRollup.source_updated_at < source.c.source_updated_at))
+            .order_by(source.c.period_start)
+        )
+        result = await self.__session.execute(query)
+        return result.all()
+
+    async def get_stale_quarters(self, before: date):
+        """
+        Кварталы до before (начало текущего квартала) с месячными сводками,
+        которые нужно свернуть: uuid_object, uuid_equipment, period_start, source_updated_at
+        """
+        # Литерал, а не параметр: выражение должно совпасть в SELECT и GROUP BY
+        quarter = cast(func.date_trunc(literal_column("'quarter'"), Summarize.month), Date)
+        source = (
+            select(Summarize.uuid_object,
+                   Summarize.uuid_equipment,
+                   quarter.label("period_start"),
+                   func.max(func.coalesce(Summarize.datetime_end, Summarize.datetime_start)).label("source_updated_at"))
+            .where(Summarize.month < before,
+                   Summarize.uuid_object.is_not(None),
+                   Summarize.uuid_equipment.is_not(None))
+            .group_by(Summarize.uuid_object, Summarize.uuid_equipment, quarter)
+            .subquery()
+        )
+        return await self.__stale_rollups(source, "quarter")
+
+    async def get_stale_years(self):
+        """Годы с квартальными свёртками, которые нужно свернуть в годовую"""
+        year = cast(func.date_trunc(literal_column("'year'"), SummarizeRollup.period_start), Date)
+        source = (
+            select(SummarizeRollup.uuid_object,
+                   SummarizeRollup.uuid_equipment,
+                   year.label("period_start"),
+                   func.max(SummarizeRollup.updated_at).label("source_updated_at"))
+            .where(SummarizeRollup.period == "quarter")
+            .group_by(SummarizeRollup.uuid_object, SummarizeRollup.uuid_equipment, year)
+            .subquery()
+        )
+        return await self.__stale_rollups(source, "year")
+
+    async def get_months(
+        self,
+        uuid_object: str,
+        uuid_equipment: str,
+        start: date,
+        end: date
+    ) -> list[Summarize]:
+        """Месячные сводки с month в [start, end)"""
+        query = (
+            select(Summarize)
+            .where(Summarize.uuid_object == uuid_object,
+                   Summarize.uuid_equipment == uuid_equipment,
+                   Summarize.month >= start,
+                   Summarize.month < end)
+            .order_by(Summarize.month)
+        )
+        result = await self.__session.execute(query)
+        return list(result.scalars().all())
+
+    async def get_rollup(
+        self,
+        uuid_object: str,
+        uuid_equipment: str,
+        period: str,
+        period_start: date
+    ) -> SummarizeRollup | None:
+        query = select(SummarizeRollup).where(SummarizeRollup.uuid_object == uuid_object,
+                                              SummarizeRollup.uuid_equipment == uuid_equipment,
+                                              SummarizeRollup.period == period,
+                                              SummarizeRollup.period_start == period_start)
+        result = await self.__session.execute(query)
+        return result.scalars().first()
+
+    async def get_rollups(
+        self,
+        uuid_object: str,
+        period: str,
+        uuid_equipment: Optional[str] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None
+    ) -> list[SummarizeRollup]:
+        """Свёртки периода period с period_start в [start, end)"""
+        conditions = [SummarizeRollup.uuid_object == uuid_object, SummarizeRollup.period == period]
+        if uuid_equipment is not None:
+            conditions.append(SummarizeRollup.uuid_equipment == uuid_equipment)
+        if start is not None:
+            conditions.append(SummarizeRollup.period_start >= start)
+        if end is not None:
+            conditions.append(SummarizeRollup.period_start < end)
+        query = (
+            select(SummarizeRollup)
+            .where(and_(*conditions))
+            .order_by(SummarizeRollup.period_start.desc(), SummarizeRollup.uuid_equipment)
+        )
+        result = await self.__session.execute(query)
+        return list(result.scalars().all())
+
+    async def upsert_rollup(
+        self,
+        uuid_object: str,
+        uuid_equipment: str,
+        period: str,
+        period_start: date,
+        text: str,
+        metadata_equipment: dict,
+        source_count: int,
+        source_updated_at: datetime
+    ):
+        query = insert(SummarizeRollup).values(
+            uuid_object=uuid_object,
+            uuid_equipment=uuid_equipment,
+            period=period,
+            period_start=period_start,
+            text=text,
+            metadata_equipment=metadata_equipment,
+            source_count=source_count,
+            source_updated_at=source_updated_at,
+            updated_at=func.now(),
+        )
+        query = query.on_conflict_do_update(
+            index_elements=[SummarizeRollup.uuid_object, SummarizeRollup.uuid_equipment,
+                            SummarizeRollup.period, SummarizeRollup.period_start],
+            set_={"text": query.excluded.text,
+                  "metadata_equipment": query.excluded.metadata_equipment,
+                  "source_count": query.excluded.source_count,
+                  "source_updated_at": query.excluded.source_updated_at,
+                  "updated_at": func.now()},
+        )
+        try:
+            await self.__session.execute(query)
+            await self.__session.commit()
+        except:
+            await self.__session.rollback()
+            raise Exception
+
+    async def try_lock_compaction(self) -> bool:
+        """Свёртку в каждый момент выполняет один воркер (блокировка до конца транзакции)"""
+        query = select(func.pg_try_advisory_xact_lock(func.hashtext("summarize_compaction")))
+        result = await self.__session.execute(query)
+        return bool(result.scalar())
+
     async def add(self, entity: Summarize):
         try:
             self.__session.add(entity)
@@ -1,22 +1,35 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, literal_column
+from sqlalchemy.dialects.postgresql import insert
 
 from fastapi import Depends
 
 from ..tables import ClassBrake, TypeBrake
 from ..database import get_session
+from ..reference_cache import reference_cache
+from ..models.Accident import ClassBrake as ClassBrakeModel, GetTypeBrake
 
 
 class TypeBrakeRepository:
+    """
+    Чтение справочников классов/типов отказов идёт из reference_cache
+    (без обращения к БД). Запрос в БД выполняется только пока снимок
+    ещё не загружен.
+    """
+
     def __init__(self, session: AsyncSession = Depends(get_session)):
         self.__session: AsyncSession = session
 
-    async def get_class_brake_by_name(self, name: str) -> ClassBrake | None:
+    async def get_class_brake_by_name(self, name: str) -> ClassBrakeModel | ClassBrake | None:
+        if reference_cache.is_loaded:
+            return reference_cache.snapshot.class_brake.get_by_name(name)
         response = select(ClassBrake).where(ClassBrake.name == name)
         result = await self.__session.execute(response)
         return result.scalars().first()
 
-    async def get_all_type_brake_by_class(self, class_name: str) -> list[TypeBrake] | None:
+    async def get_all_type_brake_by_class(self, class_name: str) -> list[GetTypeBrake | TypeBrake] | None:
+        if reference_cache.is_loaded:
+            return reference_cache.snapshot.get_type_brake_by_class(class_name)
         if class_name == "org":
             response = select(TypeBrake).join(ClassBrake).where(ClassBrake.name != "meh")
         else:
@@ -24,11 +37,36 @@ class TypeBrakeRepository:
         result = await self.__session.execute(response)
         return result.scalars().all()
 
-    async def get_all_type_brake_by_class_id(self, class_id: int) -> list[TypeBrake] | None:
+    async def get_all_type_brake_by_class_id(self, class_id: int) -> list[GetTypeBrake | TypeBrake] | None:
+        if reference_cache.is_loaded:
+            return reference_cache.snapshot.get_type_brake_by_class_id(class_id)
         response = select(TypeBrake).where(TypeBrake.id_type == class_id)
         result = await self.__session.execute(response)
         return result.scalars().all()
 
+    async def get_class_brake_ids(self) -> set[int]:
+        if reference_cache.is_loaded:
+            return {i.id for i in reference_cache.snapshot.class_brake}
+        result = await self.__session.execute(select(ClassBrake.id))
+        return set(result.scalars().all())
+
+    async def upsert_type_brake(self, rows: list[dict]) -> int:
+        """INSERT ... ON CONFLICT (code) DO UPDATE; возвращает число новых строк."""
+        response = insert(TypeBrake).values(rows)
+        response = (response
+                    .on_conflict_do_update(index_elements=[TypeBrake.code],
+                                           set_={"name": response.excluded.name,
+                                                 "id_type": response.excluded.id_type})
+                    .returning(literal_column("xmax = 0")))
+        try:
+            result = await self.__session.execute(response)
+            inserted = sum(1 for is_new in result.scalars().all() if is_new)
+            await self.__session.commit()
+            return inserted
+        except Exception:
+            await self.__session.rollback()
+            raise
+
     async def add_list_type_brake(self, list_brake: list[TypeBrake]):
         try:
             self.__session.add_all(list_brake)
@@ -38,16 +76,21 @@ class TypeBrakeRepository:
             raise Exception
 
     async def get_brakes_by_uuid_set(self, uuid_list: list[str]) -> list[TypeBrake]:
+        # Возвращаем ORM-объекты: результат присваивается в relationship аварии
         response = select(TypeBrake).where(TypeBrake.id.in_(uuid_list))
         result = await self.__session.execute(response)
         return result.scalars().all()
 
-    async def get_all_class_brake(self) -> list[ClassBrake]:
+    async def get_all_class_brake(self) -> list[ClassBrakeModel | ClassBrake]:
+        if reference_cache.is_loaded:
+            return list(reference_cache.snapshot.class_brake)
         response = select(ClassBrake)
         result = await self.__session.execute(response)
         return result.scalars().all()
 
-    async def get_all_type_brake(self) -> list[TypeBrake]:
+    async def get_all_type_brake(self) -> list[GetTypeBrake | TypeBrake]:
+        if reference_cache.is_loaded:
+            return list(reference_cache.snapshot.type_brake)
         response = select(TypeBrake)
         result = await self.__session.execute(response)
-        return result.scalars().all()
\ No newline at end of file
+        return result.scalars().all()
@@ -13,7 +13,12 @@ from .EnvRepository import EnvRepository
 from .ProposalsRepository import ProposalsRepository
 from .LogMessageErrorRepository import LogMessageErrorRepository
 from .SummarizeRepository import SummarizeRepository
+from .BlobRepository import BlobRepository
+from .StorageGcRepository import StorageGcRepository
 
 
 
 
+from .OutboxRepository import OutboxRepository
+
+from .DirectoryRepository import DirectoryRepository
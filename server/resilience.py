@@ -0,0 +1,311 @@
+"""
+Устойчивость HTTP-адаптеров к деградации микросервисов.
+
+Все адаптеры (пользователи, объекты и оборудование) получают AsyncClient из
+get_client, а он работает через общий ResilientTransport. Транспорт:
+
+- ограничивает каждый запрос временем по SLO эндпоинта (http_timeouts,
+  иначе http_timeout) – медленный ответ превращается в httpx.ReadTimeout;
+- ведёт автомат-предохранитель на каждый сервис: после
+  http_breaker_failures подряд ошибок (таймаут, обрыв, 5xx) запросы к сервису
+  сразу отклоняются CircuitOpenError, через http_breaker_reset секунд
+  пропускается один пробный запрос;
+- пока сервис недоступен, для GET отдаёт последний успешный ответ на тот же
+  URL с тем же токеном, если ему не больше http_stale_ttl секунд
+  (заголовок X-Stale: 1); кроме эндпоинтов http_no_stale – например,
+  профиля по токену, которым аутентифицируются запросы;
+- для GET, если задан http_hedge_percentile, отправляет дублирующий запрос,
+  когда первый не ответил за этот перцентиль задержек эндпоинта, и берёт
+  первый ответ.
+
+CircuitOpenError и таймауты – наследники httpx.RequestError, поэтому их
+ловят те же обработчики, что и ошибки соединения.
+"""
+import asyncio
+import re
+import time
+from collections import OrderedDict, deque
+
+import httpx
+
+from .settings import settings
+
+
+_ID_SEGMENT = re.compile(r"^(\d+|[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12})$")
+
+
+def endpoint_key(request: httpx.Request) -> str:
+    """Метод и шаблон пути: идентификаторы в пути заменяются на {id}."""
+    path = "/".join("{id}" if _ID_SEGMENT.match(segment) else segment
+                    for segment in request.url.path.split("/"))
+    return f"{request.method} {path}"
+
+
+class CircuitOpenError(httpx.TransportError):
+    pass
+
+
+class LatencyWindow:
+    """Задержки последних запросов эндпоинта (секунды)."""
+
+    def __init__(self, size: int = 200, min_samples: int = 20):
+        self.__values: deque[float] = deque(maxlen=size)
+        self.__min_samples: int = min_samples
+
+    def add(self, value: float):
+        self.__values.append(value)
+
+    def percentile(self, q: float) -> float | None:
+        if len(self.__values) < self.__min_samples:
+            return None
+        values = sorted(self.__values)
+        return values[min(int(q * len(values)), len(values) - 1)]
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.__failure_threshold: int = failure_threshold
+        self.__reset_timeout: float = reset_timeout
+        self.__failures: int = 0
+        self.__opened_at: float | None = None
+        self.__probe: bool = False
+
+    @property
+    def state(self) -> str:
+        if self.__opened_at is None:
+            return "closed"
+        if self.__probe or time.monotonic() >= self.__opened_at + self.__reset_timeout:
+            return "half_open"
+        return "open"
+
+    @property
+    def failures(self) -> int:
+        return self.__failures
+
+    def allow(self) -> bool:
+        if self.__opened_at is None:
+            return True
+        if self.__probe or time.monotonic() < self.__opened_at + self.__reset_timeout:
+            return False
+        # Пробный запрос: пока он идёт, остальные отклоняются
+        self.__probe = True
+        return True
+
+    def record_success(self):
+        self.__failures = 0
+        self.__opened_at = None
+        self.__probe = False
+
+    def record_failure(self):
+        self.__failures += 1
+        if self.__probe or self.__failures >= self.__failure_threshold:
+            self.__opened_at = time.monotonic()
+            self.__probe = False
+
+
+class EndpointStats:
+    __slots__ = ("requests", "failures", "timeouts", "short_circuited",
+                 "stale_served", "hedged", "hedge_wins", "latency")
+
+    def __init__(self):
+        self.requests: int = 0
+        self.failures: int = 0
+        self.timeouts: int = 0
+        self.short_circuited: int = 0
+        self.stale_served: int = 0
+        self.hedged: int = 0
+        self.hedge_wins: int = 0
+        self.latency: LatencyWindow = LatencyWindow()
+
+    def to_dict(self) -> dict:
+        result = {name: getattr(self, name) for name in self.__slots__ if name != "latency"}
+        for q in (0.5, 0.95, 0.99):
+            value = self.latency.percentile(q)
+            result[f"p{int(q * 100)}"] = round(value * 1000, 1) if value is not None else None
+        return result
+
+
+class ResilientTransport(httpx.AsyncBaseTransport):
+    def __init__(self,
+                 transport: httpx.AsyncBaseTransport,
+                 default_timeout: float = 5,
+                 timeouts: dict[str, float] | None = None,
+                 failure_threshold: int = 5,
+                 reset_timeout: float = 30,
+                 hedge_percentile: float | None = None,
+                 stale_ttl: int = 600,
+                 stale_size: int = 2048,
+                 no_stale: list[str] | None = None):
+        self.__transport: httpx.AsyncBaseTransport = transport
+        self.__default_timeout: float = default_timeout
+        self.__timeouts: dict[str, float] = timeouts or {}
+        self.__failure_threshold: int = failure_threshold
+        self.__reset_timeout: float = reset_timeout
+        self.__hedge_percentile: float | None = hedge_percentile
+        self.__stale_ttl: int = stale_ttl
+        self.__stale_size: int = stale_size
+        self.__no_stale: set[str] = set(no_stale or ())
+        self.__breakers: dict[str, CircuitBreaker] = {}
+        self.__stats: dict[tuple[str, str], EndpointStats] = {}
+        # (url, Authorization) -> (момент сохранения, статус, заголовки, тело)
+        self.__stale: OrderedDict[tuple[str, str | None], tuple[float, int, httpx.Headers, bytes]] = OrderedDict()
+
+    def __breaker(self, host: str) -> CircuitBreaker:
+        breaker = self.__breakers.get(host)
+        if breaker is None:
+            breaker = self.__breakers[host] = CircuitBreaker(self.__failure_threshold, self.__reset_timeout)
+        return breaker
+
+    def __endpoint_stats(self, host: str, key: str) -> EndpointStats:
+        stats = self.__stats.get((host, key))
+        if stats is None:
+            stats = self.__stats[(host, key)] = EndpointStats()
+        return stats
+
+    def __get_stale(self, cache_key, request: httpx.Request, stats: EndpointStats) -> httpx.Response | None:
+        item = self.__stale.get(cache_key) if cache_key is not None else None
+        if item is None or item[0] + self.__stale_ttl < time.monotonic():
+            return None
+        stats.stale_served += 1
+        _, status_code, headers, content = item
+        headers = httpx.Headers(headers)
+        headers["X-Stale"] = "1"
+        return httpx.Response(status_code, headers=headers, stream=httpx.ByteStream(content), request=request)
+
+    def __put_stale(self, cache_key, response: httpx.Response, content: bytes):
+        self.__stale[cache_key] = (time.monotonic(), response.status_code, response.headers, content)
+        self.__stale.move_to_end(cache_key)
+        while len(self.__stale) > self.__stale_size:
+            self.__stale.popitem(last=False)
+
+    async def __attempt(self, request: httpx.Request, timeout: float, stats: EndpointStats) -> tuple[httpx.Response, bytes]:
+        """Один запрос с чтением тела – таймаут покрывает и ожидание, и загрузку ответа."""
+
+        async def send() -> tuple[httpx.Response, bytes]:
+            response = await self.__transport.handle_async_request(request)
+            try:
+                content = await response.aread()
+            finally:
+                await response.aclose()
+            return response, content
+
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(send(), timeout)
+        except asyncio.TimeoutError:
+            stats.timeouts += 1
+            raise httpx.ReadTimeout(f"{request.method} {request.url} exceeded {timeout}s", request=request)
+        stats.latency.add(time.monotonic() - started)
+        return result
+
+    async def __send(self, request: httpx.Request, timeout: float, stats: EndpointStats) -> tuple[httpx.Response, bytes]:
+        delay = None
+        if self.__hedge_percentile and request.method in ("GET", "HEAD"):
+            delay = stats.latency.percentile(self.__hedge_percentile)
+        if delay is None or delay >= timeout:
+            return await self.__attempt(request, timeout, stats)
+
+        first = asyncio.create_task(self.__attempt(request, timeout, stats))
+        tasks = {first}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                # Первый запрос медленнее обычного – дублируем, уложившись в тот же SLO
+                stats.hedged += 1
+                tasks.add(asyncio.create_task(self.__attempt(request, timeout - delay, stats)))
+
+            error: BaseException | None = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            stats.hedge_wins += 1
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+            # Отмена проигравшего запроса быстрая – дожидаемся, чтобы не оставлять задачи
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        key = endpoint_key(request)
+        stats = self.__endpoint_stats(host, key)
+        breaker = self.__breaker(host)
+        stats.requests += 1
+
+        cache_key = None
+        if request.method == "GET" and self.__stale_ttl > 0 and key not in self.__no_stale:
+            cache_key = (str(request.url), request.headers.get("authorization"))
+
+        if not breaker.allow():
+            stats.short_circuited += 1
+            stale = self.__get_stale(cache_key, request, stats)
+            if stale is not None:
+                return stale
+            raise CircuitOpenError(f"{host} is unavailable (circuit open)", request=request)
+
+        timeout = self.__timeouts.get(key, self.__default_timeout)
+        try:
+            response, content = await self.__send(request, timeout, stats)
+        except httpx.TransportError:
+            stats.failures += 1
+            breaker.record_failure()
+            stale = self.__get_stale(cache_key, request, stats)
+            if stale is not None:
+                return stale
+            raise
+        except asyncio.CancelledError:
+            # Запрос отменён вызывающим кодом – о здоровье сервиса это ничего не говорит
+            if breaker.state == "half_open":
+                breaker.record_failure()
+            raise
+
+        if response.status_code >= 500:
+            stats.failures += 1
+            breaker.record_failure()
+            stale = self.__get_stale(cache_key, request, stats)
+            if stale is not None:
+                return stale
+        else:
+            breaker.record_success()
+            if cache_key is not None and response.status_code == 200:
+                self.__put_stale(cache_key, response, content)
+
+        return httpx.Response(response.status_code,
+                              headers=response.headers,
+                              stream=httpx.ByteStream(content),
+                              extensions=response.extensions,
+                              request=request)
+
+    def snapshot(self) -> dict:
+        """Метрики по сервисам и эндпоинтам (задержки в миллисекундах)."""
+        services = {}
+        for host, breaker in self.__breakers.items():
+            services[host] = {"state": breaker.state, "failures": breaker.failures, "endpoints": {}}
+        for (host, key), stats in self.__stats.items():
+            services.setdefault(host, {"endpoints": {}})["endpoints"][key] = stats.to_dict()
+        return services
+
+    async def aclose(self):
+        # Транспорт общий для всех клиентов – закрывается только при остановке приложения
+        pass
+
+    async def close(self):
+        await self.__transport.aclose()
+
+
+http_transport = ResilientTransport(
+    httpx.AsyncHTTPTransport(limits=httpx.Limits(max_connections=settings.http_pool_size,
+                                                 max_keepalive_connections=settings.http_pool_size)),
+    default_timeout=settings.http_timeout,
+    timeouts=settings.http_timeouts,
+    failure_threshold=settings.http_breaker_failures,
+    reset_timeout=settings.http_breaker_reset,
+    hedge_percentile=settings.http_hedge_percentile,
+    stale_ttl=settings.http_stale_ttl,
+    no_stale=settings.http_no_stale,
+)
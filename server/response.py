@@ -1,9 +1,124 @@
+from typing import TYPE_CHECKING
+from urllib.parse import quote, urlsplit
+
+from fastapi import Request, Response, status
+from fastapi.responses import JSONResponse, RedirectResponse, StreamingResponse
 from httpx import AsyncClient
 
+from .settings import settings
+from .reference_cache import SerializedPayload
+from .object_cache import iter_memory
+from .resilience import http_transport
+
+if TYPE_CHECKING:
+    from .repositories import FileBucketRepository
+
 
 async def get_client() -> AsyncClient:
-    async with AsyncClient() as client:
+    # Соединения, таймауты и предохранители – в общем транспорте (см. resilience)
+    async with AsyncClient(transport=http_transport, timeout=None) as client:
         try:
             yield client
         except Exception:
-            pass
\ No newline at end of file
+            pass
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    tags = [i.strip().removeprefix("W/") for i in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+def cached_json_response(request: Request,
+                         payload: SerializedPayload,
+                         max_age: int | None = None) -> Response:
+    """
+    Отдаёт заранее сериализованный JSON с ETag/Cache-Control,
+    либо 304 Not Modified, если у клиента актуальная версия.
+    """
+    if max_age is None:
+        max_age = settings.env_cache_max_age
+    headers = {
+        "ETag": payload.etag,
+        "Cache-Control": f"public, max-age={max_age}, must-revalidate",
+    }
+    if is_not_modified(request, payload.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
+
+
+class MemoryResponse(Response):
+    """
+    Ответ из байт в памяти (кеш горячих объектов): тело отправляется срезами
+    memoryview, без копирования в отдельные bytes на каждый кусок.
+    """
+
+    def __init__(self,
+                 content: bytes | bytearray,
+                 media_type: str | None = None,
+                 headers: dict | None = None):
+        super().__init__(content=None, media_type=media_type, headers=headers)
+        self.__content = content
+        self.headers["content-length"] = str(len(content))
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start",
+                    "status": self.status_code,
+                    "headers": self.raw_headers})
+        chunks = list(iter_memory(self.__content))
+        for index, chunk in enumerate(chunks):
+            await send({"type": "http.response.body",
+                        "body": chunk,
+                        "more_body": index < len(chunks) - 1})
+        if not chunks:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def content_disposition(file_name: str, disposition: str = "inline") -> str:
+    return f"{disposition}; filename*=UTF-8''{quote(file_name)}"
+
+
+async def file_response(file_repo: "FileBucketRepository",
+                        file_key: str,
+                        file_name: str,
+                        media_type: str = "application/octet-stream",
+                        disposition: str = "inline") -> Response:
+    """
+    Отдача файла из MinIO после авторизации в FastAPI.
+    В режимах presigned и accel байты идут мимо воркера: клиент получает
+    редирект на подписанную ссылку, либо nginx сам забирает объект из MinIO
+    по X-Accel-Redirect. В режиме proxy файл стримится через воркер, как раньше.
+    """
+    headers = {"Content-Disposition": content_disposition(file_name, disposition)}
+
+    if settings.download_mode in ("presigned", "accel"):
+        # Заголовки ответа подписываются в ссылке – их выставит сам MinIO
+        response_headers = {
+            "response-content-disposition": headers["Content-Disposition"],
+            "response-content-type": media_type,
+        }
+        is_public = settings.download_mode == "presigned"
+        url = await file_repo.get_presigned_url(file_key, response_headers, is_public)
+        if is_public:
+            return RedirectResponse(url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+
+        url = urlsplit(url)
+        location = f"{settings.accel_redirect_location}{url.path.lstrip('/')}?{url.query}"
+        return Response(headers={**headers, "X-Accel-Redirect": location}, media_type=media_type)
+
+    info = await file_repo.get_sate(file_key)
+    if info is None:
+        return JSONResponse(content={"message": "не существует"},
+                            status_code=status.HTTP_404_NOT_FOUND)
+
+    content = await file_repo.get_cached_file(file_key, info)
+    if content is not None:
+        return MemoryResponse(content,
+                              media_type=media_type,
+                              headers={**headers, "ETag": f'"{info.etag}"'})
+
+    return StreamingResponse(file_repo.get_file_stream(file_key, info.size),
+                             media_type=media_type,
+                             headers=headers)
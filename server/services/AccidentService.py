@@ -13,16 +13,24 @@ from ..models.Event import *
 from ..models.User import UserGet
 from ..tables import Accident, Event
 
-from ..repositories import AccidentRepository, TypeBrakeRepository, ObjectRepository, EquipmentRepository, EventRepository
+from ..repositories import (
+    AccidentRepository,
+    TypeBrakeRepository,
+    ObjectRepository,
+    EquipmentRepository,
+    EventRepository,
+    FileBucketRepository,
+)
+
+from .BlobService import BlobService
 
 from uuid import uuid4, UUID
 
-from urllib.parse import urlparse
 from ..settings import settings
+from ..archive import stream_zip
 
 from pathlib import Path
-from os import listdir, path, mkdir, remove
-import aiofiles
+from typing import AsyncIterator
 
 
 class AccidentService:
@@ -31,12 +39,15 @@ class AccidentService:
                  type_brake_repo: TypeBrakeRepository = Depends(),
                  object_repo: ObjectRepository = Depends(),
                  equipment_repo: EquipmentRepository = Depends(),
-                 event_repo: EventRepository = Depends()):
+                 event_repo: EventRepository = Depends(),
+                 blob_service: BlobService = Depends()):
         self.__accident_repo: AccidentRepository = accident_repo
         self.__type_brake_repo: TypeBrakeRepository = type_brake_repo
         self.__object_repo: ObjectRepository = object_repo
         self.__equipment_repo: EquipmentRepository = equipment_repo
         self.__event_repo: EventRepository = event_repo
+        self.__blob_service: BlobService = blob_service
+        self.__file_repo: FileBucketRepository = FileBucketRepository("document")
         self.__count_item: int = 20
 
     @property
@@ -328,47 +339,43 @@ class AccidentService:
 
     async def get_file_accident(self, uuid_accident: str) -> list[FileAccident] | None:
         accident = await self.__accident_repo.get_by_uuid(uuid_accident)
-        url_host = f"{settings.host_server}:{settings.port_server}"
-
-        parsed_uri = urlparse(accident.additional_material)
-
-        if url_host != parsed_uri.netloc:
+        if accident is None:
             return None
 
-        path_files = Path(settings.static_file, parsed_uri.path.split('/')[-1])
-
-        files = listdir(path_files)
-
-        return [FileAccident(path=str(path_files), name=i) for i in files]
+        slots = await self.__blob_service.get_slots("accident", uuid_accident)
+        return [FileAccident(path=slot.blob.file_key, name=slot.name) for slot in slots]
 
     async def add_file_accident(self, uuid_accident: str, file: UploadFile):
-
         accident = await self.__accident_repo.get_by_uuid(uuid_accident)
-        obj = await self.__object_repo.get_by_uuid(str(accident.uuid_object)) if accident.uuid_object else None
-        dir_name = (obj.name if obj else str(accident.uuid_object))
-
-        start_path = Path(Path(__path__).absolute(), settings.static_file, dir_name)
-        if not path.isdir(Path(start_path)):
-            mkdir(start_path)
 
-        start_path = Path(start_path, uuid_accident)
-        if not path.isdir(Path(start_path)):
-            mkdir(start_path)
-
-        start_path = Path(start_path, file.filename)
-        async with aiofiles.open(start_path, 'wb') as out_file:
-            while content := await file.read(1024):
-                await out_file.write(content)
+        # Имя слота – имя файла без каталогов клиента
+        await self.__blob_service.attach_upload("accident",
+                                                uuid_accident,
+                                                Path(file.filename).name,
+                                                file,
+                                                settings.upload_max_size_document * 1024 * 1024)
 
         accident.additional_material = f"https://{settings.host_server}:{settings.port_server}/accident/files/{uuid_accident}/download"
 
         await self.__accident_repo.update(accident)
 
     async def delete_file(self, uuid_accident: str, name_file: str):
-        accident = await self.__accident_repo.get_by_uuid(uuid_accident)
-        obj = await self.__object_repo.get_by_uuid(str(accident.uuid_object)) if accident.uuid_object else None
-        dir_name = (obj.name if obj else str(accident.uuid_object))
-        remove(Path(Path(__path__), settings.static_file, dir_name, uuid_accident, name_file))
+        await self.__blob_service.detach("accident", uuid_accident, Path(name_file).name)
+
+    async def stream_files_accident(self, uuid_accident: str) -> AsyncIterator[bytes] | None:
+        """
+        ZIP со всеми вложениями аварии. Каждый файл читается из MinIO частями
+        и сразу уходит в архив, архив целиком нигде не собирается.
+        """
+        slots = await self.__blob_service.get_slots("accident", uuid_accident)
+        if not slots:
+            return None
+
+        async def entries():
+            for slot in slots:
+                yield slot.name, self.__file_repo.iter_file(slot.blob.file_key)
+
+        return stream_zip(entries())
 
     async def delete_accident(self, uuid_accident: str):
         accident = await self.__accident_repo.get_by_uuid(uuid_accident)
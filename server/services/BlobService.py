@@ -0,0 +1,145 @@
+from fastapi import Depends, UploadFile, HTTPException, status
+from starlette.concurrency import run_in_threadpool
+
+from ..tables import Blob, BlobSlot
+from ..repositories import BlobRepository, FileBucketRepository
+
+from pathlib import Path
+from typing import Awaitable, BinaryIO, Callable
+from uuid import uuid4
+import hashlib
+import xxhash
+
+
+class BlobService:
+    """
+    Хранилище файлов с адресацией по содержимому: одинаковые файлы, загруженные
+    в разные заявки/аварии/бланки, лежат в MinIO одним объектом. Владельцы
+    ссылаются на него через слоты, объект удаляется, когда ссылок не осталось.
+    """
+
+    def __init__(self, blob_repo: BlobRepository = Depends()):
+        self.__blob_repo: BlobRepository = blob_repo
+        self.__file_repo: FileBucketRepository = FileBucketRepository("document")
+
+    @staticmethod
+    def hash_stream(stream: BinaryIO) -> tuple[str, str, int]:
+        """SHA-256 (адрес), xxh3 (контрольная сумма для клиента) и размер; поток перематывается в начало."""
+        stream.seek(0)
+        sha = hashlib.sha256()
+        xxh = xxhash.xxh3_64()
+        size = 0
+        while chunk := stream.read(1024 * 1024):
+            sha.update(chunk)
+            xxh.update(chunk)
+            size += len(chunk)
+        stream.seek(0)
+        return sha.hexdigest(), xxh.hexdigest(), size
+
+    async def __attach(self,
+                       owner_type: str,
+                       owner_id: str,
+                       name: str,
+                       hash_content: str,
+                       size: int,
+                       content_type: str | None,
+                       suffix: str,
+                       upload: Callable[[str], Awaitable]) -> Blob:
+        for _ in range(2):
+            blob = await self.__blob_repo.get_by_hash(hash_content)
+            if blob is None:
+                # Уникальный суффикс: удаление старой версии того же содержимого
+                # не заденет объект, загруженный заново. Расширение сохраняется –
+                # по нему выбирается имя файла при скачивании
+                file_key = f"blobs/{hash_content[:2]}/{hash_content}-{uuid4().hex[:8]}{suffix.lower()}"
+                await upload(file_key)
+                blob = await self.__blob_repo.add(Blob(hash=hash_content,
+                                                       file_key=file_key,
+                                                       size=size,
+                                                       content_type=content_type))
+                if blob is None or blob.file_key != file_key:
+                    # Такое же содержимое параллельно загрузил другой запрос
+                    await self.__file_repo.delete_object(file_key)
+                if blob is None:
+                    continue
+
+            released = await self.__blob_repo.set_slot(owner_type, owner_id, name, blob.id)
+            if released is not None:
+                await self.__delete_objects(released)
+                return blob
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT)
+
+    async def __delete_objects(self, file_keys: list[str]):
+        for file_key in file_keys:
+            await self.__file_repo.delete_object(file_key)
+
+    async def attach_upload(self,
+                            owner_type: str,
+                            owner_id: str,
+                            name: str,
+                            file: UploadFile,
+                            max_size: int,
+                            checksum: str | None = None) -> tuple[Blob, str]:
+        """
+        Привязывает загруженный файл к слоту. Хеш считается по уже принятому
+        спулу UploadFile (в потоке, чтобы не блокировать event loop); если такое
+        содержимое уже есть, повторная загрузка в MinIO не выполняется.
+        Возвращает blob и xxh3 содержимого.
+        """
+        self.__file_repo.check_upload_size(file, max_size)
+        hash_content, xxh, size = await run_in_threadpool(self.hash_stream, file.file)
+        if size > max_size:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                                detail="Файл превышает допустимый размер")
+        if checksum is not None and checksum.lower() != xxh:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                                detail="Контрольная сумма файла не совпадает")
+
+        async def upload(file_key: str):
+            await self.__file_repo.upload_form_file(file_key, file, file.content_type, max_size, xxh)
+
+        blob = await self.__attach(owner_type, owner_id, name, hash_content, size, file.content_type,
+                                   Path(file.filename or "").suffix, upload)
+        return blob, xxh
+
+    async def attach_bytes(self,
+                           owner_type: str,
+                           owner_id: str,
+                           name: str,
+                           content: bytes,
+                           content_type: str,
+                           ext: str) -> Blob:
+        hash_content = hashlib.sha256(content).hexdigest()
+
+        async def upload(file_key: str):
+            await self.__file_repo.upload_file(file_key, content, content_type)
+
+        return await self.__attach(owner_type, owner_id, name, hash_content, len(content), content_type,
+                                   f".{ext}", upload)
+
+    async def attach_path(self,
+                          owner_type: str,
+                          owner_id: str,
+                          name: str,
+                          path: str,
+                          content_type: str) -> Blob:
+        """Привязка локального файла (перенос старых вложений)."""
+        with open(path, "rb") as stream:
+            hash_content, _, size = await run_in_threadpool(self.hash_stream, stream)
+
+        async def upload(file_key: str):
+            await self.__file_repo.upload_path(file_key, path, content_type)
+
+        return await self.__attach(owner_type, owner_id, name, hash_content, size, content_type,
+                                   Path(path).suffix, upload)
+
+    async def get_slots(self, owner_type: str, owner_id: str) -> list[BlobSlot]:
+        return await self.__blob_repo.get_slots(owner_type, owner_id)
+
+    async def get_slot(self, owner_type: str, owner_id: str, name: str) -> BlobSlot | None:
+        return await self.__blob_repo.get_slot(owner_type, owner_id, name)
+
+    async def detach(self, owner_type: str, owner_id: str, name: str | None = None):
+        """Отвязывает слот (или все слоты владельца); объекты без ссылок удаляются из MinIO."""
+        released = await self.__blob_repo.delete_slots(owner_type, owner_id, name)
+        await self.__delete_objects(released)
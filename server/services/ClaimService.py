@@ -3,6 +3,8 @@ from ..models.Claim import GetClaim, PostClaim, UpdateClaim, StateClaimModel
 from ..models.Accident import GetAccident, StateAccidentModel, TimeLine, CodeErrorAccidentModel
 from ..models.User import UserGet
 from ..models.Event import GetEvent
+from ..models.Object import GetObject
+from ..models.Equipment import GetEquipment
 
 from ..tables import StateClaim, Claim
 
@@ -14,8 +16,12 @@ from ..repositories import (
     ObjectRepository,
     EquipmentRepository,
 )
+from .BlobService import BlobService
+from .EmailService import EmailService
 
-from functools import partial
+from ..settings import settings
+
+import asyncio
 
 from datetime import datetime, timezone
 
@@ -28,31 +34,48 @@ class ClaimServices:
         accident_repo: AccidentRepository = Depends(),
         object_repo: ObjectRepository = Depends(),
         equipment_repo: EquipmentRepository = Depends(),
+        blob_service: BlobService = Depends(),
+        email_service: EmailService = Depends(),
     ):
         self.__claim_repo: ClaimRepository = claim_repo
         self.__user_repo: UserRepository = user_repo
         self.__accident_repo: AccidentRepository = accident_repo
         self.__object_repo: ObjectRepository = object_repo
         self.__equipment_repo: EquipmentRepository = equipment_repo
+        self.__blob_service: BlobService = blob_service
+        self.__email_service: EmailService = email_service
         self.__file_repo: FileBucketRepository = FileBucketRepository("document")
 
         self.__count_item: int = 20
 
-    async def _accident_orm_to_get_accident(self, accident_orm):
-        """Собирает GetAccident из ORM-аварии, подгружая object и damaged_equipment из микросервиса."""
+    async def _accident_orm_to_get_accident(self,
+                                            accident_orm,
+                                            objects: dict[str, GetObject | None] | None = None,
+                                            equipment: dict[str, GetEquipment] | None = None):
+        """
+        Собирает GetAccident из ORM-аварии, подгружая object и damaged_equipment из микросервиса.
+        objects/equipment – заранее загруженные пачкой справочники (по UUID); если переданы,
+        запросы в микросервис для этой аварии не выполняются.
+        """
         uuid_object = str(accident_orm.uuid_object) if accident_orm.uuid_object else ""
-        object_model = await self.__object_repo.get_by_uuid(uuid_object) if uuid_object else None
+        if objects is not None:
+            object_model = objects.get(uuid_object)
+        else:
+            object_model = await self.__object_repo.get_by_uuid(uuid_object) if uuid_object else None
 
         equipment_uuids = [
             str(e.uuid_equipment)
             for e in (accident_orm.damaged_equipment or [])
             if getattr(e, "uuid_equipment", None)
         ]
-        damaged_equipment = (
-            await self.__equipment_repo.get_equipment_by_uuid_set(equipment_uuids)
-            if equipment_uuids
-            else []
-        )
+        if equipment is not None:
+            damaged_equipment = [equipment[i] for i in equipment_uuids if i in equipment]
+        else:
+            damaged_equipment = (
+                await self.__equipment_repo.get_equipment_by_uuid_set(equipment_uuids)
+                if equipment_uuids
+                else []
+            )
 
         state_accident = None
         if accident_orm.state_accident:
@@ -269,57 +292,139 @@ class ClaimServices:
             accident=accident_model,
         )
 
-    async def upload_file(self, type_file: str, uuid: str, file: UploadFile):
-        ext = file.filename.split(".")[-1]
-        dir_name = f"{uuid}"
+    async def get_claims_by_filter(self,
+                                   uuid_object: str,
+                                   id_state_claim: int,
+                                   date_from: datetime | None = None,
+                                   date_to: datetime | None = None) -> list[GetClaim]:
+        """
+        Полные модели заявок по фильтру для пакетной обработки.
+        Заявки читаются одним запросом, пользователи и оборудование – одним
+        batch-запросом к микросервисам, объекты – по одному запросу на уникальный UUID.
+        """
+        entities = await self.__claim_repo.get_claims_by_filter(uuid_object,
+                                                                id_state_claim,
+                                                                date_from,
+                                                                date_to)
+        if not entities:
+            return []
+
+        user_uuids = {str(i.user_uuid) for i in entities if i.user_uuid is not None}
+        object_uuids = list({str(i.accident.uuid_object) for i in entities if i.accident.uuid_object})
+        equipment_uuids = {
+            str(e.uuid_equipment)
+            for i in entities
+            for e in (i.accident.damaged_equipment or [])
+            if e.uuid_equipment
+        }
+
+        users, equipment_list, *object_list = await asyncio.gather(
+            self.__user_repo.get_users_by_uuids(list(user_uuids)),
+            self.__equipment_repo.get_equipment_by_uuid_set(list(equipment_uuids)),
+            *[self.__object_repo.get_by_uuid(i) for i in object_uuids]
+        )
+        users_by_uuid = {str(u.uuid): u for u in users}
+        equipment = {str(e.uuid): e for e in equipment_list}
+        objects = dict(zip(object_uuids, object_list))
+
+        claims: list[GetClaim] = []
+        for entity in entities:
+            user_model = users_by_uuid.get(str(entity.user_uuid))
+            if user_model is None:
+                # Заявка без пользователя в микросервисе в пакет не попадает
+                continue
+
+            accident_model = await self._accident_orm_to_get_accident(entity.accident, objects, equipment)
+            claims.append(
+                GetClaim(
+                    uuid=entity.uuid,
+                    datetime=entity.datetime,
+                    main_document=entity.main_document,
+                    edit_document=entity.edit_document,
+                    comment=entity.comment,
+                    id_state_claim=entity.id_state_claim,
+                    state_claim=StateClaimModel(
+                        id=entity.state_claim.id,
+                        name=entity.state_claim.name,
+                        description=entity.state_claim.description,
+                    ),
+                    user=user_model,
+                    accident=accident_model,
+                )
+            )
+        return claims
 
-        file_key = f"{dir_name}/{type_file}_file.{ext}"
+    @staticmethod
+    def __slot_name(type_file: str) -> str:
+        return "main" if type_file == "main" else "edit"
 
-        try:
-            await self.__file_repo.delete_file(file_key)
-        except Exception:
-            pass
+    async def __delete_legacy(self, file_key: str | None):
+        """Документы, загруженные до перехода на blob-хранилище, удаляются напрямую."""
+        if file_key not in (None, "Не представлен") and not file_key.startswith("blobs/"):
+            await self.__file_repo.delete_object(file_key)
 
-        claim = await self.__claim_repo.get_by_uuid(uuid)
+    async def __set_document(self, claim: Claim, type_file: str, file_key: str):
         if type_file == "main":
-            claim.main_document = file_key
+            old_key, claim.main_document = claim.main_document, file_key
         else:
-            claim.edit_document = file_key
+            old_key, claim.edit_document = claim.edit_document, file_key
+        await self.__claim_repo.update(claim)
+        await self.__delete_legacy(old_key)
 
-        content = await file.read()
-        await self.__file_repo.upload_file(file_key,
-                                           content,
-                                           file.content_type)
+    async def upload_file(self, type_file: str, uuid: str, file: UploadFile, checksum: str | None = None) -> str:
+        max_size = settings.upload_max_size_document * 1024 * 1024
+        claim = await self.__claim_repo.get_by_uuid(uuid)
 
-        await self.__claim_repo.update(claim)
+        blob, checksum = await self.__blob_service.attach_upload("claim",
+                                                                 uuid,
+                                                                 self.__slot_name(type_file),
+                                                                 file,
+                                                                 max_size,
+                                                                 checksum)
+
+        await self.__set_document(claim, type_file, blob.file_key)
+        return checksum
+
+    async def save_document(self,
+                            type_file: str,
+                            uuid: str,
+                            content: bytes,
+                            ext: str,
+                            content_type: str):
+        """Сохраняет уже готовый документ (например, сгенерированный по бланку) в заявку."""
+        claim = await self.__claim_repo.get_by_uuid(uuid)
 
-    async def get_file(self, type_file, uuid: str):
+        blob = await self.__blob_service.attach_bytes("claim",
+                                                      uuid,
+                                                      self.__slot_name(type_file),
+                                                      content,
+                                                      content_type,
+                                                      ext)
+
+        await self.__set_document(claim, type_file, blob.file_key)
+
+    async def get_file(self, type_file, uuid: str) -> str | None:
+        """Ключ документа заявки в MinIO, если документ загружен."""
         claim = await self.__claim_repo.get_by_uuid(uuid)
+        if claim is None:
+            return None
         if type_file == "main":
             file_path = claim.main_document
         else:
             file_path = claim.edit_document
 
-        if file_path is not None:
-            file_name = file_path.split("/")[-1]
-
-            info = await self.__file_repo.get_sate(file_path)
-
-            file = partial(self.__file_repo.get_file_stream,file_name, info)
-            return file, file_path
-        else:
-            return None, None
+        if file_path in (None, "Не представлен"):
+            return None
+        return file_path
 
     async def delete_claim(self, uuid: str, user: UserGet):
         claim = await self.__claim_repo.get_by_uuid(uuid)
         if (user.type.name in ("admin", "super_admin")) or (user.type.name == "user" and claim.state_claim.name == "draft"):
-            if claim.edit_document is not None:
-                await self.__file_repo.delete_object(claim.edit_document)
-
-            if claim.main_document is not None:
-                await self.__file_repo.delete_object(claim.main_document)
+            await self.__delete_legacy(claim.edit_document)
+            await self.__delete_legacy(claim.main_document)
 
             await self.__claim_repo.delete(claim)
+            await self.__blob_service.detach("claim", uuid)
         else:
             raise Exception
 
@@ -353,6 +458,19 @@ class ClaimServices:
                     state_claim_model = await self.__claim_repo.get_state_claim_by_name("under_development")
                 claim.id_state_claim = state_claim_model.id
 
+        # Связи состояний перечитываются, чтобы письмо показало новое состояние
+        await self.__claim_repo.refresh(claim)
+        await self.__accident_repo.refresh(accident)
+
+        # Письмо ставится в outbox до commit и сохраняется вместе с новым состоянием
+        await self.__email_service.send_by_context(
+            "claim_update_state",
+            "Изменение состояния заявки",
+            "claim_update_state.html",
+            True,
+            email_context={"claim": await self.get_claim(uuid_claim)},
+        )
+
         await self.__claim_repo.update(claim)
         await self.__accident_repo.update(accident)
         return claim
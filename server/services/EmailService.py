@@ -1,26 +1,42 @@
 from typing import Optional
-from fastapi import Depends, BackgroundTasks
+from fastapi import Depends
 from ..models.User import UserGet
-from ..repositories import UserRepository
-from ..mailer import EmailNotifier
+from ..repositories import UserRepository, OutboxRepository
+from ..tables import EmailOutbox
+from ..mailer import render_item, render_email, mail_settings
 
+import time
 
-def get_email_notifier():
-    return EmailNotifier(default_to="vladislav.skripnik@aggreko-eurasia.ru")
+
+DEFAULT_TO = "vladislav.skripnik@aggreko-eurasia.ru"
+
+# Получатели по контексту рассылки: context -> (момент устаревания, пользователи)
+_recipients_cache: dict[str, tuple[float, list[UserGet]]] = {}
 
 
 class EmailService:
     def __init__(
         self,
-        notifier: EmailNotifier = Depends(get_email_notifier),
         user_repo: UserRepository = Depends(),
+        outbox_repo: OutboxRepository = Depends(),
     ):
-        self.notifier: EmailNotifier = notifier
         self.__user_repo: UserRepository = user_repo
+        self.__outbox_repo: OutboxRepository = outbox_repo
+
+    async def __get_recipients(self, context: str) -> list[UserGet]:
+        """Список получателей контекста; кешируется на mail_recipients_ttl секунд."""
+        cached = _recipients_cache.get(context)
+        if cached is not None and cached[0] > time.monotonic():
+            return list(cached[1])
+
+        users = await self.__user_repo.get_users_by_context_email(context)
+        # Пустой ответ может означать сбой микросервиса – его не запоминаем
+        if users:
+            _recipients_cache[context] = (time.monotonic() + mail_settings.mail_recipients_ttl, users)
+        return list(users)
 
     async def send_by_context(
         self,
-        background_tasks: BackgroundTasks,
         context: str,
         subject: str,
         template_name: str,
@@ -28,16 +44,41 @@ class EmailService:
         email_context: dict | None = None,
         options_user: Optional[list[UserGet]] = None,
     ):
-        users = await self.__user_repo.get_users_by_context_email(context)
+        """
+        Ставит письма в outbox. Строки добавляются в сессию запроса без commit –
+        они сохраняются вместе с изменением, о котором уведомляют, а отправляет
+        их OutboxSender. Событие рендерится один раз на всех получателей.
+        Для контекстов с окном дайджеста (mail_digest_windows) событие ждёт
+        в outbox и уходит одним письмом вместе с остальными за окно.
+        """
+        users = await self.__get_recipients(context)
         if options_user:
             users += options_user
-        for user in users:
-            background_tasks.add_task(
-                self.notifier,
-                to_email=user.email,
-                subject=subject,
-                template_name=template_name,
-                context=email_context,
-                is_html=is_html,
-            )
+        emails = list(dict.fromkeys(user.email or DEFAULT_TO for user in users))
+
+        is_digest = context in mail_settings.mail_digest_windows
+        try:
+            item = render_item(template_name, email_context)
+            if is_digest:
+                body, state = item, "digest"
+            else:
+                body, state = render_email(template_name, [item]), "pending"
+            error = None
+        except Exception as e:
+            # Ошибка шаблона не должна откатывать само изменение – письмо
+            # остаётся в outbox с причиной
+            body, state, error = "", "failed", f"Ошибка шаблона {template_name}: {e}"
+
+        self.__outbox_repo.stage([
+            EmailOutbox(to_email=to_email,
+                        subject=subject,
+                        body=body,
+                        is_html=is_html,
+                        state=state,
+                        attempts=0,
+                        last_error=error,
+                        context=context,
+                        template_name=template_name)
+            for to_email in emails
+        ])
         return True
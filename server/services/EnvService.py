@@ -6,17 +6,20 @@ from ..models.Object import StateObject, Region
 from ..models.Accident import GetTypeBrake, SignsAccident, CodeErrorAccidentModel
 from ..models.Event import TypeEvent, StateEvent
 from ..models.Claim import StateClaimModel
+from ..models.Import import ImportReport, ImportRowError
 
 from ..tables import (
-    TypeBrake as TypeBrakeORM,
-    SignsAccident as SignsAccidentORM,
     CodeErrorAccident,
 )
 
 from ..repositories import EnvRepository, TypeBrakeRepository
+from ..reference_cache import reference_cache
+from ..importer import iter_batches
 
-from io import StringIO
-import csv
+from typing import Awaitable, Callable
+
+# Сколько строк с ошибками попадает в отчёт импорта
+MAX_REPORT_ERRORS = 1000
 
 
 class EnvService:
@@ -33,28 +36,72 @@ class EnvService:
         type_brake = [GetTypeBrake.model_validate(entity, from_attributes=True) for entity in entity]
         return type_brake
 
-    async def import_type_brake_file(self, file: UploadFile):
+    async def __import(self,
+                       file: UploadFile,
+                       key: str,
+                       validate: Callable[[dict[str, str]], dict],
+                       upsert: Callable[[list[dict]], Awaitable[int]]) -> ImportReport:
+        """
+        Общий конвейер импорта: записи читаются потоком пачками, каждая строка
+        проверяется validate (ValueError – ошибка строки), пачка пишется одним
+        upsert. Повтор ключа внутри пачки оставляет последнюю строку – иначе
+        ON CONFLICT DO UPDATE не сможет обновить одну запись дважды.
+        """
+        report = ImportReport()
+
+        def add_error(line: int, message: str):
+            report.skipped += 1
+            if len(report.errors) < MAX_REPORT_ERRORS:
+                report.errors.append(ImportRowError(line=line, message=message))
+            else:
+                report.errors_truncated = True
+
         try:
-            type_brakes = []
-            while contents := await file.read(1024 * 1024):
-                buffer = StringIO(contents.decode('utf-8-sig'))
-                csv_reader = csv.DictReader(buffer, delimiter=';')
-
-                for rows in csv_reader:
-                    type_brake = TypeBrakeORM(
-                        code=rows["code"],
-                        name=rows["name"],
-                        id_type=int(rows["class"])
-                    )
-                    type_brakes.append(type_brake)
-
-                await self.__type_brake_repo.add_list_type_brake(type_brakes)
-
-        except Exception:
-            raise Exception()
+            async for batch in iter_batches(file):
+                rows: dict[str, tuple[int, dict]] = {}
+                for line, record in batch:
+                    report.total += 1
+                    try:
+                        row = validate(record)
+                    except ValueError as e:
+                        add_error(line, str(e))
+                        continue
+                    if row[key] in rows:
+                        add_error(rows[row[key]][0], f"повтор ключа {row[key]} в строке {line}")
+                    rows[row[key]] = (line, row)
+
+                if rows:
+                    inserted = await upsert([row for _, row in rows.values()])
+                    report.inserted += inserted
+                    report.updated += len(rows) - inserted
         finally:
             await file.close()
 
+        if report.inserted or report.updated:
+            await reference_cache.refresh()
+        return report
+
+    @staticmethod
+    def __required(record: dict[str, str], *names: str) -> str:
+        for name in names:
+            value = (record.get(name) or "").strip()
+            if value:
+                return value
+        raise ValueError(f"не заполнено поле {names[0]}")
+
+    async def import_type_brake_file(self, file: UploadFile) -> ImportReport:
+        class_ids = await self.__type_brake_repo.get_class_brake_ids()
+
+        def validate(record: dict[str, str]) -> dict:
+            id_type = self.__required(record, "class")
+            if not id_type.isdigit() or int(id_type) not in class_ids:
+                raise ValueError(f"неизвестный класс отказа {id_type}")
+            return {"code": self.__required(record, "code"),
+                    "name": self.__required(record, "name"),
+                    "id_type": int(id_type)}
+
+        return await self.__import(file, "code", validate, self.__type_brake_repo.upsert_type_brake)
+
     async def get_all_signs_accident(self) -> list[SignsAccident] | None:
         entity = await self.__env_repo.get_all_signs_accident()
         if entity is None:
@@ -62,25 +109,12 @@ class EnvService:
         signs_accident = [SignsAccident.model_validate(entity, from_attributes=True) for entity in entity]
         return signs_accident
 
-    async def import_signs_accident(self, file: UploadFile):
-        try:
-            signs_accident_list = []
-            while contents := await file.read(1024 * 1024):
-                buffer = StringIO(contents.decode('utf-8-sig'))
-                csv_reader = csv.DictReader(buffer, delimiter=';')
-
-                for rows in csv_reader:
-                    signs_accident = SignsAccidentORM(
-                        code=rows["code"],
-                        name=rows["name"],
-                    )
-                    signs_accident_list.append(signs_accident)
-                await self.__env_repo.add_list_signs_accident(signs_accident_list)
-
-        except Exception:
-            raise Exception()
-        finally:
-            await file.close()
+    async def import_signs_accident(self, file: UploadFile) -> ImportReport:
+        def validate(record: dict[str, str]) -> dict:
+            return {"code": self.__required(record, "code"),
+                    "name": self.__required(record, "name")}
+
+        return await self.__import(file, "code", validate, self.__env_repo.upsert_signs_accident)
 
     async def get_all_error_code_accident(self) -> list[CodeErrorAccidentModel] | None:
         entity = await self.__env_repo.get_all_error_code_accident()
@@ -96,6 +130,7 @@ class EnvService:
         entity = await self.__env_repo.add(entity)
         if entity is None:
             return None
+        await reference_cache.refresh()
         return CodeErrorAccidentModel.model_validate(entity, from_attributes=True)
 
     async def update_error_code_accident(self, id_error: int, target: CodeErrorAccidentModel) -> CodeErrorAccidentModel | None:
@@ -107,47 +142,21 @@ class EnvService:
         entity = await self.__env_repo.update(entity)
         if entity is None:
             return None
+        await reference_cache.refresh()
         return CodeErrorAccidentModel.model_validate(entity, from_attributes=True)
 
     async def delete_error_code_accident(self, id_error: int) -> bool:
-        return await self.__env_repo.delete_error_code_accident(id_error)
-
-    async def import_error_code_accident(self, file: UploadFile):
-        try:
-            error_codes: list[CodeErrorAccident] = []
-            while contents := await file.read(1024 * 1024):
-                # Пытаемся сначала разобрать как UTF-8, если не получается – падаем в cp1251
-                try:
-                    decoded = contents.decode("utf-8-sig")
-                except UnicodeDecodeError:
-                    decoded = contents.decode("cp1251")
-
-                buffer = StringIO(decoded)
-                csv_reader = csv.DictReader(buffer, delimiter=";")
-
-                for rows in csv_reader:
-                    # Поддерживаем варианты заголовков name/Name/NAME и description/Description/DESCRIPTION
-                    name = rows.get("name") or rows.get("Name") or rows.get("NAME")
-                    description = (
-                        rows.get("description")
-                        or rows.get("Description")
-                        or rows.get("DESCRIPTION")
-                    )
-
-                    # Строки без имени пропускаем
-                    if not name:
-                        continue
+        is_deleted = await self.__env_repo.delete_error_code_accident(id_error)
+        if is_deleted:
+            await reference_cache.refresh()
+        return is_deleted
 
-                    error_code = CodeErrorAccident(
-                        name=name,
-                        description=description,
-                    )
-                    error_codes.append(error_code)
+    async def import_error_code_accident(self, file: UploadFile) -> ImportReport:
+        def validate(record: dict[str, str]) -> dict:
+            return {"name": self.__required(record, "name"),
+                    "description": (record.get("description") or "").strip() or None}
 
-            if error_codes:
-                await self.__env_repo.add_list_error_code_accident(error_codes)
-        finally:
-            await file.close()
+        return await self.__import(file, "name", validate, self.__env_repo.upsert_error_code_accident)
 
     async def get_list_type_event(self) -> list[TypeEvent]:
         lists = await self.__env_repo.get_all_type_event()
@@ -1,4 +1,4 @@
-from fastapi import Depends, UploadFile, HTTPException, status
+from fastapi import Depends, UploadFile, HTTPException, status, BackgroundTasks
 
 from ..tables import FileDocument
 
@@ -6,21 +6,30 @@ from ..models.Files import *
 
 from ..repositories import FileBucketRepository, FileRepository
 from .ClaimService import ClaimServices
-
-from random import randint
-from functools import partial
-from docxtpl import DocxTemplate, InlineImage
-from io import BytesIO
+from .BlobService import BlobService
+from ..render import render_document, render_documents, DOCX_CONTENT_TYPE
+from ..archive import stream_zip
+from ..settings import settings
+
+from uuid import uuid4
+from tempfile import SpooledTemporaryFile
+from typing import AsyncIterator, Awaitable, Callable
 from datetime import datetime, timedelta, timezone
 
 
+# Архивы пакетной генерации и их состояние в бакете document
+BATCH_PREFIX = "batch/"
+
+
 class FileService:
     def __init__(self,
                  file: FileRepository = Depends(),
-                 claim: ClaimServices = Depends()):
+                 claim: ClaimServices = Depends(),
+                 blob_service: BlobService = Depends()):
         self.__file_bucket_repo: FileBucketRepository = FileBucketRepository("document")
         self.__file_repo: FileRepository = file
         self.__claim_service: ClaimServices = claim
+        self.__blob_service: BlobService = blob_service
 
     def __get_date_split(self, datetime: datetime) -> dict:
         date = datetime.strftime("%d.%m.%Y.%H.%M.%S")
@@ -53,51 +62,44 @@ class FileService:
         files = await self.__file_repo.get_all()
         return [GetFile.model_validate(i, from_attributes=True) for i in files]
 
-    async def upload_file(self, file: UploadFile, file_name: str):
-        ext = file.filename.split(".")[-1]
-        file_name_key = f"{randint(1000, 10000)}_шаблон_генерации_file.{ext}"
-
-        file_key = f"blueprint/{file_name_key}"
-
+    async def upload_file(self, file: UploadFile, file_name: str, checksum: str | None = None) -> str:
         file_doc = FileDocument(
             file_key="Нет",
-            file_name=file_key,
+            file_name="Нет",
             name=file_name,
             size=float(round(file.size / 1024, 2))
         )
+        # Сначала запись бланка – её id владеет слотом blob
+        await self.__file_repo.add(file_doc)
 
-        content = await file.read()
-        await self.__file_bucket_repo.upload_file(file_key,
-                                                  content,
-                                                  file.content_type)
+        try:
+            blob, checksum = await self.__blob_service.attach_upload("blueprint",
+                                                                     str(file_doc.id),
+                                                                     "file",
+                                                                     file,
+                                                                     settings.upload_max_size_blueprint * 1024 * 1024,
+                                                                     checksum)
+        except Exception:
+            await self.__file_repo.delete(file_doc.id)
+            raise
 
-        await self.__file_repo.add(file_doc)
+        file_doc.file_name = blob.file_key
+        await self.__file_repo.update(file_doc)
+        return checksum
 
     async def get_file(self, id_file: int):
         file_model = await self.__file_repo.get(id_file)
 
         if file_model is not None:
-            file_name = file_model.file_key
-
-            info = await self.__file_bucket_repo.get_sate(file_name)
+            file_name = file_model.file_name
 
             ext = file_name.split(".")[-1]
 
-            return file_name, ext, info
+            return file_name, ext
         else:
             return None, None
 
-    async def generate_document(self, uuid_claim: str, data_generate: FileGenerate) -> dict:
-        claim = await self.__claim_service.get_claim(uuid_claim)
-        file = await self.__file_repo.get(data_generate.id_blueprint)
-        file_streem = await self.__file_bucket_repo.get_file(file.file_name)
-
-        try:
-            blueprint = DocxTemplate(BytesIO(file_streem))
-            template_file = BytesIO()
-        except Exception:
-            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
+    def __build_context(self, claim) -> dict:
         dump = claim.model_dump()
 
         dump["castome"] = {
@@ -124,21 +126,143 @@ class FileService:
                 "type_event": i["type_event"]
             } for i in sorted(dump["accident"]["event"], key=lambda i: i["date_finish"])
         ]
+        return dump
 
-        blueprint.render(dump)
-        blueprint.save(template_file)
-        template_file.seek(0)
+    async def __get_blueprint(self, file: FileDocument) -> bytes:
+        """Байты бланка из кеша объектов; ETag объекта в MinIO отсекает устаревшие версии."""
+        blueprint = await self.__file_bucket_repo.get_cached_file(file.file_name)
+        if blueprint is None:
+            blueprint = await self.__file_bucket_repo.get_file(file.file_name)
+        return blueprint
 
-        await self.__claim_service.upload_file("main", claim.uuid, UploadFile(
-            file=template_file,
-            filename="blueprint.docx"
-        ))
+    async def generate_document(self, uuid_claim: str, data_generate: FileGenerate) -> dict:
+        claim = await self.__claim_service.get_claim(uuid_claim)
+        file = await self.__file_repo.get(data_generate.id_blueprint)
+        blueprint = await self.__get_blueprint(file)
+
+        context = self.__build_context(claim)
+
+        try:
+            content = await render_document(blueprint, context)
+        except Exception:
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        await self.__claim_service.save_document("main",
+                                                 claim.uuid,
+                                                 content,
+                                                 "docx",
+                                                 DOCX_CONTENT_TYPE)
 
         return {"state_file": "upload", "uuid_token": None}
 
+    async def prepare_batch(self, data_generate: FileBatchGenerate) -> tuple[bytes, list[tuple[str, dict]]]:
+        """
+        Загружает всё нужное для пакетной генерации, пока открыта сессия запроса:
+        бланк (через кеш) и контексты всех заявок по фильтру.
+        """
+        file = await self.__file_repo.get(data_generate.id_blueprint)
+        if file is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
+        claims = await self.__claim_service.get_claims_by_filter(data_generate.uuid_object,
+                                                                 data_generate.id_state_claim,
+                                                                 data_generate.date_from,
+                                                                 data_generate.date_to)
+        blueprint = await self.__get_blueprint(file)
+        items = [
+            (f"{claim.datetime.strftime('%Y-%m-%d')}_{claim.uuid}.docx", self.__build_context(claim))
+            for claim in claims
+        ]
+        return blueprint, items
+
+    async def stream_batch(self,
+                           blueprint: bytes,
+                           items: list[tuple[str, dict]],
+                           on_progress: Callable[[str, bool], Awaitable[None]] | None = None) -> AsyncIterator[bytes]:
+        """ZIP с документами по мере их рендера; несформированные перечисляются в errors.txt."""
+        failed: list[str] = []
+
+        async def entries():
+            async for name, content in render_documents(blueprint, items):
+                if content is None:
+                    failed.append(name)
+                else:
+                    yield name, content
+                if on_progress is not None:
+                    await on_progress(name, content is not None)
+            if failed:
+                yield "errors.txt", "\n".join(failed).encode("utf-8")
+
+        async for chunk in stream_zip(entries()):
+            yield chunk
+
+    def __batch_key(self, uuid_token: str, name: str) -> str:
+        return f"{BATCH_PREFIX}{uuid_token}/{name}"
+
+    async def __save_batch_state(self, state: BatchGenerateState):
+        await self.__file_bucket_repo.upload_file(self.__batch_key(state.uuid_token, "state.json"),
+                                                  state.model_dump_json(),
+                                                  "application/json")
+
+    async def start_batch_artifact(self,
+                                   background_tasks: BackgroundTasks,
+                                   blueprint: bytes,
+                                   items: list[tuple[str, dict]]) -> BatchGenerateState:
+        """
+        Ставит сборку архива в фон. Состояние хранится в MinIO рядом с архивом,
+        поэтому опрашивать прогресс можно через любой воркер. Архив и состояние
+        удаляет сборщик мусора хранилища через batch_artifact_ttl часов.
+        """
+        state = BatchGenerateState(uuid_token=str(uuid4()),
+                                   state="processing",
+                                   total=len(items))
+        await self.__save_batch_state(state)
+        background_tasks.add_task(self.__build_batch_artifact, state, blueprint, items)
+        return state
+
+    async def __build_batch_artifact(self,
+                                     state: BatchGenerateState,
+                                     blueprint: bytes,
+                                     items: list[tuple[str, dict]]):
+        step = max(1, state.total // 20)
+
+        async def on_progress(name: str, is_ok: bool):
+            state.done += 1
+            if not is_ok:
+                state.failed.append(name)
+            if state.done % step == 0 and state.done < state.total:
+                await self.__save_batch_state(state)
+
+        try:
+            with SpooledTemporaryFile(max_size=64 * 1024 * 1024) as archive:
+                async for chunk in self.stream_batch(blueprint, items, on_progress):
+                    archive.write(chunk)
+                length = archive.tell()
+                archive.seek(0)
+
+                file_key = self.__batch_key(state.uuid_token, "documents.zip")
+                await self.__file_bucket_repo.upload_stream(file_key, archive, length, "application/zip")
+
+            state.file_key = file_key
+            state.state = "done"
+        except Exception as e:
+            print(f"[BATCH] {state.uuid_token} ERROR: {e}")
+            state.state = "error"
+        await self.__save_batch_state(state)
+
+    async def get_batch_state(self, uuid_token: str) -> BatchGenerateState | None:
+        try:
+            content = await self.__file_bucket_repo.get_file(self.__batch_key(uuid_token, "state.json"))
+        except Exception:
+            return None
+        return BatchGenerateState.model_validate_json(content)
+
     async def delete_file(self, id_file: int):
         file = await self.__file_repo.delete(id_file)
-        await self.__file_bucket_repo.delete_file(file.file_name)
+        if not file.file_name.startswith("blobs/"):
+            # Бланк загружен до перехода на blob-хранилище
+            await self.__file_bucket_repo.delete_file(file.file_name)
+        await self.__blob_service.detach("blueprint", str(id_file))
 
     async def get_file_metadata(self, id_blueprint: int) -> GetFile:
         file = await self.__file_repo.get(id_blueprint)
@@ -148,14 +272,16 @@ class FileService:
         file_entity = await self.__file_repo.get(id_blueprint)
         file_entity.name = file_name
         if file is not None:
+            max_size = settings.upload_max_size_blueprint * 1024 * 1024
+            blob, _ = await self.__blob_service.attach_upload("blueprint",
+                                                              str(id_blueprint),
+                                                              "file",
+                                                              file,
+                                                              max_size)
+            if not file_entity.file_name.startswith("blobs/"):
+                await self.__file_bucket_repo.delete_file(file_entity.file_name)
+            file_entity.file_name = blob.file_key
             file_entity.size = float(round(file.size / 1024, 2))
 
-            await self.__file_bucket_repo.delete_file(file_entity.file_name)
-
-            content = await file.read()
-            await self.__file_bucket_repo.upload_file(file_entity.file_name,
-                                                      content,
-                                                      file.content_type)
-
         await self.__file_repo.update(file_entity)
 
@@ -4,10 +4,7 @@
 import json
 import os
 from typing import List, Dict, Any, Optional
-from datetime import datetime, timedelta
-
-from langchain_openai import ChatOpenAI
-
+from datetime import date, datetime, timedelta
 
 from langchain_core.prompts import ChatPromptTemplate, SystemMessagePromptTemplate, HumanMessagePromptTemplate
 from langchain_core.output_parsers import StrOutputParser, JsonOutputParser
@@ -17,8 +14,11 @@ from ..repositories.LogMessageErrorRepository import LogMessageErrorRepository
 from ..repositories.SummarizeRepository import SummarizeRepository
 from ..repositories.EquipmentRepository import EquipmentRepository
 from ..repositories.ObjectRepository import ObjectRepository
-from ..tables import LogMessageError, Summarize
+from ..tables import LogMessageError
 from ..settings import settings
+from ..llm import create_llm
+from ..compaction import context_sections
+from ..partitions import add_months
 
 
 class LogAnalysisService:
@@ -37,23 +37,20 @@ class LogAnalysisService:
         self.object_repository = object_repository
         
         # Инициализация LLM через LangChain
-        self.llm = None
-        if settings.yandex_cloud_api_key:
-            if ChatOpenAI is None:
-                raise ValueError("ChatOpenAI не найден. Установите langchain-openai: pip install langchain-openai")
-            # Yandex Cloud поддерживает OpenAI-совместимый API
-            # Используем параметры для совместимости с Yandex Cloud
-            self.llm = ChatOpenAI(
-                model=settings.yandex_cloud_llm_model,
-                api_key=settings.yandex_cloud_api_key,
-                base_url="https://llm.api.cloud.yandex.net/v1",
-                default_headers={
-                    "x-folder-id": settings.yandex_cloud_folder_id
-                },
-                temperature=0.1,
-                reasoning_effort="low"
-            )
+        self.llm = create_llm()
     
+    @staticmethod
+    def _logs_since() -> datetime | None:
+        """
+        Начало окна необработанных логов: текущий и log_analysis_window_months
+        предыдущих месяцев – запросы читают только их секции. None – окно не
+        задано, анализ читает все необработанные логи
+        """
+        if settings.log_analysis_window_months is None:
+            return None
+        month = add_months(date.today().replace(day=1), -settings.log_analysis_window_months)
+        return datetime(month.year, month.month, 1)
+
     async def analyze_logs_for_object(self, uuid_object: str) -> Dict[str, Any]:
         """
         Анализирует логи для объекта
@@ -130,19 +127,19 @@ class LogAnalysisService:
         # Обрабатываем каждую группу оборудования
         for common_name, equipment_list in equipment_groups.items():
             group_count += 1
-            equipment_ids = [eq.id for eq in equipment_list]
+            equipment_uuids = [str(eq.uuid) for eq in equipment_list]
             equipment_names = [eq.name for eq in equipment_list]
             
             print(f"[Группа {group_count}/{total_groups}] Обработка: {common_name}")
             print(f"[Группа {group_count}/{total_groups}] Единиц оборудования в группе: {len(equipment_list)}")
-            print(f"[Группа {group_count}/{total_groups}] ID оборудования: {equipment_ids}")
+            print(f"[Группа {group_count}/{total_groups}] UUID оборудования: {equipment_uuids}")
             print(f"[Группа {group_count}/{total_groups}] Названия: {equipment_names}")
             
             # Анализируем логи для этой группы оборудования
             try:
                 result = await self._analyze_logs_for_equipment_group(
-                    object_entity.id,
-                    equipment_ids,
+                    str(object_entity.uuid),
+                    equipment_uuids,
                     common_name,
                     equipment_names
                 )
@@ -163,16 +160,16 @@ class LogAnalysisService:
     
     async def _analyze_logs_for_equipment(
         self,
-        id_object: int,
-        id_equipment: int,
+        uuid_object: str,
+        uuid_equipment: str,
         equipment_name: str
     ) -> Dict[str, Any]:
         """
         Анализирует логи для конкретного оборудования
         
         Args:
-            id_object: ID объекта
-            id_equipment: ID оборудования
+            uuid_object: UUID объекта
+            uuid_equipment: UUID оборудования
             equipment_name: Название оборудования
             
         Returns:
@@ -181,8 +178,9 @@ class LogAnalysisService:
         # Получаем необработанные логи
         print(f"  [Шаг 1/5] Получение необработанных логов...")
         logs = await self.log_repository.get_unprocessed_logs_by_object_and_equipment(
-            id_object,
-            id_equipment
+            uuid_object,
+            uuid_equipment,
+            self._logs_since()
         )
         
         if not logs:
@@ -196,17 +194,16 @@ class LogAnalysisService:
         
         # Проверяем и получаем Summarize для текущего месяца
         print(f"  [Шаг 2/5] Проверка Summarize для текущего месяца...")
-        current_month_summarize = await self.summarize_repository.get_by_object_and_equipment_and_month(
-            id_object,
-            id_equipment
-        )
+        month = date.today().replace(day=1)
+        # Контекст фиксированного размера: текущий месяц, предыдущий квартал и год
+        sections = await context_sections(self.summarize_repository, uuid_object, uuid_equipment, month)
         
         summarize_text = None
-        if current_month_summarize:
-            print(f"  [Шаг 2/5] Найден Summarize для текущего месяца, будет использован для контекста")
-            summarize_text = current_month_summarize.text
+        if sections:
+            print(f"  [Шаг 2/5] Найдены сводки для контекста: {', '.join(title for title, _ in sections)}")
+            summarize_text = "\n\n".join(f"### {title}\n{text}" for title, text in sections)
         else:
-            print(f"  [Шаг 2/5] Summarize для текущего месяца не найден, будет создан новый")
+            print(f"  [Шаг 2/5] Сводок для контекста нет, Summarize текущего месяца будет создан")
         
         # Подготавливаем данные логов для LLM
         print(f"  [Шаг 3/5] Подготовка данных логов для LLM...")
@@ -236,42 +233,28 @@ class LogAnalysisService:
         
         # Сохраняем Summarize для текущего месяца
         print(f"  [Шаг 5/5] Сохранение результатов анализа...")
-        now = datetime.now()
-        month_start = datetime(now.year, now.month, 1)
-        
-        if current_month_summarize:
-            # Обновляем существующий Summarize текущего месяца
-            print(f"  [Шаг 5/5] Обновление существующего Summarize для текущего месяца")
-            current_month_summarize.text = analysis_result["text"]
-            current_month_summarize.metadata_equipment = analysis_result["metadata"]
-            current_month_summarize.datetime_end = now
-            await self.summarize_repository.update(current_month_summarize)
-            print(f"  [Шаг 5/5] Summarize обновлен")
-        else:
-            # Создаем новый Summarize для текущего месяца
-            print(f"  [Шаг 5/5] Создание нового Summarize для текущего месяца")
-            new_summarize = Summarize(
-                id_object=id_object,
-                id_equipment=id_equipment,
-                text=analysis_result["text"],
-                metadata_equipment=analysis_result["metadata"],
-                datetime_start=month_start,
-                datetime_end=now
-            )
-            await self.summarize_repository.add(new_summarize)
-            print(f"  [Шаг 5/5] Summarize создан")
+        # Создание или обновление – один INSERT ... ON CONFLICT по (объект, оборудование, месяц)
+        await self.summarize_repository.upsert_month(
+            uuid_object,
+            uuid_equipment,
+            month,
+            analysis_result["text"],
+            analysis_result["metadata"],
+            datetime.now()
+        )
+        print(f"  [Шаг 5/5] Summarize сохранен")
         
         # Помечаем логи как обработанные
         print(f"  [Шаг 5/5] Пометка логов как обработанных ({len(log_ids)} записей)...")
-        await self.log_repository.mark_logs_as_processed(log_ids)
+        await self.log_repository.mark_logs_as_processed(log_ids, min(log.create_at for log in logs))
         print(f"  [Шаг 5/5] Логи помечены как обработанные")
         
         return analysis_result
     
     async def _analyze_logs_for_equipment_group(
         self,
-        id_object: int,
-        equipment_ids: list[int],
+        uuid_object: str,
+        equipment_uuids: list[str],
         common_name: str,
         equipment_names: list[str]
     ) -> Dict[str, Any]:
@@ -279,8 +262,8 @@ class LogAnalysisService:
         Анализирует логи для группы оборудования
         
         Args:
-            id_object: ID объекта
-            equipment_ids: Список ID оборудования в группе
+            uuid_object: UUID объекта
+            equipment_uuids: Список UUID оборудования в группе
             common_name: Общее название группы
             equipment_names: Список названий оборудования в группе
             
@@ -289,9 +272,10 @@ class LogAnalysisService:
         """
         # Получаем необработанные логи для группы оборудования
         print(f"  [Шаг 1/5] Получение необработанных логов для группы оборудования...")
-        logs = await self.log_repository.get_unprocessed_logs_by_object_and_equipment_ids(
-            id_object,
-            equipment_ids
+        logs = await self.log_repository.get_unprocessed_logs_by_object_and_equipment_uuids(
+            uuid_object,
+            equipment_uuids,
+            self._logs_since()
         )
         
         if not logs:
@@ -305,19 +289,18 @@ class LogAnalysisService:
         
         # Проверяем и получаем Summarize для текущего месяца
         # Используем первое оборудование из группы для Summarize
-        primary_equipment_id = equipment_ids[0]
-        print(f"  [Шаг 2/5] Проверка Summarize для текущего месяца (по оборудованию ID: {primary_equipment_id})...")
-        current_month_summarize = await self.summarize_repository.get_by_object_and_equipment_and_month(
-            id_object,
-            primary_equipment_id
-        )
+        primary_equipment_uuid = equipment_uuids[0]
+        print(f"  [Шаг 2/5] Проверка Summarize для текущего месяца (по оборудованию UUID: {primary_equipment_uuid})...")
+        month = date.today().replace(day=1)
+        # Контекст фиксированного размера: текущий месяц, предыдущий квартал и год
+        sections = await context_sections(self.summarize_repository, uuid_object, primary_equipment_uuid, month)
         
         summarize_text = None
-        if current_month_summarize:
-            print(f"  [Шаг 2/5] Найден Summarize для текущего месяца, будет использован для контекста")
-            summarize_text = current_month_summarize.text
+        if sections:
+            print(f"  [Шаг 2/5] Найдены сводки для контекста: {', '.join(title for title, _ in sections)}")
+            summarize_text = "\n\n".join(f"### {title}\n{text}" for title, text in sections)
         else:
-            print(f"  [Шаг 2/5] Summarize для текущего месяца не найден, будет создан новый")
+            print(f"  [Шаг 2/5] Сводок для контекста нет, Summarize текущего месяца будет создан")
         
         # Подготавливаем данные логов для LLM
         print(f"  [Шаг 3/5] Подготовка данных логов для LLM...")
@@ -331,7 +314,7 @@ class LogAnalysisService:
                 "class_log_int": log.class_log_int,
                 "entity_equipment": log.entity_equipment,
                 "number_equipment": log.number_equipment,
-                "equipment_id": log.id_equipment,
+                "equipment_uuid": str(log.uuid_equipment) if log.uuid_equipment else None,
             })
             log_ids.append(log.id)
         
@@ -353,34 +336,20 @@ class LogAnalysisService:
         
         # Сохраняем Summarize для текущего месяца
         print(f"  [Шаг 5/5] Сохранение результатов анализа...")
-        now = datetime.now()
-        month_start = datetime(now.year, now.month, 1)
-        
-        if current_month_summarize:
-            # Обновляем существующий Summarize текущего месяца
-            print(f"  [Шаг 5/5] Обновление существующего Summarize для текущего месяца")
-            current_month_summarize.text = analysis_result["text"]
-            current_month_summarize.metadata_equipment = analysis_result["metadata"]
-            current_month_summarize.datetime_end = now
-            await self.summarize_repository.update(current_month_summarize)
-            print(f"  [Шаг 5/5] Summarize обновлен")
-        else:
-            # Создаем новый Summarize для текущего месяца
-            print(f"  [Шаг 5/5] Создание нового Summarize для текущего месяца")
-            new_summarize = Summarize(
-                id_object=id_object,
-                id_equipment=primary_equipment_id,
-                text=analysis_result["text"],
-                metadata_equipment=analysis_result["metadata"],
-                datetime_start=month_start,
-                datetime_end=now
-            )
-            await self.summarize_repository.add(new_summarize)
-            print(f"  [Шаг 5/5] Summarize создан")
+        # Создание или обновление – один INSERT ... ON CONFLICT по (объект, оборудование, месяц)
+        await self.summarize_repository.upsert_month(
+            uuid_object,
+            primary_equipment_uuid,
+            month,
+            analysis_result["text"],
+            analysis_result["metadata"],
+            datetime.now()
+        )
+        print(f"  [Шаг 5/5] Summarize сохранен")
         
         # Помечаем логи как обработанные
         print(f"  [Шаг 5/5] Пометка логов как обработанных ({len(log_ids)} записей)...")
-        await self.log_repository.mark_logs_as_processed(log_ids)
+        await self.log_repository.mark_logs_as_processed(log_ids, min(log.create_at for log in logs))
         print(f"  [Шаг 5/5] Логи помечены как обработанные")
         
         return analysis_result
@@ -397,7 +366,7 @@ class LogAnalysisService:
         
         Args:
             logs: Список логов
-            summarize_text: Текст предыдущего Summarize (если есть)
+            summarize_text: Сводки текущего месяца, квартала и года (если есть)
             common_name: Общее название группы оборудования
             equipment_names: Список названий оборудования в группе
             
@@ -453,7 +422,7 @@ class LogAnalysisService:
         # Формируем секцию Summarize
         summarize_section = ""
         if summarize_text:
-            summarize_section = f"\nПРЕДЫДУЩИЙ АНАЛИЗ (Summarize):\n{summarize_text}\n\nИспользуй этот анализ для контекста."
+            summarize_section = f"\nПРЕДЫДУЩИЕ СВОДКИ (Summarize):\n{summarize_text}\n\nИспользуй эти сводки для контекста и оценки тенденций."
         
         # Преобразуем логи в JSON
         logs_json = json.dumps(logs, ensure_ascii=False, indent=2, default=str)
@@ -510,7 +479,7 @@ class LogAnalysisService:
         
         Args:
             logs: Список логов
-            summarize_text: Текст предыдущего Summarize (если есть)
+            summarize_text: Сводки текущего месяца, квартала и года (если есть)
             equipment_name: Название оборудования
             
         Returns:
@@ -559,7 +528,7 @@ class LogAnalysisService:
         # Формируем секцию Summarize
         summarize_section = ""
         if summarize_text:
-            summarize_section = f"\nПРЕДЫДУЩИЙ АНАЛИЗ (Summarize):\n{summarize_text}\n\nИспользуй этот анализ для контекста."
+            summarize_section = f"\nПРЕДЫДУЩИЕ СВОДКИ (Summarize):\n{summarize_text}\n\nИспользуй эти сводки для контекста и оценки тенденций."
         
         # Преобразуем логи в JSON
         logs_json = json.dumps(logs, ensure_ascii=False, indent=2, default=str)
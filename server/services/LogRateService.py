@@ -0,0 +1,113 @@
+"""
+Сервис частоты логов (log_messages_error) по интервалам времени
+"""
+import math
+from typing import Optional
+from datetime import timedelta
+
+import numpy as np
+
+from ..repositories.LogMessageErrorRepository import LogMessageErrorRepository
+from ..models.LogMessageError import LogRates, LogRateSeries
+from ..settings import settings
+from .LogSearchService import parse_uuid, search_period
+
+
+def ewma_scores(counts: np.ndarray, alpha: float) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Базовая линия и z-оценки для матрицы counts (ряды x интервалы), все ряды
+    сразу. Ожидание интервала t – EWMA среднего и дисперсии по интервалам до
+    t, поэтому всплеск не гасит собственную оценку. Дисперсия не меньше
+    ожидания (как у пуассоновского потока) и единицы: редкие одиночные логи
+    на пустом фоне не считаются всплеском
+    """
+    counts = np.asarray(counts, dtype=float)
+    baseline = np.zeros_like(counts)
+    score = np.zeros_like(counts)
+    if counts.shape[1] == 0:
+        return baseline, score
+
+    mean = counts[:, 0].copy()
+    var = np.zeros(counts.shape[0])
+    baseline[:, 0] = mean
+    for t in range(1, counts.shape[1]):
+        x = counts[:, t]
+        diff = x - mean
+        baseline[:, t] = mean
+        score[:, t] = diff / np.sqrt(np.maximum(var, np.maximum(mean, 1.0)))
+        mean = mean + alpha * diff
+        var = (1 - alpha) * (var + alpha * diff * diff)
+    return baseline, score
+
+
+class LogRateService:
+    """Сервис частоты логов"""
+
+    def __init__(self, log_repository: LogMessageErrorRepository):
+        self.log_repository = log_repository
+
+    async def get_rates(
+        self,
+        uuid_object: str,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        bucket_minutes: int = 60,
+        uuid_equipment: Optional[str] = None
+    ) -> LogRates:
+        """
+        Число логов объекта по интервалам bucket_minutes для каждой пары
+        оборудование + класс, с базовой линией и всплесками
+
+        Returns:
+            Ряды, от самого сильного всплеска к слабому
+        """
+        uuid_object = parse_uuid(uuid_object, "uuid_object")
+        if uuid_equipment is not None:
+            uuid_equipment = parse_uuid(uuid_equipment, "uuid_equipment")
+        start, end = search_period(start_date, end_date, settings.log_rates_max_days, default=timedelta(days=7))
+
+        bucket = timedelta(minutes=bucket_minutes)
+        buckets = math.ceil((end - start) / bucket)
+        if buckets > settings.log_rates_max_buckets:
+            raise ValueError(f"Слишком много интервалов ({buckets}): увеличьте bucket_minutes "
+                             f"или сократите период (не больше {settings.log_rates_max_buckets})")
+
+        rows = await self.log_repository.get_rates(uuid_object, start, end, bucket, uuid_equipment)
+
+        keys: dict[tuple, int] = {}
+        names: dict[tuple, str | None] = {}
+        series_index = np.empty(len(rows), dtype=np.int64)
+        bucket_index = np.empty(len(rows), dtype=np.int64)
+        values = np.empty(len(rows), dtype=np.int64)
+        for i, row in enumerate(rows):
+            key = (str(row.uuid_equipment) if row.uuid_equipment else None, row.class_log_int)
+            series_index[i] = keys.setdefault(key, len(keys))
+            names[key] = row.equipment_name
+            bucket_index[i] = (row.bucket - start) // bucket
+            values[i] = row.count
+
+        counts = np.zeros((len(keys), buckets), dtype=np.int64)
+        np.add.at(counts, (series_index, bucket_index), values)
+
+        baseline, score = ewma_scores(counts, settings.log_rates_alpha)
+        bursts = (score >= settings.log_rates_burst_z) & (counts >= settings.log_rates_burst_min_count)
+        peak = score.max(axis=1) if buckets else np.zeros(len(keys))
+
+        series = []
+        for (uuid, class_log_int), i in sorted(keys.items(), key=lambda item: -peak[item[1]]):
+            series.append(LogRateSeries(
+                uuid_equipment=uuid,
+                name=names[(uuid, class_log_int)],
+                class_log_int=class_log_int,
+                total=int(counts[i].sum()),
+                counts=counts[i].tolist(),
+                baseline=np.round(baseline[i], 2).tolist(),
+                score=np.round(score[i], 2).tolist(),
+                bursts=np.flatnonzero(bursts[i]).tolist()
+            ))
+        return LogRates(
+            start=start,
+            bucket_seconds=int(bucket.total_seconds()),
+            buckets=buckets,
+            series=series
+        )
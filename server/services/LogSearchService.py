@@ -0,0 +1,111 @@
+"""
+Сервис поиска логов (log_messages_error)
+"""
+from uuid import UUID
+from typing import Optional, List
+from datetime import datetime, timedelta
+
+from ..repositories.LogMessageErrorRepository import LogMessageErrorRepository
+from ..models.LogMessageError import LogSearchResult
+from ..settings import settings
+from .SummarizeService import encode_cursor, decode_cursor
+
+
+# Короче трёх символов подстрока не использует триграммный индекс
+MIN_QUERY_LENGTH = 3
+
+
+def parse_moment(value: str, name: str) -> datetime:
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Неверный формат {name}: {value}. Используйте YYYY-MM-DD или YYYY-MM-DDTHH:MM:SS")
+
+
+def parse_uuid(value: str, name: str) -> str:
+    try:
+        return str(UUID(value))
+    except ValueError:
+        raise ValueError(f"Неверный {name}: {value}")
+
+
+def search_period(start_date: Optional[str],
+                  end_date: Optional[str],
+                  max_days: int,
+                  now: Optional[datetime] = None,
+                  default: timedelta = timedelta(days=1)) -> tuple[datetime, datetime]:
+    """
+    Период поиска [start, end): по умолчанию default до текущего момента.
+    Период не длиннее max_days дней – запрос читает ограниченное число секций
+    """
+    end = parse_moment(end_date, "end_date") if end_date else (now or datetime.now())
+    start = parse_moment(start_date, "start_date") if start_date else end - default
+    if start >= end:
+        raise ValueError("start_date должна быть раньше end_date")
+    if end - start > timedelta(days=max_days):
+        raise ValueError(f"Период поиска не может быть длиннее {max_days} дней")
+    return start, end
+
+
+class LogSearchService:
+    """Сервис поиска логов"""
+
+    def __init__(self, log_repository: LogMessageErrorRepository):
+        self.log_repository = log_repository
+
+    async def search(
+        self,
+        uuid_object: str,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        uuid_equipment: Optional[str] = None,
+        class_log_int: Optional[List[int]] = None,
+        query: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50
+    ) -> tuple[LogSearchResult, Optional[str]]:
+        """
+        Поиск логов объекта по периоду, оборудованию, классу и подстроке сообщения
+
+        Returns:
+            Страница с фасетами и курсор следующей страницы (None – страница последняя)
+        """
+        uuid_object = parse_uuid(uuid_object, "uuid_object")
+        if uuid_equipment is not None:
+            uuid_equipment = parse_uuid(uuid_equipment, "uuid_equipment")
+        start, end = search_period(start_date, end_date, settings.log_search_max_days)
+
+        query = query.strip() if query else None
+        if query and len(query) < MIN_QUERY_LENGTH:
+            raise ValueError(f"Строка поиска должна быть не короче {MIN_QUERY_LENGTH} символов")
+
+        after = decode_cursor(cursor) if cursor else None
+
+        # Лишняя строка показывает, есть ли следующая страница
+        row = await self.log_repository.search(
+            uuid_object,
+            start,
+            end,
+            uuid_equipment=uuid_equipment,
+            class_log_int=class_log_int,
+            text_query=query,
+            after=after,
+            limit=limit + 1,
+            facet_limit=settings.log_search_facet_limit,
+            facet_size=settings.log_search_facet_size
+        )
+        items = row.items or []
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            last = items[-1]
+            next_cursor = encode_cursor(datetime.fromisoformat(last["create_at"]), last["id"])
+
+        result = LogSearchResult(
+            items=items,
+            by_class_log_int=row.by_class_log_int or {},
+            by_equipment=row.by_equipment or [],
+            facet_rows=row.facet_rows,
+            facets_truncated=row.facet_rows >= settings.log_search_facet_limit
+        )
+        return result, next_cursor
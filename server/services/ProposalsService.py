@@ -6,6 +6,9 @@ from ..repositories import (ClaimRepository,
                             ProposalsRepository,
                             UserRepository,
                             ObjectRepository)
+from .EmailService import EmailService
+
+from uuid import uuid4
 
 
 class ProposalsService:
@@ -13,11 +16,13 @@ class ProposalsService:
                  claim_repo: ClaimRepository = Depends(),
                  proposals_repo: ProposalsRepository = Depends(),
                  user_repo: UserRepository = Depends(),
-                 object_repo: ObjectRepository = Depends()):
+                 object_repo: ObjectRepository = Depends(),
+                 email_service: EmailService = Depends()):
         self.__claim_repo: ClaimRepository = claim_repo
         self.__proposals_repo: ProposalsRepository = proposals_repo
         self.__user_repo: UserRepository = user_repo
         self.__object_repo: ObjectRepository = object_repo
+        self.__email_service: EmailService = email_service
 
         self.__count_item: int = 20
 
@@ -121,7 +126,12 @@ class ProposalsService:
 
         state_claim = await self.__claim_repo.get_state_claim_by_name("under_consideration")
 
+        user_model = await self.__user_repo.get_user_by_uuid(str(user.uuid))
+        if user_model is None:
+            raise ValueError(f"Пользователь с UUID {user.uuid} не найден в микросервисе")
+
         entity = TechnicalProposals(
+            uuid=uuid4(),
             id_state_claim=state_claim.id,
             uuid_object=model.uuid_object,
             user_uuid=user.uuid,
@@ -129,20 +139,15 @@ class ProposalsService:
             additional_material=model.additional_material,
             name=model.name,
         )
-        await self.__proposals_repo.add(entity)
-
-        user_model = await self.__user_repo.get_user_by_uuid(str(user.uuid))
-        if user_model is None:
-            raise ValueError(f"Пользователь с UUID {user.uuid} не найден в микросервисе")
 
         state_claim_model = StateClaimModel(
-            id=entity.state_claim.id,
-            name=entity.state_claim.name,
-            description=entity.state_claim.description,
+            id=state_claim.id,
+            name=state_claim.name,
+            description=state_claim.description,
         )
         object_resp = await self.__object_repo.get_by_uuid(model.uuid_object)
 
-        return GetTechnicalProposals(
+        proposal = GetTechnicalProposals(
             uuid=entity.uuid,
             name=entity.name,
             offer=entity.offer,
@@ -155,6 +160,17 @@ class ProposalsService:
             object=object_resp,
         )
 
+        # Предложение и письмо о нём сохраняются одним commit
+        await self.__email_service.send_by_context(
+            "proposals_add",
+            "Добавление нового предложения",
+            "proposals_edit.html",
+            True,
+            email_context={"proposal": proposal},
+        )
+        await self.__proposals_repo.add(entity)
+        return proposal
+
     async def get(self, uuid_entity: str) -> GetTechnicalProposals | None:
         entity = await self.__proposals_repo.get_by_uuid(uuid_entity)
         if entity is None:
@@ -211,5 +227,17 @@ class ProposalsService:
             state_claim_model = await self.__claim_repo.get_state_claim_by_name("under_development")
         entity.id_state_claim = state_claim_model.id
 
+        # Связь состояния перечитывается, чтобы письмо показало новое состояние
+        await self.__proposals_repo.refresh(entity)
+        proposal = await self.get(uuid)
+        await self.__email_service.send_by_context(
+            "proposals_add",
+            "Предложение было рассмотрено",
+            "proposals_edit.html",
+            True,
+            email_context={"proposal": proposal},
+            options_user=[proposal.user],
+        )
+
         await self.__proposals_repo.add(entity)
         return entity
\ No newline at end of file
@@ -1,6 +1,7 @@
 from fastapi import Depends
 from typing import Optional, List
 from uuid import UUID
+import asyncio
 import csv
 import io
 from datetime import datetime
@@ -34,11 +35,19 @@ class StatisticService:
         self.__object_repo: ObjectRepository = object_repo
         self.__type_brake_repo: TypeBrakeRepository = type_brake_repo
 
-    async def _resolve_object_names(self, uuid_list: List[str]) -> dict[str, str]:
-        """Возвращает словарь uuid -> имя объекта (из микросервиса) или uuid как fallback."""
-        result: dict[str, str] = {}
-        for u in uuid_list:
-            obj = await self.__object_repo.get_by_uuid(u)
+    async def _resolve_object_names(self, rows) -> dict[str, str]:
+        """
+        Возвращает словарь uuid -> имя объекта. Имена приходят из SQL (локальное
+        зеркало справочника); в микросервис идут только объекты, которых в зеркале
+        ещё нет, – параллельно. Если объект не найден, вместо имени остаётся uuid.
+        """
+        result: dict[str, str] = {
+            str(row.object_uuid): row.object_name for row in rows if row.object_name is not None
+        }
+        missing = list({str(row.object_uuid) for row in rows
+                        if row.object_name is None and row.object_uuid is not None})
+        objects = await asyncio.gather(*[self.__object_repo.get_by_uuid(u) for u in missing])
+        for u, obj in zip(missing, objects):
             result[u] = obj.name if obj else u
         return result
 
@@ -123,8 +132,7 @@ class StatisticService:
             sort_order=sort_order_value
         )
 
-        unique_uuids = list({str(stat.object_uuid) for stat in statistics})
-        name_by_uuid = await self._resolve_object_names(unique_uuids)
+        name_by_uuid = await self._resolve_object_names(statistics)
         objects_statistic = [
             ObjectStatistic(
                 object_uuid=str(stat.object_uuid),
@@ -186,8 +194,7 @@ class StatisticService:
             sort_order=sort_order_value
         )
 
-        unique_uuids = list({str(stat.object_uuid) for stat in statistics})
-        name_by_uuid = await self._resolve_object_names(unique_uuids)
+        name_by_uuid = await self._resolve_object_names(statistics)
         months_dict = {}
         for stat in statistics:
             month = stat.month
@@ -253,8 +260,7 @@ class StatisticService:
             sort_order=sort_order_value,
         )
 
-        unique_uuids = list({str(stat.object_uuid) for stat in statistics})
-        name_by_uuid = await self._resolve_object_names(unique_uuids)
+        name_by_uuid = await self._resolve_object_names(statistics)
         items = [
             ClassBrakeStatisticItem(
                 object_uuid=str(stat.object_uuid),
@@ -312,8 +318,7 @@ class StatisticService:
             sort_order=sort_order_value,
         )
 
-        unique_uuids = list({str(stat.object_uuid) for stat in statistics})
-        name_by_uuid = await self._resolve_object_names(unique_uuids)
+        name_by_uuid = await self._resolve_object_names(statistics)
         items = [
             TypeBrakeStatisticItem(
                 object_uuid=str(stat.object_uuid),
@@ -373,8 +378,7 @@ class StatisticService:
             sort_order=sort_order_value,
         )
 
-        unique_uuids = list({str(stat.object_uuid) for stat in statistics})
-        name_by_uuid = await self._resolve_object_names(unique_uuids)
+        name_by_uuid = await self._resolve_object_names(statistics)
         items = [
             MonthClassBrakeStatisticItem(
                 month=stat.month,
@@ -529,8 +533,7 @@ class StatisticService:
             list_object=list_object_uuid,
         )
 
-        unique_object_uuids = list({str(row.object_name) for row in export_data if row.object_name is not None})
-        export_name_by_uuid = await self._resolve_object_names(unique_object_uuids)
+        export_name_by_uuid = await self._resolve_object_names(export_data)
 
         # Словарь для кэширования equipment и signs по accident_id
         equipment_cache = {}
@@ -603,8 +606,8 @@ class StatisticService:
                 row.accident_damaged_equipment or "",
                 row.accident_additional_material or "",
                 "Да" if row.accident_is_deleted else "Нет",
-                # Object (имя из микросервиса или UUID как fallback)
-                export_name_by_uuid.get(str(row.object_name), str(row.object_name) if row.object_name else ""),
+                # Object (имя из зеркала справочника или UUID как fallback)
+                export_name_by_uuid.get(str(row.object_uuid), str(row.object_uuid) if row.object_uuid else ""),
                 # TypeBrake
                 row.type_brake_code or "",
                 row.type_brake_name or "",
@@ -0,0 +1,134 @@
+from fastapi import Depends
+from starlette.concurrency import run_in_threadpool
+
+from ..models.Files import StorageGcReport
+from ..repositories import StorageGcRepository, FileBucketRepository
+from ..settings import settings
+from .FileService import BATCH_PREFIX
+
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from uuid import UUID
+import time
+
+
+class StorageGcService:
+    """
+    Сборщик мусора хранилища: объекты бакета document и локальные файлы,
+    на которые не ссылается ни одна запись в базе.
+
+    Порядок: сначала чистятся слоты удалённых владельцев и blob без ссылок,
+    затем бакет обходится страницами по storage_gc_page_size ключей, и для
+    каждой страницы ссылки проверяются одним запросом. Объекты моложе
+    storage_gc_grace часов пропускаются – это могут быть загрузки, запись
+    о которых ещё не попала в базу. Архивы пакетной генерации (BATCH_PREFIX)
+    в базе не учитываются и удаляются только по сроку batch_artifact_ttl.
+    В пробном прогоне (dry_run) транзакция
+    откатывается и ничего не удаляется, отчёт показывает, что было бы удалено.
+    """
+
+    def __init__(self, gc_repo: StorageGcRepository = Depends()):
+        self.__gc_repo: StorageGcRepository = gc_repo
+        self.__file_repo: FileBucketRepository = FileBucketRepository("document")
+
+    async def collect(self, dry_run: bool = True) -> StorageGcReport:
+        report = StorageGcReport(dry_run=dry_run)
+        start = time.perf_counter()
+        older_than = datetime.now(timezone.utc) - timedelta(hours=settings.storage_gc_grace)
+
+        try:
+            report.orphan_slots = await self.__gc_repo.delete_orphan_slots()
+            report.released_blobs = await self.__gc_repo.delete_unreferenced_blobs(older_than)
+            if not dry_run:
+                # Объекты удаляются только после того, как база перестала на них ссылаться
+                await self.__gc_repo.commit()
+
+            await self.__collect_bucket(report, older_than, dry_run)
+            await self.__collect_local(report, older_than, dry_run)
+        finally:
+            if dry_run:
+                await self.__gc_repo.rollback()
+
+        report.elapsed = round(time.perf_counter() - start, 3)
+        if report.elapsed > 0:
+            report.objects_per_second = round((report.scanned + report.local_scanned) / report.elapsed, 1)
+        return report
+
+    async def __collect_bucket(self, report: StorageGcReport, older_than: datetime, dry_run: bool):
+        artifacts_before = None
+        if settings.batch_artifact_ttl is not None:
+            artifacts_before = datetime.now(timezone.utc) - timedelta(hours=settings.batch_artifact_ttl)
+
+        async for page in self.__file_repo.iter_object_pages(page_size=settings.storage_gc_page_size):
+            report.scanned += len(page)
+            report.scanned_bytes += sum(obj.size or 0 for obj in page)
+
+            candidates = {}
+            expired = []
+            for obj in page:
+                if obj.last_modified is None:
+                    continue
+                if obj.object_name.startswith(BATCH_PREFIX):
+                    if artifacts_before is not None and obj.last_modified < artifacts_before:
+                        expired.append(obj.object_name)
+                elif obj.last_modified < older_than:
+                    candidates[obj.object_name] = obj
+            report.expired_artifacts += len(expired)
+
+            orphans = []
+            if candidates:
+                referenced = await self.__gc_repo.get_referenced_keys(list(candidates))
+                orphans = [file_key for file_key in candidates if file_key not in referenced]
+                report.orphans += len(orphans)
+                report.orphan_bytes += sum(candidates[file_key].size or 0 for file_key in orphans)
+
+            orphans += expired
+            if orphans and not dry_run:
+                failed = await self.__file_repo.remove_objects(orphans)
+                report.failed.extend(failed)
+                report.deleted += len(orphans) - len(failed)
+
+    async def __collect_local(self, report: StorageGcReport, older_than: datetime, dry_run: bool):
+        """
+        Локальные остатки: временные файлы get_and_save_file в files/ и
+        вложения в static/<объект>/<uuid аварии>/ у аварий, которых больше нет.
+        """
+        cutoff = older_than.timestamp()
+        orphans = []
+
+        files_dir = Path(settings.root_path, "files")
+        if files_dir.is_dir():
+            for path in files_dir.iterdir():
+                report.local_scanned += 1
+                if path.is_file() and path.stat().st_mtime < cutoff:
+                    orphans.append(path)
+
+        by_accident: dict[UUID, list[Path]] = defaultdict(list)
+        static_dir = Path(settings.root_path, "static")
+        if static_dir.is_dir():
+            for path in static_dir.glob("*/*/*"):
+                if not path.is_file():
+                    continue
+                report.local_scanned += 1
+                try:
+                    uuid_accident = UUID(path.parent.name)
+                except ValueError:
+                    continue
+                if path.stat().st_mtime < cutoff:
+                    by_accident[uuid_accident].append(path)
+
+        if by_accident:
+            existing = await self.__gc_repo.get_existing_accidents(list(by_accident))
+            for uuid_accident, paths in by_accident.items():
+                if uuid_accident not in existing:
+                    orphans.extend(paths)
+
+        report.local_orphans = len(orphans)
+        if orphans and not dry_run:
+            await run_in_threadpool(self.__unlink, orphans)
+
+    @staticmethod
+    def __unlink(paths: list[Path]):
+        for path in paths:
+            path.unlink(missing_ok=True)
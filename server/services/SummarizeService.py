@@ -1,16 +1,38 @@
 """
 Сервис для работы с Summarize
 """
+import base64
 from typing import Optional, List
-from datetime import datetime
+from datetime import date, datetime, timedelta
 
-from ..repositories.SummarizeRepository import SummarizeRepository
+from ..repositories.SummarizeRepository import SummarizeRepository, TAG_KEYS
 from ..repositories.EquipmentRepository import EquipmentRepository
 from ..repositories.ObjectRepository import ObjectRepository
-from ..models.Summarize import GetSummarize
+from ..models.Summarize import GetSummarize, GetSummarizeItem, GetSummarizeRollup
 from ..tables import Summarize
 
 
+def encode_cursor(datetime_start: datetime, id_summarize: int) -> str:
+    """Курсор страницы – позиция последней отданной строки"""
+    value = f"{datetime_start.isoformat()}|{id_summarize}"
+    return base64.urlsafe_b64encode(value.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        value = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        datetime_start, id_summarize = value.split("|")
+        return datetime.fromisoformat(datetime_start), int(id_summarize)
+    except ValueError:
+        raise ValueError(f"Неверный cursor: {cursor}")
+
+
+def summarize_etag(id_summarize: int, datetime_end: Optional[datetime]) -> str:
+    """Сводка меняется только upsert-ом, а он всегда обновляет datetime_end"""
+    version = int(datetime_end.timestamp() * 1_000_000) if datetime_end else 0
+    return f'"{id_summarize}-{version}"'
+
+
 class SummarizeService:
     """Сервис для работы с Summarize"""
     
@@ -62,48 +84,32 @@ class SummarizeService:
             except ValueError:
                 raise ValueError(f"Неверный формат end_date: {end_date}. Используйте YYYY-MM-DD")
         
-        # Получаем Summarize
+        # Получаем Summarize одним запросом
         summarize_list = await self.summarize_repository.get_by_object(
-            object_entity.id,
+            uuid_object,
             start_datetime,
             end_datetime
         )
-        
-        # Загружаем информацию об оборудовании для каждого Summarize
+
+        # Оборудование всех Summarize – одним batch-запросом (или из зеркала справочника)
+        equipment_uuids = list({str(i.uuid_equipment) for i in summarize_list if i.uuid_equipment})
+        equipment_list = await self.equipment_repository.get_equipment_by_uuid_set(equipment_uuids)
+        equipment_by_uuid = {str(e.uuid): e for e in equipment_list}
+
         result = []
-        equipment_cache = {}
-        
         for summarize in summarize_list:
-            # Получаем оборудование из кэша или БД
-            if summarize.id_equipment not in equipment_cache:
-                equipment = await self.equipment_repository.get_equipment_by_ids([summarize.id_equipment])
-                if equipment:
-                    equipment_cache[summarize.id_equipment] = equipment[0]
-                else:
-                    equipment_cache[summarize.id_equipment] = None
-            
-            equipment = equipment_cache[summarize.id_equipment]
-            
-            # Создаем модель ответа
-            from ..models.Equipment import GetEquipment
-            equipment_model = None
-            equipment_uuid = None
-            equipment_name = None
-            
-            if equipment:
-                equipment_model = GetEquipment.model_validate(equipment, from_attributes=True)
-                equipment_uuid = str(equipment.uuid)
-                equipment_name = equipment.name
-            
+            equipment = equipment_by_uuid.get(str(summarize.uuid_equipment))
+
             summarize_model = GetSummarize.model_validate(summarize, from_attributes=True)
-            summarize_model.equipment = equipment_model
-            summarize_model.equipment_uuid = equipment_uuid
-            summarize_model.equipment_name = equipment_name
-            
+            if equipment:
+                summarize_model.equipment = equipment
+                summarize_model.equipment_uuid = str(equipment.uuid)
+                summarize_model.equipment_name = equipment.name
+
             result.append(summarize_model)
-        
+
         return result
-    
+
     async def get_summarize_by_object_and_equipment(
         self,
         uuid_object: str,
@@ -150,22 +156,165 @@ class SummarizeService:
         
         # Получаем Summarize
         summarize_list = await self.summarize_repository.get_by_object_and_equipment(
-            object_entity.id,
-            equipment.id,
+            uuid_object,
+            uuid_equipment,
             start_datetime,
             end_datetime
         )
         
         # Создаем модели ответа
-        from ..models.Equipment import GetEquipment
-        equipment_model = GetEquipment.model_validate(equipment, from_attributes=True)
-        
         result = []
         for summarize in summarize_list:
             summarize_model = GetSummarize.model_validate(summarize, from_attributes=True)
-            summarize_model.equipment = equipment_model
+            summarize_model.equipment = equipment
             summarize_model.equipment_uuid = str(equipment.uuid)
             summarize_model.equipment_name = equipment.name
             result.append(summarize_model)
         
         return result
+
+    async def get_summarize_page(
+        self,
+        uuid_object: str,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50
+    ) -> tuple[List[GetSummarizeItem], Optional[str]]:
+        """
+        Страница списка Summarize объекта без text: даты, оборудование и теги
+
+        Returns:
+            Элементы страницы и курсор следующей страницы (None – страница последняя)
+        """
+        object_entity = await self.object_repository.get_by_uuid(uuid_object)
+        if not object_entity:
+            raise ValueError(f"Объект с UUID {uuid_object} не найден")
+
+        start_datetime = None
+        end_datetime = None
+
+        if start_date:
+            try:
+                start_datetime = datetime.strptime(start_date, "%Y-%m-%d")
+            except ValueError:
+                raise ValueError(f"Неверный формат start_date: {start_date}. Используйте YYYY-MM-DD")
+
+        if end_date:
+            try:
+                end_datetime = datetime.strptime(end_date, "%Y-%m-%d")
+            except ValueError:
+                raise ValueError(f"Неверный формат end_date: {end_date}. Используйте YYYY-MM-DD")
+
+        after = decode_cursor(cursor) if cursor else None
+
+        # Лишняя строка показывает, есть ли следующая страница
+        rows = await self.summarize_repository.get_page_by_object(
+            uuid_object,
+            start_datetime,
+            end_datetime,
+            after,
+            limit + 1
+        )
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].datetime_start, rows[-1].id)
+
+        # Имена оборудования – из зеркала справочника, в микросервис идут только промахи
+        missing = list({str(row.uuid_equipment) for row in rows
+                        if row.equipment_name is None and row.uuid_equipment is not None})
+        names = {}
+        if missing:
+            equipment_list = await self.equipment_repository.get_equipment_by_uuid_set(missing)
+            names = {str(e.uuid): e.name for e in equipment_list}
+
+        result = []
+        for row in rows:
+            result.append(GetSummarizeItem(
+                uuid=row.uuid,
+                uuid_object=row.uuid_object,
+                uuid_equipment=row.uuid_equipment,
+                datetime_start=row.datetime_start,
+                datetime_end=row.datetime_end,
+                equipment_name=row.equipment_name or names.get(str(row.uuid_equipment)),
+                tags={key: getattr(row, key) for key in TAG_KEYS if getattr(row, key) is not None}
+            ))
+
+        return result, next_cursor
+
+    async def get_summarize_etag(self, uuid: str) -> Optional[str]:
+        """ETag Summarize без чтения text; None – сводки нет"""
+        version = await self.summarize_repository.get_version(uuid)
+        if version is None:
+            return None
+        return summarize_etag(version.id, version.datetime_end)
+
+    async def get_summarize(self, uuid: str) -> tuple[GetSummarize, str]:
+        """Summarize целиком (text и metadata_equipment) и его ETag"""
+        summarize = await self.summarize_repository.get_by_uuid(uuid)
+        if not summarize:
+            raise ValueError(f"Summarize с UUID {uuid} не найден")
+
+        summarize_model = GetSummarize.model_validate(summarize, from_attributes=True)
+        if summarize.uuid_equipment:
+            equipment = await self.equipment_repository.get_by_uuid(str(summarize.uuid_equipment))
+            if equipment:
+                summarize_model.equipment = equipment
+                summarize_model.equipment_uuid = str(equipment.uuid)
+                summarize_model.equipment_name = equipment.name
+
+        return summarize_model, summarize_etag(summarize.id, summarize.datetime_end)
+
+    async def get_rollups(
+        self,
+        uuid_object: str,
+        period: str,
+        uuid_equipment: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> List[GetSummarizeRollup]:
+        """
+        Свёртки Summarize объекта за кварталы или годы – историю читают из них,
+        а не собирают из месячных сводок
+
+        Args:
+            period: quarter или year
+            start_date, end_date: период в формате YYYY-MM-DD; свёртка попадает
+                в выборку, если её период начинается в [start_date, end_date]
+        """
+        if period not in ("quarter", "year"):
+            raise ValueError(f"Неверный period: {period}. Используйте quarter или year")
+
+        object_entity = await self.object_repository.get_by_uuid(uuid_object)
+        if not object_entity:
+            raise ValueError(f"Объект с UUID {uuid_object} не найден")
+
+        start = None
+        end = None
+
+        if start_date:
+            try:
+                start = datetime.strptime(start_date, "%Y-%m-%d").date()
+            except ValueError:
+                raise ValueError(f"Неверный формат start_date: {start_date}. Используйте YYYY-MM-DD")
+
+        if end_date:
+            try:
+                end = (datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1)).date()
+            except ValueError:
+                raise ValueError(f"Неверный формат end_date: {end_date}. Используйте YYYY-MM-DD")
+
+        rollups = await self.summarize_repository.get_rollups(uuid_object, period, uuid_equipment, start, end)
+
+        equipment_uuids = list({str(i.uuid_equipment) for i in rollups})
+        equipment_list = await self.equipment_repository.get_equipment_by_uuid_set(equipment_uuids)
+        names = {str(e.uuid): e.name for e in equipment_list}
+
+        result = []
+        for rollup in rollups:
+            rollup_model = GetSummarizeRollup.model_validate(rollup, from_attributes=True)
+            rollup_model.equipment_name = names.get(str(rollup.uuid_equipment))
+            result.append(rollup_model)
+
+        return result
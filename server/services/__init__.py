@@ -9,5 +9,9 @@ from .EnvService import EnvService
 from .EmailService import EmailService
 from .ProposalsService import ProposalsService
 from .SummarizeService import SummarizeService
+from .LogSearchService import LogSearchService
+from .LogRateService import LogRateService
 from .ReportService import ReportService
 
+from .BlobService import BlobService
+from .StorageGcService import StorageGcService
@@ -42,6 +42,108 @@ class Settings(BaseSettings):
     user_service_url: str
     object_equipment_service_url: str
 
+    reference_cache_ttl: int = 300
+    env_cache_max_age: int = 0
+
+    render_pool_size: int = 2
+
+    # Кеш горячих объектов MinIO в памяти воркера, МБ
+    object_cache_size: int = 256
+    object_cache_max_item: int = 16
+
+    # Лимиты загружаемых файлов, МБ
+    upload_max_size_document: int = 50
+    upload_max_size_blueprint: int = 20
+
+    # Отдача файлов: proxy – байты идут через воркер, presigned – редирект на
+    # подписанную ссылку MinIO, accel – X-Accel-Redirect во внутренний location nginx
+    download_mode: str = "proxy"
+    download_url_ttl: int = 300
+    minio_public_url: str | None = None
+    accel_redirect_location: str = "/minio-internal/"
+
+    # Пул соединений и параллельные чтения MinIO (размеры диапазонов в МБ)
+    minio_pool_size: int = 32
+    minio_max_concurrency: int = 16
+    minio_range_threshold: int = 16
+    minio_range_part_size: int = 8
+
+    # Сборка мусора в хранилище: объекты моложе storage_gc_grace часов не трогаются
+    storage_gc_grace: int = 24
+    storage_gc_page_size: int = 1000
+    # Архивы пакетной генерации (batch/ в бакете document) в базе не учитываются:
+    # сборщик удаляет их старше batch_artifact_ttl часов (None – хранить бессрочно)
+    batch_artifact_ttl: int | None = 168
+
+    # Обратный индекс «оборудование -> объект»: время жизни списков (секунды)
+    # и число одновременных запросов к микросервису при его наполнении
+    equipment_index_ttl: int = 600
+    equipment_index_concurrency: int = 8
+
+    # HTTP-адаптеры к микросервисам: таймаут по умолчанию и SLO эндпоинтов
+    # ("GET /v1/object/one/{id}": 2), предохранитель, дублирование медленных GET
+    # (перцентиль задержки, например 0.95; None – выключено), устаревшие ответы
+    http_timeout: float = 5
+    http_timeouts: dict[str, float] = {}
+    http_breaker_failures: int = 5
+    http_breaker_reset: float = 30
+    http_hedge_percentile: float | None = None
+    http_stale_ttl: int = 600
+    # Эндпоинты, для которых устаревший ответ не отдаётся: профиль по токену
+    # аутентифицирует запрос, и отозванный токен не должен работать из кэша
+    http_no_stale: list[str] = ["GET /v1/user/get/profile"]
+    http_pool_size: int = 100
+
+    # Зеркало справочника объектов и оборудования: срок актуальности записей и
+    # период фоновой синхронизации (секунды). Синхронизация работает, только
+    # если задан сервисный токен микросервиса Object & Equipment
+    directory_ttl: int = 3600
+    directory_sync_interval: int = 300
+    object_equipment_service_token: str | None = None
+
+    # Свёртка сводок анализа логов: месяцы -> квартал -> год. Период фоновой
+    # свёртки (секунды; работает, только если настроен LLM) и предел длины
+    # каждого раздела контекста, который получает промпт анализа (символы)
+    summarize_compaction_interval: int = 3600
+    summarize_context_max_chars: int = 4000
+
+    # Помесячные секции log_messages_error: период обслуживания (секунды),
+    # сколько месяцев вперёд создавать, срок хранения в месяцах (None – без
+    # ограничения) и удалять ли отсоединённые секции (иначе остаются таблицами)
+    log_partition_interval: int = 86400
+    log_partition_ahead: int = 3
+    log_retention_months: int | None = None
+    log_retention_drop: bool = False
+    # Анализ берёт необработанные логи текущего и стольких предыдущих месяцев
+    # (None – все необработанные логи; ограничение окна оставляет более
+    # старые логи необработанными)
+    log_analysis_window_months: int | None = None
+
+    # Архив обработанных логов в MinIO (NDJSON + zstd, по объекту и месяцу):
+    # логи старше log_archive_after_days дней переносятся в архив и удаляются
+    # из Postgres пачками (None – архивирование выключено)
+    log_archive_after_days: int | None = None
+    log_archive_bucket: str = "log-archive"
+    log_archive_interval: int = 86400
+    log_archive_file_rows: int = 100000
+    log_archive_delete_batch: int = 5000
+    log_archive_level: int = 10
+
+    # Поиск логов: наибольший период запроса (дни) и фасеты – сколько
+    # подходящих строк учитывается и сколько оборудования возвращается
+    log_search_max_days: int = 31
+    log_search_facet_limit: int = 100000
+    log_search_facet_size: int = 20
+
+    # Частота логов по интервалам: наибольший период (дни) и число интервалов,
+    # коэффициент сглаживания EWMA базовой линии, порог z-оценки всплеска и
+    # наименьшее число логов в интервале, чтобы считать его всплеском
+    log_rates_max_days: int = 92
+    log_rates_max_buckets: int = 2000
+    log_rates_alpha: float = 0.1
+    log_rates_burst_z: float = 3.0
+    log_rates_burst_min_count: int = 5
+
     root_path: str = os.path.dirname(os.path.abspath(__file__))
 
 
@@ -7,7 +7,13 @@ from sqlalchemy import (
     ForeignKey,
     Boolean,
     Float,
-    Date
+    Date,
+    BigInteger,
+    UniqueConstraint,
+    Index,
+    text,
+    event,
+    DDL
 )
 
 from sqlalchemy.dialects.postgresql import JSONB, UUID
@@ -72,7 +78,7 @@ class SignsAccident(base):
 class CodeErrorAccident(base):
     __tablename__ = "code_error_accident"
     id = Column(Integer, autoincrement=True, primary_key=True)
-    name = Column(String, nullable=False)
+    name = Column(String, unique=True, nullable=False)
     description = Column(String, nullable=True)
 
 
@@ -210,6 +216,39 @@ class FileDocument(base):
     size = Column(Float, nullable=True)
 
 
+class Blob(base):
+    """Содержимое файла, хранящееся в MinIO в единственном экземпляре."""
+    __tablename__ = "blob"
+    id = Column(Integer, autoincrement=True, primary_key=True)
+
+    # SHA-256 содержимого
+    hash = Column(String(64), unique=True, nullable=False)
+    file_key = Column(String, nullable=False, unique=True)
+    size = Column(BigInteger, nullable=False)
+    content_type = Column(String, nullable=True)
+
+    ref_count = Column(Integer, nullable=False, default=0, server_default="0")
+    datetime = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+
+class BlobSlot(base):
+    """Место файла у владельца: документ заявки, вложение аварии, файл бланка."""
+    __tablename__ = "blob_slot"
+    id = Column(Integer, autoincrement=True, primary_key=True)
+
+    # claim / accident / blueprint
+    owner_type = Column(String(16), nullable=False)
+    # UUID заявки/аварии или id бланка
+    owner_id = Column(String, nullable=False)
+    # main/edit для заявки, имя файла для вложений аварии
+    name = Column(String, nullable=False)
+
+    id_blob = Column(ForeignKey("blob.id"), nullable=False, index=True)
+    blob = relationship(Blob, lazy="joined")
+
+    __table_args__ = (UniqueConstraint("owner_type", "owner_id", "name"),)
+
+
 class TechnicalProposals(base):
     __tablename__ = "technical_proposals"
     id = Column(Integer, autoincrement=True, primary_key=True)
@@ -239,15 +278,19 @@ class TechnicalProposals(base):
 
 
 class LogMessageError(base):
+    """
+    Секционирована по месяцам create_at (см. server/partitions.py): ключ
+    секционирования входит в первичный ключ и уникальность uuid.
+    """
     __tablename__ = "log_messages_error"
     id = Column(Integer, autoincrement=True, primary_key=True)
-    uuid = Column(UUID(as_uuid=True), unique=True, default=uuid4)
+    uuid = Column(UUID(as_uuid=True), default=uuid4)
 
     # UUID объекта и оборудования из внешнего микросервиса
     uuid_object = Column(UUID(as_uuid=True), nullable=True)
     uuid_equipment = Column(UUID(as_uuid=True), nullable=True)
 
-    create_at = Column(DateTime(timezone=False), nullable=False)
+    create_at = Column(DateTime(timezone=False), primary_key=True, nullable=False)
     
     message = Column(Text, nullable=False)
 
@@ -259,6 +302,38 @@ class LogMessageError(base):
     entity_equipment = Column(String, nullable=True)
     number_equipment = Column(Integer, nullable=True)
 
+    __table_args__ = (
+        UniqueConstraint("uuid", "create_at"),
+        # Необработанные логи объекта и оборудования – для анализа
+        Index("ix_log_messages_error_unprocessed", "uuid_object", "uuid_equipment", "create_at",
+              postgresql_where=text("is_processed = false")),
+        # Поиск логов (LogMessageErrorRepository.search): фильтры объекта,
+        # оборудования и класса с порядком create_at DESC, id DESC
+        Index("ix_log_messages_error_object_create_at", "uuid_object", "create_at", "id"),
+        Index("ix_log_messages_error_equipment_create_at", "uuid_object", "uuid_equipment", "create_at", "id"),
+        Index("ix_log_messages_error_class_create_at", "uuid_object", "class_log_int", "create_at", "id"),
+        # Подстрока сообщения (ILIKE) – триграммы pg_trgm
+        Index("ix_log_messages_error_message_trgm", "message",
+              postgresql_using="gin", postgresql_ops={"message": "gin_trgm_ops"}),
+        {"postgresql_partition_by": "RANGE (create_at)"},
+    )
+
+
+# Триграммный индекс сообщения требует расширения pg_trgm
+event.listen(
+    LogMessageError.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"),
+)
+
+# Секция по умолчанию, чтобы таблица, созданная через create_all, принимала строки;
+# в миграциях помесячные секции создаются явно
+event.listen(
+    LogMessageError.__table__,
+    "after_create",
+    DDL("CREATE TABLE IF NOT EXISTS log_messages_error_default PARTITION OF log_messages_error DEFAULT"),
+)
+
 
 class Summarize(base):
     __tablename__ = "summatize"
@@ -272,6 +347,94 @@ class Summarize(base):
 
     datetime_start = Column(DateTime(timezone=False), nullable=False)
     datetime_end = Column(DateTime(timezone=False), nullable=True)
+    # Первое число месяца сводки: одна сводка на объект, оборудование и месяц
+    month = Column(Date, nullable=False)
 
     metadata_equipment = Column(MutableDict.as_mutable(JSONB), nullable=False)
 
+    __table_args__ = (
+        UniqueConstraint("uuid_object", "uuid_equipment", "month"),
+        # Список сводок объекта постранично: ORDER BY datetime_start DESC, id DESC
+        Index("ix_summatize_object_start", "uuid_object", "datetime_start", "id"),
+    )
+
+
+class SummarizeRollup(base):
+    """Свёртка сводок за квартал (из месячных) или год (из квартальных)."""
+    __tablename__ = "summatize_rollup"
+    id = Column(Integer, autoincrement=True, primary_key=True)
+    uuid = Column(UUID(as_uuid=True), unique=True, default=uuid4)
+
+    uuid_object = Column(UUID(as_uuid=True), nullable=False)
+    uuid_equipment = Column(UUID(as_uuid=True), nullable=False)
+    # quarter | year
+    period = Column(String, nullable=False)
+    period_start = Column(Date, nullable=False)
+
+    text = Column(Text, nullable=False)
+    metadata_equipment = Column(MutableDict.as_mutable(JSONB), nullable=False)
+
+    # Число свёрнутых сводок и момент последнего изменения среди них:
+    # свёртка пересчитывается, когда источники изменились позже
+    source_count = Column(Integer, nullable=False)
+    source_updated_at = Column(DateTime(timezone=False), nullable=False)
+    updated_at = Column(DateTime(timezone=False), nullable=False, default=datetime.now)
+
+    __table_args__ = (UniqueConstraint("uuid_object", "uuid_equipment", "period", "period_start"),)
+
+
+class EmailOutbox(base):
+    """Письмо, ожидающее отправки; пишется в одной транзакции с изменением, о котором уведомляет."""
+    __tablename__ = "email_outbox"
+    id = Column(Integer, autoincrement=True, primary_key=True)
+
+    to_email = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    body = Column(Text, nullable=False)
+    is_html = Column(Boolean, nullable=False, default=True)
+
+    # pending / sent / failed; digest – событие ждёт сборки в дайджест
+    state = Column(String(16), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    datetime = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+
+    # Контекст рассылки и шаблон – по ним события собираются в дайджест
+    context = Column(String, nullable=True)
+    template_name = Column(String, nullable=True)
+
+    __table_args__ = (
+        Index("ix_email_outbox_pending", "next_attempt_at", postgresql_where=text("state = 'pending'")),
+        Index("ix_email_outbox_digest", "to_email", "context", postgresql_where=text("state = 'digest'")),
+    )
+
+
+class DirectoryObject(base):
+    """Локальное зеркало объекта из микросервиса Object & Equipment."""
+    __tablename__ = "directory_object"
+    uuid = Column(UUID(as_uuid=True), primary_key=True)
+
+    name = Column(String, nullable=False)
+    # Ответ микросервиса целиком (GetObject)
+    payload = Column(JSONB, nullable=False)
+    synced_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    # ETag и время загрузки списка оборудования объекта
+    equipment_etag = Column(String, nullable=True)
+    equipment_synced_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class DirectoryEquipment(base):
+    """Локальное зеркало оборудования из микросервиса Object & Equipment."""
+    __tablename__ = "directory_equipment"
+    uuid = Column(UUID(as_uuid=True), primary_key=True)
+
+    # Объект известен, если оборудование пришло из списка оборудования объекта
+    uuid_object = Column(UUID(as_uuid=True), nullable=True, index=True)
+    name = Column(String, nullable=False)
+    # Ответ микросервиса целиком (GetEquipment)
+    payload = Column(JSONB, nullable=False)
+    synced_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
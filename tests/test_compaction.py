@@ -0,0 +1,26 @@
+from datetime import date
+
+from server.compaction import merge_metadata, period_end, previous_quarter, quarter_start, truncate
+
+
+def test_quarter_bounds():
+    assert quarter_start(date(2026, 11, 19)) == date(2026, 10, 1)
+    assert previous_quarter(date(2026, 11, 1)) == date(2026, 7, 1)
+    assert previous_quarter(date(2026, 2, 1)) == date(2025, 10, 1)
+    assert period_end("quarter", date(2026, 10, 1)) == date(2027, 1, 1)
+    assert period_end("year", date(2026, 1, 1)) == date(2027, 1, 1)
+
+
+def test_merge_metadata():
+    merged = merge_metadata([
+        {"problematic_nodes": ["A", "B"], "statistics": {"total_logs": 10, "error_count": 2}},
+        {"problematic_nodes": ["B"], "statistics": {"total_logs": 5}},
+        {},
+    ])
+    assert merged["problematic_nodes"] == ["B", "A"]
+    assert merged["statistics"] == {"total_logs": 15, "error_count": 2}
+
+
+def test_truncate():
+    assert truncate("abc", 5) == "abc"
+    assert truncate("abcdef", 3) == "abc\n…"
@@ -0,0 +1,39 @@
+import asyncio
+import io
+import json
+from datetime import datetime
+from types import SimpleNamespace
+from uuid import uuid4
+
+import zstandard
+
+from server.log_archive import decompress, iter_lines, record_line
+
+
+def _row(index: int):
+    return SimpleNamespace(id=index, uuid=uuid4(), uuid_object=uuid4(), uuid_equipment=None,
+                           create_at=datetime(2026, 1, 1, 0, 0, index), message=f"сообщение {index}",
+                           class_log_text="ERROR", class_log_int=3,
+                           entity_equipment=None, number_equipment=None)
+
+
+def test_archive_roundtrip():
+    buffer = io.BytesIO()
+    with zstandard.ZstdCompressor().stream_writer(buffer, closefd=False) as writer:
+        for index in range(50):
+            writer.write(record_line(_row(index)))
+    compressed = buffer.getvalue()
+
+    async def chunks():
+        # Мелкие куски: строки и кадры zstd разрываются на границах
+        for offset in range(0, len(compressed), 7):
+            yield compressed[offset:offset + 7]
+
+    async def collect():
+        return [line async for line in iter_lines(decompress(chunks()))]
+
+    lines = asyncio.run(collect())
+    records = [json.loads(line) for line in lines]
+    assert [r["id"] for r in records] == list(range(50))
+    assert records[3]["message"] == "сообщение 3"
+    assert all(line.endswith(b"\n") for line in lines)
@@ -0,0 +1,26 @@
+import numpy as np
+
+from server.services.LogRateService import ewma_scores
+
+
+def test_ewma_scores_detects_burst():
+    counts = np.array([
+        [2] * 20 + [40],
+        [5] * 21,
+    ])
+    baseline, score = ewma_scores(counts, 0.1)
+    assert baseline.shape == score.shape == counts.shape
+    assert score[0, -1] > 3
+    assert np.allclose(score[1], 0)
+    assert np.allclose(baseline[1], 5)
+
+
+def test_ewma_scores_quiet_series():
+    # Одиночный лог на пустом фоне – не всплеск
+    baseline, score = ewma_scores(np.array([[0, 0, 0, 1, 0]]), 0.1)
+    assert score.max() <= 1
+
+
+def test_ewma_scores_empty():
+    baseline, score = ewma_scores(np.zeros((0, 0)), 0.1)
+    assert baseline.shape == score.shape == (0, 0)
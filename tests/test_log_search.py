@@ -0,0 +1,39 @@
+from datetime import datetime
+
+import pytest
+
+from server.models.LogMessageError import LogSearchResult
+from server.repositories.LogMessageErrorRepository import escape_like
+from server.services.LogSearchService import search_period
+
+
+def test_search_period_default_last_day():
+    now = datetime(2026, 10, 19, 12, 0, 0)
+    assert search_period(None, None, 31, now=now) == (datetime(2026, 10, 18, 12, 0, 0), now)
+
+
+def test_search_period_limits():
+    assert search_period("2026-10-01", "2026-10-19T10:00:00", 31)[1] == datetime(2026, 10, 19, 10, 0, 0)
+    with pytest.raises(ValueError):
+        search_period("2026-08-01", "2026-10-01", 31)
+    with pytest.raises(ValueError):
+        search_period("2026-10-02", "2026-10-01", 31)
+    with pytest.raises(ValueError):
+        search_period("01.10.2026", None, 31)
+
+
+def test_escape_like():
+    assert escape_like("50%_a\\b") == "50\\%\\_a\\\\b"
+
+
+def test_search_item_accepts_missing_uuid_and_flag():
+    record = {
+        "id": 1, "uuid": None, "uuid_object": None, "uuid_equipment": None,
+        "create_at": "2026-10-19T10:00:00", "message": "m", "class_log_text": "E", "class_log_int": 2,
+        "is_processed": None, "entity_equipment": None, "number_equipment": None,
+    }
+    result = LogSearchResult(items=[record, dict(record, uuid="00000000-0000-0000-0000-000000000001")],
+                             by_class_log_int={}, by_equipment=[], facet_rows=0, facets_truncated=False)
+    items = result.model_dump(mode="json")["items"]
+    assert items[0]["uuid"] is None and items[0]["is_processed"] is None
+    assert items[1]["uuid"] == "00000000-0000-0000-0000-000000000001"
@@ -0,0 +1,130 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+from server.mailer import SmtpPool, build_message, render_item, render_email
+
+
+class StandInSmtpServer:
+    """Минимальный SMTP-сервер на asyncio: принимает письма и считает соединения."""
+
+    def __init__(self, refuse: set[str] | None = None, drop_after: int | None = None):
+        self.refuse = refuse or set()
+        self.drop_after = drop_after
+        self.connections = 0
+        self.messages: list[tuple[list[str], bytes]] = []
+        self.server: asyncio.base_events.Server | None = None
+
+    @property
+    def port(self) -> int:
+        return self.server.sockets[0].getsockname()[1]
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        return self
+
+    async def __aexit__(self, *args):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        recipients = []
+        writer.write(b"220 localhost ready\r\n")
+        while line := await reader.readline():
+            command = line.decode().strip()
+            verb = command[:4].upper()
+            if verb == "EHLO":
+                writer.write(b"250-localhost\r\n250 8BITMIME\r\n")
+            elif verb in ("HELO", "NOOP"):
+                writer.write(b"250 OK\r\n")
+            elif verb in ("MAIL", "RSET"):
+                recipients = []
+                writer.write(b"250 OK\r\n")
+            elif verb == "RCPT":
+                address = command.split(":", 1)[1].strip(" <>")
+                if address in self.refuse:
+                    writer.write(b"550 no such user\r\n")
+                else:
+                    recipients.append(address)
+                    writer.write(b"250 OK\r\n")
+            elif verb == "DATA":
+                writer.write(b"354 go ahead\r\n")
+                await writer.drain()
+                data = await reader.readuntil(b"\r\n.\r\n")
+                self.messages.append((recipients, data))
+                writer.write(b"250 queued\r\n")
+                if self.drop_after is not None and len(self.messages) == self.drop_after:
+                    await writer.drain()
+                    break
+            elif verb == "QUIT":
+                writer.write(b"221 bye\r\n")
+                await writer.drain()
+                break
+            else:
+                writer.write(b"502 not implemented\r\n")
+            await writer.drain()
+        writer.close()
+
+
+def get_messages(count: int, refused: str | None = None):
+    return [build_message("noreply@test.ru",
+                          refused if refused and i == 1 else f"user{i}@test.ru",
+                          f"Тема {i}",
+                          f"<p>Письмо {i}</p>",
+                          True)
+            for i in range(count)]
+
+
+async def test_pool_reuses_connection():
+    async with StandInSmtpServer() as server:
+        pool = SmtpPool("127.0.0.1", server.port, use_ssl=False, size=1, timeout=5)
+        errors = await pool.send_batch(get_messages(3))
+        errors += await pool.send_batch(get_messages(2))
+        await asyncio.to_thread(pool.close)
+
+    assert errors == [None] * 5
+    assert len(server.messages) == 5
+    assert server.connections == 1
+
+
+async def test_pool_reports_refused_recipient():
+    async with StandInSmtpServer(refuse={"bad@test.ru"}) as server:
+        pool = SmtpPool("127.0.0.1", server.port, use_ssl=False, size=1, timeout=5)
+        errors = await pool.send_batch(get_messages(3, refused="bad@test.ru"))
+        await asyncio.to_thread(pool.close)
+
+    assert errors[0] is None and errors[2] is None
+    assert "bad@test.ru" in errors[1]
+    assert len(server.messages) == 2
+    assert server.connections == 1
+
+
+async def test_pool_reconnects_after_drop():
+    async with StandInSmtpServer(drop_after=1) as server:
+        pool = SmtpPool("127.0.0.1", server.port, use_ssl=False, size=1, timeout=5)
+        errors = await pool.send_batch(get_messages(2))
+        await asyncio.to_thread(pool.close)
+
+    assert errors == [None, None]
+    assert len(server.messages) == 2
+    assert server.connections == 2
+
+
+def test_digest_renders_one_email():
+    user = SimpleNamespace(surname="Иванов", name="Иван", patronymic="Иванович")
+    items = [
+        render_item("claim_update_state.html", {"claim": SimpleNamespace(
+            id=i,
+            accident=SimpleNamespace(object=SimpleNamespace(name=f"Объект {i}"), damaged_equipment=[]),
+            datetime=datetime(2024, 1, 1, 12, 0, i),
+            user=user,
+            state_claim=SimpleNamespace(description="Принята", name="accepted"),
+        )})
+        for i in range(3)
+    ]
+    body = render_email("claim_update_state.html", items)
+
+    assert body.count("<html>") == 1
+    assert all(f"Объект {i}" in body for i in range(3))
+    assert "&lt;tr&gt;" not in body
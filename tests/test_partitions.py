@@ -0,0 +1,79 @@
+import asyncio
+from datetime import date
+
+from server.partitions import LogPartitionMaintainer, add_months, partition_month, partition_name
+
+
+def test_partition_names():
+    assert partition_name(date(2026, 3, 1)) == "log_messages_error_y2026m03"
+    assert partition_month("log_messages_error_y2026m03") == date(2026, 3, 1)
+    assert partition_month("log_messages_error_default") is None
+
+
+def test_add_months():
+    assert add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+
+
+def test_retention():
+    keep_forever = LogPartitionMaintainer(None, 0, 3)
+    assert not keep_forever.is_expired(date(2000, 1, 1), date(2026, 10, 19))
+
+    maintainer = LogPartitionMaintainer(None, 0, 3, retention_months=12)
+    today = date(2026, 10, 19)
+    assert maintainer.is_expired(date(2025, 9, 1), today)
+    assert not maintainer.is_expired(date(2025, 10, 1), today)
+
+
+class _Session:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+
+class _Savepoint(_Session):
+    def __init__(self, repo):
+        self.repo = repo
+
+    async def __aexit__(self, exc_type, *args):
+        if exc_type is not None:
+            self.repo.rolled_back += 1
+        return False
+
+
+class _Repo:
+    def __init__(self, session):
+        self.created = []
+        self.rolled_back = 0
+        _Repo.last = self
+
+    async def try_lock(self):
+        return True
+
+    async def get_partitions(self):
+        return ["log_messages_error_default"]
+
+    def savepoint(self):
+        return _Savepoint(self)
+
+    async def create_partition(self, name, start, end, default=None):
+        assert default == "log_messages_error_default"
+        if name == "log_messages_error_y2026m11":
+            raise RuntimeError("partition constraint violated")
+        self.created.append(name)
+        return 2 if name == "log_messages_error_y2026m10" else 0
+
+    async def commit(self):
+        pass
+
+
+def test_failed_partition_does_not_stop_others(monkeypatch):
+    monkeypatch.setattr("server.partitions.LogPartitionRepository", _Repo)
+    maintainer = LogPartitionMaintainer(_Session, 0, 2)
+    result = asyncio.run(maintainer.run_once(date(2026, 10, 19)))
+    assert result["created"] == ["log_messages_error_y2026m10", "log_messages_error_y2026m12"]
+    assert result["failed"] == ["log_messages_error_y2026m11"]
+    assert result["moved"] == ["log_messages_error_y2026m10: 2"]
+    assert _Repo.last.rolled_back == 1
@@ -0,0 +1,92 @@
+import asyncio
+
+import httpx
+import pytest
+
+from server.resilience import ResilientTransport, CircuitOpenError, endpoint_key
+
+
+def get_client(handler, **kwargs) -> tuple[httpx.AsyncClient, ResilientTransport]:
+    transport = ResilientTransport(httpx.MockTransport(handler), **kwargs)
+    return httpx.AsyncClient(transport=transport, timeout=None), transport
+
+
+def test_endpoint_key_hides_ids():
+    request = httpx.Request("GET", "http://svc/v1/object/3fa85f64-5717-4562-b3fc-2c963f66afa6/equipment/list")
+    assert endpoint_key(request) == "GET /v1/object/{id}/equipment/list"
+
+
+async def test_slow_response_times_out():
+    async def handler(request):
+        await asyncio.sleep(1)
+        return httpx.Response(200, json={})
+
+    client, transport = get_client(handler, default_timeout=0.05)
+    with pytest.raises(httpx.ReadTimeout):
+        await client.get("http://svc/v1/user/get/profile")
+    stats = transport.snapshot()["svc"]["endpoints"]["GET /v1/user/get/profile"]
+    assert stats["timeouts"] == 1
+
+
+async def test_open_circuit_serves_stale_and_fails_fast():
+    calls = []
+
+    async def handler(request):
+        calls.append(request.url.path)
+        if len(calls) == 1:
+            return httpx.Response(200, json={"name": "Объект"})
+        return httpx.Response(503)
+
+    client, transport = get_client(handler, failure_threshold=2, reset_timeout=60)
+    assert (await client.get("http://svc/v1/object/one/1")).json() == {"name": "Объект"}
+
+    for _ in range(2):
+        response = await client.get("http://svc/v1/object/one/1")
+        assert response.headers["X-Stale"] == "1"
+
+    # Предохранитель открыт: микросервис больше не вызывается
+    response = await client.get("http://svc/v1/object/one/1")
+    assert response.json() == {"name": "Объект"}
+    assert len(calls) == 3
+    with pytest.raises(CircuitOpenError):
+        await client.get("http://svc/v1/object/one/2")
+    assert transport.snapshot()["svc"]["state"] == "open"
+
+
+async def test_hedged_request_wins():
+    calls = []
+
+    async def handler(request):
+        calls.append(1)
+        # Первый запрос «завис», дубликат отвечает сразу
+        await asyncio.sleep(1 if len(calls) == 21 else 0.001)
+        return httpx.Response(200, json={"n": len(calls)})
+
+    client, transport = get_client(handler, default_timeout=0.5, hedge_percentile=0.9)
+    for _ in range(20):
+        await client.get("http://svc/v1/object/list")
+
+    response = await client.get("http://svc/v1/object/list")
+    assert response.json() == {"n": 22}
+    stats = transport.snapshot()["svc"]["endpoints"]["GET /v1/object/list"]
+    assert stats["hedged"] == 1 and stats["hedge_wins"] == 1
+
+
+async def test_no_stale_endpoint_fails():
+    calls = []
+
+    async def handler(request):
+        calls.append(1)
+        if len(calls) == 1:
+            return httpx.Response(200, json={"login": "user"})
+        return httpx.Response(503)
+
+    client, transport = get_client(handler, failure_threshold=1, reset_timeout=60,
+                                   no_stale=["GET /v1/user/get/profile"])
+    assert (await client.get("http://svc/v1/user/get/profile")).status_code == 200
+
+    # Отозванный токен не должен аутентифицироваться из кэша
+    response = await client.get("http://svc/v1/user/get/profile")
+    assert response.status_code == 503
+    with pytest.raises(CircuitOpenError):
+        await client.get("http://svc/v1/user/get/profile")
@@ -0,0 +1,69 @@
+import sys
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from server.settings import settings
+from server.services.StorageGcService import StorageGcService
+
+
+class _Bucket:
+    removed: list[str] = []
+
+    def __init__(self, bucket):
+        now = datetime.now(timezone.utc)
+        self.objects = [
+            SimpleNamespace(object_name="batch/old/documents.zip", size=10, last_modified=now - timedelta(days=30)),
+            SimpleNamespace(object_name="batch/new/state.json", size=1, last_modified=now - timedelta(days=2)),
+            SimpleNamespace(object_name="claim/orphan.docx", size=5, last_modified=now - timedelta(days=2)),
+            SimpleNamespace(object_name="claim/used.docx", size=5, last_modified=now - timedelta(days=2)),
+        ]
+
+    async def iter_object_pages(self, page_size=1000):
+        yield self.objects
+
+    async def remove_objects(self, keys):
+        _Bucket.removed = list(keys)
+        return []
+
+
+class _GcRepo:
+    async def delete_orphan_slots(self):
+        return 0
+
+    async def delete_unreferenced_blobs(self, older_than):
+        return 0
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+    async def get_referenced_keys(self, keys):
+        # Архивы пакетной генерации в базе не учитываются и сюда не попадают
+        assert not any(key.startswith("batch/") for key in keys)
+        return {"claim/used.docx"}
+
+    async def get_existing_accidents(self, uuids):
+        return set()
+
+
+async def test_batch_artifacts_follow_their_own_ttl(monkeypatch, tmp_path):
+    monkeypatch.setattr(sys.modules["server.services.StorageGcService"], "FileBucketRepository", _Bucket)
+    monkeypatch.setattr(settings, "root_path", str(tmp_path))
+    monkeypatch.setattr(settings, "batch_artifact_ttl", 168)
+
+    report = await StorageGcService(_GcRepo()).collect(dry_run=False)
+    assert report.orphans == 1
+    assert report.expired_artifacts == 1
+    assert sorted(_Bucket.removed) == ["batch/old/documents.zip", "claim/orphan.docx"]
+
+
+async def test_batch_artifacts_kept_without_ttl(monkeypatch, tmp_path):
+    monkeypatch.setattr(sys.modules["server.services.StorageGcService"], "FileBucketRepository", _Bucket)
+    monkeypatch.setattr(settings, "root_path", str(tmp_path))
+    monkeypatch.setattr(settings, "batch_artifact_ttl", None)
+
+    report = await StorageGcService(_GcRepo()).collect(dry_run=False)
+    assert report.expired_artifacts == 0
+    assert _Bucket.removed == ["claim/orphan.docx"]
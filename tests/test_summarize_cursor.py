@@ -0,0 +1,24 @@
+from datetime import datetime
+
+import pytest
+
+from server.services.SummarizeService import decode_cursor, encode_cursor, summarize_etag
+
+
+def test_cursor_roundtrip():
+    moment = datetime(2026, 10, 1, 0, 0, 0)
+    cursor = encode_cursor(moment, 42)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (moment, 42)
+
+
+def test_invalid_cursor():
+    with pytest.raises(ValueError):
+        decode_cursor("not a cursor")
+
+
+def test_etag_changes_with_datetime_end():
+    first = summarize_etag(1, datetime(2026, 10, 19, 10, 0, 0))
+    second = summarize_etag(1, datetime(2026, 10, 19, 10, 0, 1))
+    assert first != second
+    assert summarize_etag(1, None) == '"1-0"'